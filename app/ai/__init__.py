@@ -1,4 +1,6 @@
 """AI module for VA GPT integration."""
 from .va_gpt_client import VAGPTClient
+from .async_va_gpt_client import AsyncVAGPTClient
+from .analysis_cache import NoteAnalysisCache
 
-__all__ = ['VAGPTClient']
+__all__ = ['VAGPTClient', 'AsyncVAGPTClient', 'NoteAnalysisCache']
@@ -0,0 +1,199 @@
+"""
+Note Analysis Cache
+
+Persistent, content-addressed cache for per-note LLM analyses. Signed TIU
+notes are immutable, so an analysis can be reused whenever the note text,
+note type, prompt version, model and patient context are all unchanged.
+
+Entries live in a local SQLite file and are evicted least-recently-used once
+the cache grows past its size budget.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.utils.metrics import analysis_cache_lookups_total
+
+logger = logging.getLogger(__name__)
+
+
+class NoteAnalysisCache:
+    """Size-bounded LRU cache of note analyses stored on disk."""
+
+    def __init__(self, db_path: str = "data/cache/note_analysis_cache.sqlite3", max_size_mb: float = 256):
+        """
+        Initialize the cache, creating the backing file if needed.
+
+        Args:
+            db_path: Path to the SQLite cache file
+            max_size_mb: Total payload size to keep before evicting old entries
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS note_analysis (
+                cache_key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_note_analysis_last_access ON note_analysis(last_access)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM note_analysis").fetchone()
+        self._entries = row[0]
+        self._total_bytes = row[1]
+
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+
+        logger.info(f"Note analysis cache ready at {self.db_path} ({self._entries} entries)")
+
+    @staticmethod
+    def make_key(
+        note_text: str,
+        note_type: str,
+        context: str,
+        model: str,
+        prompt_version: str
+    ) -> str:
+        """
+        Build the content address for an analysis.
+
+        Args:
+            note_text: Full note text sent to the model
+            note_type: Note title/type included in the prompt
+            context: Rendered patient context block included in the prompt
+            model: Model name
+            prompt_version: Version of the analysis prompt template
+
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        material = json.dumps(
+            [note_text or "", note_type or "", context or "", model, prompt_version],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis and mark it recently used.
+
+        Returns:
+            Cached analysis dict, or None on a miss
+        """
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT payload FROM note_analysis WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._misses += 1
+                    analysis_cache_lookups_total.inc(result="miss")
+                    return None
+                self._conn.execute(
+                    "UPDATE note_analysis SET last_access = ? WHERE cache_key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                self._hits += 1
+                analysis_cache_lookups_total.inc(result="hit")
+                return json.loads(row[0])
+            except (sqlite3.Error, json.JSONDecodeError) as e:
+                logger.warning(f"Note analysis cache read failed: {e}")
+                self._misses += 1
+                analysis_cache_lookups_total.inc(result="miss")
+                return None
+
+    def put(self, key: str, analysis: Dict[str, Any]) -> None:
+        """Store an analysis, evicting least-recently-used entries if over budget."""
+        payload = json.dumps(analysis, default=str)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            try:
+                previous = self._conn.execute(
+                    "SELECT size_bytes FROM note_analysis WHERE cache_key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO note_analysis (cache_key, payload, size_bytes, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, size, now, now)
+                )
+                if previous:
+                    self._total_bytes -= previous[0]
+                else:
+                    self._entries += 1
+                self._total_bytes += size
+                self._writes += 1
+                self._evict_locked()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Note analysis cache write failed: {e}")
+
+    def _evict_locked(self) -> None:
+        """Drop oldest-accessed entries until the cache fits its size budget."""
+        while self._total_bytes > self.max_bytes and self._entries > 0:
+            victims = self._conn.execute(
+                "SELECT cache_key, size_bytes FROM note_analysis ORDER BY last_access ASC LIMIT 64"
+            ).fetchall()
+            if not victims:
+                break
+            for cache_key, size in victims:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM note_analysis WHERE cache_key = ?", (cache_key,))
+                self._total_bytes -= size
+                self._entries -= 1
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove every cached analysis."""
+        with self._lock:
+            self._conn.execute("DELETE FROM note_analysis")
+            self._conn.commit()
+            self._entries = 0
+            self._total_bytes = 0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with entries, size, hits, misses, hit rate and evictions
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": self._entries,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "writes": self._writes,
+                "evictions": self._evictions
+            }
+
+    def close(self) -> None:
+        """Close the backing database."""
+        with self._lock:
+            self._conn.close()
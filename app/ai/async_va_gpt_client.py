@@ -0,0 +1,415 @@
+"""
+Async VA GPT Client for Document Analysis
+Event-loop variant of VAGPTClient built on AsyncAzureOpenAI, so many in-flight
+LLM requests can be multiplexed without tying up threadpool workers.
+"""
+
+import asyncio
+import os
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+
+from .va_gpt_client import (
+    DEFAULT_MODEL,
+    DEFAULT_TEMPERATURE,
+    AZURE_API_VERSION,
+    AZURE_ENDPOINT,
+    SUMMARY_SYSTEM_PROMPT,
+    COMPARISON_SYSTEM_PROMPT,
+    CONSOLIDATION_SYSTEM_PROMPT,
+    build_note_context_section,
+    build_note_analysis_prompt,
+    build_comparison_user_content,
+    build_consolidation_user_content,
+    extract_json_object,
+    note_analysis_cache_key,
+    note_summary_cache_key,
+    cached_note_analysis,
+    response_usage
+)
+from .analysis_cache import NoteAnalysisCache
+
+# Try to import the async OpenAI clients
+try:
+    from openai import AsyncAzureOpenAI, AsyncOpenAI
+except ImportError:
+    AsyncAzureOpenAI = None
+    AsyncOpenAI = None
+
+# httpx ships with openai; used to size the shared connection pool
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncVAGPTClient:
+    """Async client for VA GPT document analysis and diagnosis extraction."""
+
+    def __init__(
+        self,
+        api_key: str = None,
+        use_azure: bool = True,
+        max_connections: int = 20,
+        request_timeout: float = 120.0,
+        cache: Optional[NoteAnalysisCache] = None
+    ):
+        """
+        Initialize async VA GPT client.
+
+        All requests share one HTTP connection pool owned by this client.
+        Create it inside the event loop that will use it.
+
+        Args:
+            api_key: OpenAI/Azure API key (defaults to Key.env)
+            use_azure: Whether to use Azure OpenAI or standard OpenAI
+            max_connections: Size of the shared HTTP connection pool
+            request_timeout: Default per-call timeout in seconds
+            cache: Optional on-disk cache of note analyses (may be shared with VAGPTClient)
+        """
+        self.api_key = api_key
+        self.use_azure = use_azure
+        self.max_connections = max_connections
+        self.request_timeout = request_timeout
+        self.cache = cache
+        self.client = None
+        self._http_client = None
+
+        # Initialize API client
+        self._init_api_client()
+
+    def _init_api_client(self):
+        """Initialize AsyncOpenAI/AsyncAzureOpenAI client using VA GPT configuration."""
+        if not AsyncAzureOpenAI and not AsyncOpenAI:
+            logger.warning("OpenAI library not installed (async client unavailable)")
+            return
+
+        # Get API key from environment
+        api_key = self.api_key or os.getenv('VA_AI_API_KEY')
+
+        if not api_key:
+            logger.warning("No API key found. Set VA_AI_API_KEY in Key.env file")
+            return
+
+        try:
+            if httpx is not None:
+                self._http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    ),
+                    timeout=self.request_timeout
+                )
+
+            if self.use_azure:
+                logger.info("Initializing async Azure OpenAI with VA GPT endpoint...")
+                self.client = AsyncAzureOpenAI(
+                    api_key=api_key,
+                    api_version=AZURE_API_VERSION,
+                    azure_endpoint=AZURE_ENDPOINT,
+                    http_client=self._http_client
+                )
+                logger.info("Initialized async VA GPT (Azure OpenAI) client")
+            else:
+                logger.info("Initializing async standard OpenAI client...")
+                self.client = AsyncOpenAI(api_key=api_key, http_client=self._http_client)
+                logger.info("Initialized async OpenAI client")
+
+        except Exception as e:
+            logger.error(f"Error initializing async API client: {type(e).__name__}: {str(e)}", exc_info=True)
+            self.client = None
+
+    async def _complete(
+        self,
+        system_prompt: str,
+        user_content: str,
+        max_tokens: int,
+        timeout: Optional[float]
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Run one chat completion with a hard per-call deadline.
+
+        Cancelling the awaiting task cancels the underlying HTTP request.
+
+        Returns:
+            Tuple of (response text, token usage)
+        """
+        call_timeout = self.request_timeout if timeout is None else timeout
+        response = await asyncio.wait_for(
+            self.client.chat.completions.create(
+                model=DEFAULT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=DEFAULT_TEMPERATURE,
+                max_tokens=max_tokens
+            ),
+            timeout=call_timeout
+        )
+        return response.choices[0].message.content, response_usage(response)
+
+    async def analyze_clinical_note(
+        self,
+        note_text: str,
+        note_type: str,
+        patient_context: Optional[Dict] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        context_section: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze a clinical note to extract diagnoses and clinical findings.
+
+        Args:
+            note_text: The text content of the clinical note
+            note_type: Type of note (Admission, Progress, Consult, etc.)
+            patient_context: Optional context about the patient (vitals, labs, etc.)
+            timeout: Optional per-call timeout in seconds
+            use_cache: Set False to bypass the analysis cache and always call the model
+            context_section: Prebuilt context text (ClinicalContext.render_for_note);
+                takes precedence over patient_context
+
+        Returns:
+            Dict with extracted diagnoses, findings, and confidence scores
+            ('cached' is True when served from the analysis cache)
+        """
+        if not self.client:
+            return {
+                'success': False,
+                'error': 'API client not initialized. Check API credentials.',
+                'diagnoses': []
+            }
+
+        if context_section is None:
+            context_section = build_note_context_section(patient_context)
+        system_prompt = build_note_analysis_prompt(note_type, context_section)
+
+        # Cache I/O is SQLite on local disk; keep it off the event loop
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = note_analysis_cache_key(note_text, note_type, context_section)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return cached_note_analysis(cached)
+
+        try:
+            response_text, usage = await self._complete(
+                system_prompt,
+                f"Analyze this clinical note:\n\n{note_text}",
+                max_tokens=4000,
+                timeout=timeout
+            )
+            analysis = extract_json_object(response_text)
+            if cache_key is not None and analysis is not None:
+                await asyncio.to_thread(
+                    self.cache.put, cache_key, {'analysis': analysis, 'raw_response': response_text}
+                )
+
+            return {
+                'success': True,
+                'analysis': analysis,
+                'raw_response': response_text,
+                'usage': usage
+            }
+
+        except asyncio.TimeoutError:
+            logger.error("Timed out analyzing clinical note")
+            return {
+                'success': False,
+                'error': 'Request timed out',
+                'diagnoses': []
+            }
+        except Exception as e:
+            logger.error(f"Error analyzing clinical note: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'diagnoses': []
+            }
+
+    async def summarize_note(
+        self,
+        note_text: str,
+        max_length: int = 500,
+        timeout: Optional[float] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Summarize a clinical note to reduce token usage for multi-note analysis.
+
+        Args:
+            note_text: The text content of the clinical note
+            max_length: Target maximum length for summary
+            timeout: Optional per-call timeout in seconds
+            use_cache: Set False to bypass the analysis cache and always call the model
+
+        Returns:
+            Dict with summary and key findings
+        """
+        if not self.client:
+            return {
+                'success': False,
+                'error': 'API client not initialized.',
+                'summary': None
+            }
+
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = note_summary_cache_key(note_text, max_length)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return {'success': True, 'summary': cached.get('summary'), 'cached': True}
+
+        try:
+            summary, usage = await self._complete(
+                SUMMARY_SYSTEM_PROMPT,
+                f"Summarize this note (target {max_length} characters):\n\n{note_text}",
+                max_tokens=1000,
+                timeout=timeout
+            )
+            if cache_key is not None and summary:
+                await asyncio.to_thread(self.cache.put, cache_key, {'summary': summary})
+
+            return {
+                'success': True,
+                'summary': summary,
+                'usage': usage
+            }
+
+        except asyncio.TimeoutError:
+            logger.error("Timed out summarizing note")
+            return {
+                'success': False,
+                'error': 'Request timed out',
+                'summary': None
+            }
+        except Exception as e:
+            logger.error(f"Error summarizing note: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'summary': None
+            }
+
+    async def compare_diagnoses(
+        self,
+        documented_diagnoses: List[Dict],
+        coded_diagnoses: List[Dict],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Compare AI-extracted diagnoses against actually coded diagnoses.
+
+        Args:
+            documented_diagnoses: Diagnoses extracted from clinical notes
+            coded_diagnoses: Actual ICD-10 codes from PTF
+            timeout: Optional per-call timeout in seconds
+
+        Returns:
+            Dict with comparison analysis
+        """
+        if not self.client:
+            return {
+                'success': False,
+                'error': 'API client not initialized.',
+                'comparison': None
+            }
+
+        try:
+            response_text, usage = await self._complete(
+                COMPARISON_SYSTEM_PROMPT,
+                build_comparison_user_content(documented_diagnoses, coded_diagnoses),
+                max_tokens=4000,
+                timeout=timeout
+            )
+            return {
+                'success': True,
+                'comparison': extract_json_object(response_text),
+                'raw_response': response_text,
+                'usage': usage
+            }
+
+        except asyncio.TimeoutError:
+            logger.error("Timed out comparing diagnoses")
+            return {
+                'success': False,
+                'error': 'Request timed out',
+                'comparison': None
+            }
+        except Exception as e:
+            logger.error(f"Error comparing diagnoses: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'comparison': None
+            }
+
+    async def consolidate_analyses(
+        self,
+        note_analyses: List[Dict],
+        patient_info: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Consolidate multiple note analyses into a final diagnosis list.
+
+        Args:
+            note_analyses: List of individual note analysis results
+            patient_info: Optional patient demographic/admission info
+            timeout: Optional per-call timeout in seconds
+
+        Returns:
+            Dict with consolidated diagnosis list
+        """
+        if not self.client:
+            return {
+                'success': False,
+                'error': 'API client not initialized.',
+                'consolidated': None
+            }
+
+        try:
+            response_text, usage = await self._complete(
+                CONSOLIDATION_SYSTEM_PROMPT,
+                build_consolidation_user_content(note_analyses, patient_info),
+                max_tokens=4000,
+                timeout=timeout
+            )
+            return {
+                'success': True,
+                'consolidated': extract_json_object(response_text),
+                'raw_response': response_text,
+                'usage': usage
+            }
+
+        except asyncio.TimeoutError:
+            logger.error("Timed out consolidating analyses")
+            return {
+                'success': False,
+                'error': 'Request timed out',
+                'consolidated': None
+            }
+        except Exception as e:
+            logger.error(f"Error consolidating analyses: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'consolidated': None
+            }
+
+    def is_initialized(self) -> bool:
+        """Check if the client is properly initialized."""
+        return self.client is not None
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool."""
+        if self.client is not None:
+            try:
+                await self.client.close()
+            except Exception as e:
+                logger.warning(f"Error closing async API client: {e}")
+        if self._http_client is not None:
+            await self._http_client.aclose()
@@ -10,6 +10,9 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
+from .analysis_cache import NoteAnalysisCache
+from app.analysis.clinical_context import ClinicalContext
+
 # Load environment variables from Key.env
 try:
     from dotenv import load_dotenv
@@ -31,20 +34,296 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Model settings shared by the sync and async clients
+DEFAULT_MODEL = "gpt-4o"
+DEFAULT_TEMPERATURE = 0.2
+AZURE_API_VERSION = "2024-02-15-preview"
+AZURE_ENDPOINT = "https://spd-prod-openai-va-apim.azure-api.us/api"
+
+# Bump whenever build_note_analysis_prompt changes so cached analyses are not reused
+NOTE_ANALYSIS_PROMPT_VERSION = "1"
+# Same for SUMMARY_SYSTEM_PROMPT and cached note summaries
+NOTE_SUMMARY_PROMPT_VERSION = "summary-1"
+
+
+def build_note_context_section(patient_context: Optional[Dict]) -> str:
+    """
+    Build the vitals/labs context block appended to the note analysis prompt.
+
+    Reviews build a ClinicalContext once per admission and pass the rendered
+    text per note instead; this is for callers holding raw extraction rows.
+
+    Args:
+        patient_context: Optional {"vitals": [...], "labs": [...]} CDW extraction rows
+
+    Returns:
+        Context text (empty string when no context is available)
+    """
+    if not patient_context:
+        return ""
+    return ClinicalContext.from_patient_context(patient_context).render_for()
+
+
+def build_note_analysis_prompt(note_type: str, context_section: str = "") -> str:
+    """
+    Build the system prompt for single-note diagnosis extraction.
+
+    Args:
+        note_type: Type of note (Admission, Progress, Consult, etc.)
+        context_section: Output of build_note_context_section
+
+    Returns:
+        System prompt text
+    """
+    return f"""You are an expert clinical documentation analyst and medical coder.
+Your task is to analyze clinical notes and extract diagnoses that are documented or strongly supported by clinical evidence.
+
+INSTRUCTIONS:
+1. Identify all diagnoses that are explicitly documented in the note
+2. Identify diagnoses that are strongly implied by documented findings, vital signs, and lab values
+3. For each diagnosis, provide:
+   - The diagnosis name
+   - The ICD-10-CM code (if you can determine it)
+   - Whether it's the principal diagnosis or a secondary/comorbidity
+   - Supporting evidence from the note
+   - Confidence level (HIGH, MEDIUM, LOW)
+4. Distinguish between:
+   - DOCUMENTED: Explicitly stated in the note
+   - INFERRED: Strongly supported by clinical evidence but not explicitly stated
+5. Consider the diagnostic criteria for each condition
+
+IMPORTANT:
+- Be conservative - only include diagnoses with clear clinical support
+- Use standard ICD-10-CM codes
+- Note if a diagnosis might be under-coded (e.g., unspecified when specificity is documented)
+
+NOTE TYPE: {note_type}
+{context_section}
+
+Respond in JSON format:
+{{
+    "principal_diagnosis": {{
+        "name": "...",
+        "icd10_code": "...",
+        "type": "DOCUMENTED" or "INFERRED",
+        "evidence": ["..."],
+        "confidence": "HIGH/MEDIUM/LOW"
+    }},
+    "secondary_diagnoses": [
+        {{
+            "name": "...",
+            "icd10_code": "...",
+            "type": "DOCUMENTED" or "INFERRED",
+            "evidence": ["..."],
+            "confidence": "HIGH/MEDIUM/LOW"
+        }}
+    ],
+    "potential_undercoding": [
+        {{
+            "current": "...",
+            "suggested": "...",
+            "reason": "..."
+        }}
+    ],
+    "clinical_summary": "Brief summary of key clinical findings"
+}}"""
+
+
+SUMMARY_SYSTEM_PROMPT = """You are a clinical documentation specialist.
+Summarize the following clinical note, preserving:
+1. All diagnoses mentioned (explicitly or implied)
+2. Key vital signs and lab abnormalities
+3. Significant procedures or treatments
+4. Important clinical findings
+
+Keep the summary concise but complete for coding purposes.
+Format: A single paragraph followed by a bulleted list of diagnoses."""
+
+COMPARISON_SYSTEM_PROMPT = """You are an expert medical coder and clinical documentation improvement specialist.
+Compare the diagnoses extracted from clinical documentation against the actually coded diagnoses.
+
+Identify:
+1. MATCHES: Diagnoses that are both documented and coded
+2. DOCUMENTED BUT NOT CODED: Diagnoses supported by documentation but not in the coded list
+3. CODED BUT NOT CLEARLY DOCUMENTED: Codes that lack clear documentation support
+4. SPECIFICITY OPPORTUNITIES: Where more specific codes could be used based on documentation
+5. POTENTIAL DRG IMPACT: How discrepancies might affect DRG assignment
+
+Respond in JSON format:
+{{
+    "matches": [
+        {{"documented": "...", "coded": "...", "icd10": "..."}}
+    ],
+    "documented_not_coded": [
+        {{"diagnosis": "...", "suggested_icd10": "...", "evidence": "...", "impact": "..."}}
+    ],
+    "coded_not_documented": [
+        {{"icd10": "...", "description": "...", "concern": "..."}}
+    ],
+    "specificity_opportunities": [
+        {{"current_code": "...", "suggested_code": "...", "reason": "..."}}
+    ],
+    "summary": "Overall assessment of documentation and coding alignment",
+    "recommendations": ["..."]
+}}"""
+
+CONSOLIDATION_SYSTEM_PROMPT = """You are a clinical documentation improvement specialist.
+You are given multiple analyses of clinical notes from a single hospital admission.
+Consolidate these into a single, comprehensive list of diagnoses.
+
+INSTRUCTIONS:
+1. Identify the most likely PRINCIPAL DIAGNOSIS based on:
+   - What primarily led to the admission
+   - Which diagnosis consumed the most resources
+   - Documentation from attending physicians
+2. List all SECONDARY DIAGNOSES/COMORBIDITIES that:
+   - Were present on admission (POA) or developed during stay
+   - Affected patient care or length of stay
+3. For each diagnosis, determine:
+   - Best ICD-10-CM code based on documented specificity
+   - Level of confidence (based on documentation support)
+   - Whether it's POA (Present on Admission) or developed during hospitalization
+
+Respond in JSON format:
+{{
+    "principal_diagnosis": {{
+        "name": "...",
+        "icd10_code": "...",
+        "confidence": "HIGH/MEDIUM/LOW",
+        "poa": true/false,
+        "supporting_notes": ["note types that support this"]
+    }},
+    "secondary_diagnoses": [
+        {{
+            "name": "...",
+            "icd10_code": "...",
+            "confidence": "HIGH/MEDIUM/LOW",
+            "poa": true/false,
+            "cc_mcc": "CC" or "MCC" or "None",
+            "supporting_notes": ["..."]
+        }}
+    ],
+    "clinical_summary": "Brief narrative of hospitalization",
+    "documentation_quality": "Assessment of overall documentation quality",
+    "recommendations": ["Specific CDI recommendations"]
+}}"""
+
+
+def build_comparison_user_content(documented_diagnoses: List[Dict], coded_diagnoses: List[Dict]) -> str:
+    """Build the user message for documented-vs-coded diagnosis comparison."""
+    return f"""DOCUMENTED DIAGNOSES (from clinical notes):
+{json.dumps(documented_diagnoses, indent=2)}
+
+CODED DIAGNOSES (from PTF/billing):
+{json.dumps(coded_diagnoses, indent=2)}
+
+Please compare and analyze."""
+
+
+def compact_json(value: Any) -> str:
+    """Serialize for a prompt without indentation whitespace (it costs tokens, not meaning)."""
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+def build_consolidation_user_content(note_analyses: List[Dict], patient_info: Optional[Dict] = None) -> str:
+    """Build the user message that lists every note analysis for consolidation."""
+    # Build context from note analyses
+    analyses_text = ""
+    for i, analysis in enumerate(note_analyses, 1):
+        analyses_text += f"\n--- NOTE ANALYSIS {i} ---\n"
+        analyses_text += compact_json(analysis)
+        analyses_text += "\n"
+
+    patient_context = ""
+    if patient_info:
+        patient_context = f"\n\nPATIENT CONTEXT:\n{compact_json(patient_info)}"
+
+    return f"Consolidate these note analyses:{patient_context}\n{analyses_text}"
+
+
+def extract_json_object(response_text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Pull the outermost JSON object out of a model response.
+
+    Returns:
+        Parsed dict, or None if no valid JSON object was found
+    """
+    if not response_text:
+        return None
+    try:
+        json_start = response_text.find('{')
+        json_end = response_text.rfind('}') + 1
+        if json_start >= 0 and json_end > json_start:
+            return json.loads(response_text[json_start:json_end])
+    except json.JSONDecodeError:
+        pass
+    return None
+
+
+def note_analysis_cache_key(note_text: str, note_type: str, context_section: str) -> str:
+    """Content address for a note analysis under the current prompt and model."""
+    return NoteAnalysisCache.make_key(
+        note_text=note_text,
+        note_type=note_type,
+        context=context_section,
+        model=DEFAULT_MODEL,
+        prompt_version=NOTE_ANALYSIS_PROMPT_VERSION
+    )
+
+
+def note_summary_cache_key(note_text: str, max_length: int) -> str:
+    """Content address for a note summary under the current prompt and model."""
+    return NoteAnalysisCache.make_key(
+        note_text=note_text,
+        note_type="",
+        context=str(max_length),
+        model=DEFAULT_MODEL,
+        prompt_version=NOTE_SUMMARY_PROMPT_VERSION
+    )
+
+
+def response_usage(response: Any) -> Dict[str, int]:
+    """
+    Extract token usage from a chat completion response.
+
+    Returns:
+        Dict with prompt_tokens, completion_tokens and total_tokens (zeros if not reported)
+    """
+    usage = getattr(response, 'usage', None)
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': getattr(usage, 'total_tokens', 0) or (prompt_tokens + completion_tokens)
+    }
+
+
+def cached_note_analysis(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild an analyze_clinical_note result from a cache entry."""
+    return {
+        'success': True,
+        'analysis': entry.get('analysis'),
+        'raw_response': entry.get('raw_response'),
+        'cached': True
+    }
+
 
 class VAGPTClient:
     """Client for VA GPT document analysis and diagnosis extraction."""
 
-    def __init__(self, api_key: str = None, use_azure: bool = True):
+    def __init__(self, api_key: str = None, use_azure: bool = True, cache: Optional[NoteAnalysisCache] = None):
         """
         Initialize VA GPT client.
 
         Args:
             api_key: OpenAI/Azure API key (defaults to Key.env)
             use_azure: Whether to use Azure OpenAI or standard OpenAI
+            cache: Optional on-disk cache of note analyses
         """
         self.api_key = api_key
         self.use_azure = use_azure
+        self.cache = cache
         self.client = None
         self.conversation_history = []
 
@@ -70,8 +349,8 @@ class VAGPTClient:
                 logger.info("Initializing Azure OpenAI with VA GPT endpoint...")
                 self.client = AzureOpenAI(
                     api_key=api_key,
-                    api_version="2024-02-15-preview",
-                    azure_endpoint="https://spd-prod-openai-va-apim.azure-api.us/api"
+                    api_version=AZURE_API_VERSION,
+                    azure_endpoint=AZURE_ENDPOINT
                 )
                 logger.info("Initialized VA GPT (Azure OpenAI) client")
             else:
@@ -88,7 +367,9 @@ class VAGPTClient:
         self,
         note_text: str,
         note_type: str,
-        patient_context: Optional[Dict] = None
+        patient_context: Optional[Dict] = None,
+        use_cache: bool = True,
+        context_section: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Analyze a clinical note to extract diagnoses and clinical findings.
@@ -97,9 +378,13 @@ class VAGPTClient:
             note_text: The text content of the clinical note
             note_type: Type of note (Admission, Progress, Consult, etc.)
             patient_context: Optional context about the patient (vitals, labs, etc.)
+            use_cache: Set False to bypass the analysis cache and always call the model
+            context_section: Prebuilt context text (ClinicalContext.render_for_note);
+                takes precedence over patient_context
 
         Returns:
             Dict with extracted diagnoses, findings, and confidence scores
+            ('cached' is True when served from the analysis cache)
         """
         if not self.client:
             return {
@@ -108,105 +393,40 @@ class VAGPTClient:
                 'diagnoses': []
             }
 
-        # Build context from patient data if available
-        context_section = ""
-        if patient_context:
-            if patient_context.get('vitals'):
-                context_section += "\n\nRECENT VITAL SIGNS:\n"
-                for vital in patient_context['vitals'][:10]:
-                    context_section += f"- {vital.get('type', 'Unknown')}: {vital.get('value', 'N/A')} ({vital.get('datetime', 'N/A')})\n"
-
-            if patient_context.get('labs'):
-                context_section += "\n\nRECENT LABORATORY VALUES:\n"
-                for lab in patient_context['labs'][:20]:
-                    context_section += f"- {lab.get('test', 'Unknown')}: {lab.get('value', 'N/A')} {lab.get('units', '')} ({lab.get('datetime', 'N/A')})\n"
-
-        system_prompt = f"""You are an expert clinical documentation analyst and medical coder.
-Your task is to analyze clinical notes and extract diagnoses that are documented or strongly supported by clinical evidence.
-
-INSTRUCTIONS:
-1. Identify all diagnoses that are explicitly documented in the note
-2. Identify diagnoses that are strongly implied by documented findings, vital signs, and lab values
-3. For each diagnosis, provide:
-   - The diagnosis name
-   - The ICD-10-CM code (if you can determine it)
-   - Whether it's the principal diagnosis or a secondary/comorbidity
-   - Supporting evidence from the note
-   - Confidence level (HIGH, MEDIUM, LOW)
-4. Distinguish between:
-   - DOCUMENTED: Explicitly stated in the note
-   - INFERRED: Strongly supported by clinical evidence but not explicitly stated
-5. Consider the diagnostic criteria for each condition
-
-IMPORTANT:
-- Be conservative - only include diagnoses with clear clinical support
-- Use standard ICD-10-CM codes
-- Note if a diagnosis might be under-coded (e.g., unspecified when specificity is documented)
-
-NOTE TYPE: {note_type}
-{context_section}
+        if context_section is None:
+            context_section = build_note_context_section(patient_context)
+        system_prompt = build_note_analysis_prompt(note_type, context_section)
 
-Respond in JSON format:
-{{
-    "principal_diagnosis": {{
-        "name": "...",
-        "icd10_code": "...",
-        "type": "DOCUMENTED" or "INFERRED",
-        "evidence": ["..."],
-        "confidence": "HIGH/MEDIUM/LOW"
-    }},
-    "secondary_diagnoses": [
-        {{
-            "name": "...",
-            "icd10_code": "...",
-            "type": "DOCUMENTED" or "INFERRED",
-            "evidence": ["..."],
-            "confidence": "HIGH/MEDIUM/LOW"
-        }}
-    ],
-    "potential_undercoding": [
-        {{
-            "current": "...",
-            "suggested": "...",
-            "reason": "..."
-        }}
-    ],
-    "clinical_summary": "Brief summary of key clinical findings"
-}}"""
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = note_analysis_cache_key(note_text, note_type, context_section)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached_note_analysis(cached)
 
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o",
+                model=DEFAULT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Analyze this clinical note:\n\n{note_text}"}
                 ],
-                temperature=0.2,
+                temperature=DEFAULT_TEMPERATURE,
                 max_tokens=4000
             )
 
             response_text = response.choices[0].message.content
 
-            # Try to parse JSON response
-            try:
-                # Find JSON in response
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    result = json.loads(response_text[json_start:json_end])
-                    return {
-                        'success': True,
-                        'analysis': result,
-                        'raw_response': response_text
-                    }
-            except json.JSONDecodeError:
-                pass
-
-            # Return raw response if JSON parsing fails
+            # Parse JSON response (None if the model did not return valid JSON)
+            analysis = extract_json_object(response_text)
+            if cache_key is not None and analysis is not None:
+                self.cache.put(cache_key, {'analysis': analysis, 'raw_response': response_text})
+
             return {
                 'success': True,
-                'analysis': None,
-                'raw_response': response_text
+                'analysis': analysis,
+                'raw_response': response_text,
+                'usage': response_usage(response)
             }
 
         except Exception as e:
@@ -217,13 +437,14 @@ Respond in JSON format:
                 'diagnoses': []
             }
 
-    def summarize_note(self, note_text: str, max_length: int = 500) -> Dict[str, Any]:
+    def summarize_note(self, note_text: str, max_length: int = 500, use_cache: bool = True) -> Dict[str, Any]:
         """
         Summarize a clinical note to reduce token usage for multi-note analysis.
 
         Args:
             note_text: The text content of the clinical note
             max_length: Target maximum length for summary
+            use_cache: Set False to bypass the analysis cache and always call the model
 
         Returns:
             Dict with summary and key findings
@@ -235,30 +456,36 @@ Respond in JSON format:
                 'summary': None
             }
 
-        system_prompt = """You are a clinical documentation specialist.
-Summarize the following clinical note, preserving:
-1. All diagnoses mentioned (explicitly or implied)
-2. Key vital signs and lab abnormalities
-3. Significant procedures or treatments
-4. Important clinical findings
+        system_prompt = SUMMARY_SYSTEM_PROMPT
 
-Keep the summary concise but complete for coding purposes.
-Format: A single paragraph followed by a bulleted list of diagnoses."""
+        # Summaries are cached too so that the analysis of a summarized note
+        # sees identical text (and hits the analysis cache) on re-review
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = note_summary_cache_key(note_text, max_length)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return {'success': True, 'summary': cached.get('summary'), 'cached': True}
 
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o",
+                model=DEFAULT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Summarize this note (target {max_length} characters):\n\n{note_text}"}
                 ],
-                temperature=0.2,
+                temperature=DEFAULT_TEMPERATURE,
                 max_tokens=1000
             )
 
+            summary = response.choices[0].message.content
+            if cache_key is not None and summary:
+                self.cache.put(cache_key, {'summary': summary})
+
             return {
                 'success': True,
-                'summary': response.choices[0].message.content
+                'summary': summary,
+                'usage': response_usage(response)
             }
 
         except Exception as e:
@@ -291,73 +518,29 @@ Format: A single paragraph followed by a bulleted list of diagnoses."""
                 'comparison': None
             }
 
-        system_prompt = """You are an expert medical coder and clinical documentation improvement specialist.
-Compare the diagnoses extracted from clinical documentation against the actually coded diagnoses.
-
-Identify:
-1. MATCHES: Diagnoses that are both documented and coded
-2. DOCUMENTED BUT NOT CODED: Diagnoses supported by documentation but not in the coded list
-3. CODED BUT NOT CLEARLY DOCUMENTED: Codes that lack clear documentation support
-4. SPECIFICITY OPPORTUNITIES: Where more specific codes could be used based on documentation
-5. POTENTIAL DRG IMPACT: How discrepancies might affect DRG assignment
-
-Respond in JSON format:
-{{
-    "matches": [
-        {{"documented": "...", "coded": "...", "icd10": "..."}}
-    ],
-    "documented_not_coded": [
-        {{"diagnosis": "...", "suggested_icd10": "...", "evidence": "...", "impact": "..."}}
-    ],
-    "coded_not_documented": [
-        {{"icd10": "...", "description": "...", "concern": "..."}}
-    ],
-    "specificity_opportunities": [
-        {{"current_code": "...", "suggested_code": "...", "reason": "..."}}
-    ],
-    "summary": "Overall assessment of documentation and coding alignment",
-    "recommendations": ["..."]
-}}"""
+        system_prompt = COMPARISON_SYSTEM_PROMPT
 
         try:
-            user_content = f"""DOCUMENTED DIAGNOSES (from clinical notes):
-{json.dumps(documented_diagnoses, indent=2)}
-
-CODED DIAGNOSES (from PTF/billing):
-{json.dumps(coded_diagnoses, indent=2)}
-
-Please compare and analyze."""
+            user_content = build_comparison_user_content(documented_diagnoses, coded_diagnoses)
 
             response = self.client.chat.completions.create(
-                model="gpt-4o",
+                model=DEFAULT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_content}
                 ],
-                temperature=0.2,
+                temperature=DEFAULT_TEMPERATURE,
                 max_tokens=4000
             )
 
             response_text = response.choices[0].message.content
 
-            # Try to parse JSON response
-            try:
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    result = json.loads(response_text[json_start:json_end])
-                    return {
-                        'success': True,
-                        'comparison': result,
-                        'raw_response': response_text
-                    }
-            except json.JSONDecodeError:
-                pass
-
+            # Parse JSON response (None if the model did not return valid JSON)
             return {
                 'success': True,
-                'comparison': None,
-                'raw_response': response_text
+                'comparison': extract_json_object(response_text),
+                'raw_response': response_text,
+                'usage': response_usage(response)
             }
 
         except Exception as e:
@@ -390,89 +573,27 @@ Please compare and analyze."""
                 'consolidated': None
             }
 
-        system_prompt = """You are a clinical documentation improvement specialist.
-You are given multiple analyses of clinical notes from a single hospital admission.
-Consolidate these into a single, comprehensive list of diagnoses.
-
-INSTRUCTIONS:
-1. Identify the most likely PRINCIPAL DIAGNOSIS based on:
-   - What primarily led to the admission
-   - Which diagnosis consumed the most resources
-   - Documentation from attending physicians
-2. List all SECONDARY DIAGNOSES/COMORBIDITIES that:
-   - Were present on admission (POA) or developed during stay
-   - Affected patient care or length of stay
-3. For each diagnosis, determine:
-   - Best ICD-10-CM code based on documented specificity
-   - Level of confidence (based on documentation support)
-   - Whether it's POA (Present on Admission) or developed during hospitalization
-
-Respond in JSON format:
-{{
-    "principal_diagnosis": {{
-        "name": "...",
-        "icd10_code": "...",
-        "confidence": "HIGH/MEDIUM/LOW",
-        "poa": true/false,
-        "supporting_notes": ["note types that support this"]
-    }},
-    "secondary_diagnoses": [
-        {{
-            "name": "...",
-            "icd10_code": "...",
-            "confidence": "HIGH/MEDIUM/LOW",
-            "poa": true/false,
-            "cc_mcc": "CC" or "MCC" or "None",
-            "supporting_notes": ["..."]
-        }}
-    ],
-    "clinical_summary": "Brief narrative of hospitalization",
-    "documentation_quality": "Assessment of overall documentation quality",
-    "recommendations": ["Specific CDI recommendations"]
-}}"""
+        system_prompt = CONSOLIDATION_SYSTEM_PROMPT
 
         try:
-            # Build context from note analyses
-            analyses_text = ""
-            for i, analysis in enumerate(note_analyses, 1):
-                analyses_text += f"\n--- NOTE ANALYSIS {i} ---\n"
-                analyses_text += json.dumps(analysis, indent=2)
-                analyses_text += "\n"
-
-            patient_context = ""
-            if patient_info:
-                patient_context = f"\n\nPATIENT CONTEXT:\n{json.dumps(patient_info, indent=2)}"
-
             response = self.client.chat.completions.create(
-                model="gpt-4o",
+                model=DEFAULT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Consolidate these note analyses:{patient_context}\n{analyses_text}"}
+                    {"role": "user", "content": build_consolidation_user_content(note_analyses, patient_info)}
                 ],
-                temperature=0.2,
+                temperature=DEFAULT_TEMPERATURE,
                 max_tokens=4000
             )
 
             response_text = response.choices[0].message.content
 
-            # Try to parse JSON response
-            try:
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    result = json.loads(response_text[json_start:json_end])
-                    return {
-                        'success': True,
-                        'consolidated': result,
-                        'raw_response': response_text
-                    }
-            except json.JSONDecodeError:
-                pass
-
+            # Parse JSON response (None if the model did not return valid JSON)
             return {
                 'success': True,
-                'consolidated': None,
-                'raw_response': response_text
+                'consolidated': extract_json_object(response_text),
+                'raw_response': response_text,
+                'usage': response_usage(response)
             }
 
         except Exception as e:
@@ -0,0 +1,428 @@
+"""
+Batch Cohort Review
+
+Runs documentation reviews for a whole cohort of admissions (e.g. last week's
+discharges) as one server-side job. Admissions are processed by a worker pool
+with configurable concurrency; the batch state, including each admission's
+status and result, is persisted under data/batches so that a batch interrupted
+by a crash or restart can be resumed where it stopped.
+
+The review itself is supplied by the application as a callable, so this module
+knows nothing about FastAPI or the database.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Batch states
+BATCH_QUEUED = "queued"
+BATCH_RUNNING = "running"
+BATCH_COMPLETE = "complete"
+BATCH_CANCELLED = "cancelled"
+
+# Admission (item) states
+ITEM_PENDING = "pending"
+ITEM_RUNNING = "running"
+ITEM_COMPLETE = "complete"
+ITEM_ERROR = "error"
+
+# run_admission(review_id, item, options) -> {"status": "complete"|"error", "error": str, "result": dict}
+RunAdmission = Callable[[str, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+def _summarize_result(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Small per-admission summary kept in the batch state file."""
+    if not isinstance(result, dict):
+        return {}
+    comparison = result.get("comparison") or {}
+    token_usage = result.get("token_usage") or {}
+    return {
+        "analysis_id": result.get("analysis_id"),
+        "processing_time_seconds": result.get("processing_time_seconds"),
+        "notes": (result.get("documents_analyzed") or {}).get("notes"),
+        "diagnoses_found": (result.get("ai_analysis") or {}).get("diagnoses_found"),
+        "coded_diagnoses": len(result.get("coded_diagnoses") or []),
+        "documented_not_coded": len(comparison.get("documented_not_coded") or []) if isinstance(comparison, dict) else 0,
+        "coded_not_documented": len(comparison.get("coded_not_documented") or []) if isinstance(comparison, dict) else 0,
+        "total_tokens": token_usage.get("review_total_tokens")
+    }
+
+
+class BatchReviewManager:
+    """Creates, runs, persists and resumes batch review jobs."""
+
+    def __init__(
+        self,
+        state_dir: str,
+        run_admission: RunAdmission,
+        default_concurrency: int = 3,
+        on_change: Optional[Callable[[str], None]] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            state_dir: Directory for batch state and per-admission result files
+            run_admission: Callable that runs one review synchronously
+            default_concurrency: Reviews run at once when a batch does not specify
+            on_change: Optional callback(batch_id) invoked whenever a batch's state changes
+            max_concurrency: Upper bound on reviews run at once by any batch (None for no bound)
+        """
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.run_admission = run_admission
+        self.max_concurrency = max_concurrency
+        self.default_concurrency = self.clamp_concurrency(default_concurrency)
+        self.on_change = on_change
+
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._cancel_flags: Dict[str, threading.Event] = {}
+        self._lock = threading.RLock()
+
+    def clamp_concurrency(self, concurrency: int) -> int:
+        """Concurrency limited to 1..max_concurrency."""
+        value = max(1, int(concurrency))
+        if self.max_concurrency:
+            value = min(value, max(1, int(self.max_concurrency)))
+        return value
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _state_file(self, batch_id: str) -> Path:
+        return self.state_dir / f"{batch_id}.json"
+
+    def _result_file(self, batch_id: str, review_id: str) -> Path:
+        return self.state_dir / batch_id / f"{review_id}.json"
+
+    def _save(self, batch: Dict[str, Any]) -> None:
+        """Atomically write a batch's state file (caller holds the lock)."""
+        batch["updated_at"] = datetime.now().isoformat()
+        path = self._state_file(batch["batch_id"])
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(batch, f, default=str)
+        os.replace(tmp_path, path)
+
+        if self.on_change:
+            try:
+                self.on_change(batch["batch_id"])
+            except Exception as e:
+                logger.warning(f"Batch change callback failed for {batch['batch_id']}: {e}")
+
+    def _save_result(self, batch_id: str, review_id: str, result: Dict[str, Any]) -> None:
+        path = self._result_file(batch_id, review_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, default=str)
+
+    def load_result(self, batch_id: str, review_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the full review result saved for one admission of a batch.
+
+        Both IDs come from the request URL, so only a review_id recorded on
+        one of the batch's own items is read, and the resolved path must stay
+        under state_dir.
+
+        Returns:
+            The result, or None if the batch, review or result file is unknown
+        """
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return None
+            if not any(item.get("review_id") == review_id for item in batch["items"]):
+                return None
+
+        state_dir = self.state_dir.resolve()
+        path = self._result_file(batch_id, review_id).resolve()
+        try:
+            path.relative_to(state_dir)
+        except ValueError:
+            logger.warning(f"Refusing batch result path outside {state_dir}: {path}")
+            return None
+        if not path.is_file():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def create_batch(
+        self,
+        admissions: List[Dict[str, Any]],
+        criteria: Dict[str, Any],
+        username: str,
+        concurrency: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Register a batch for a list of admissions and start running it.
+
+        Args:
+            admissions: Rows with PatientID and InpatientSID/AdmissionID (from the discharge query)
+            criteria: Search criteria that produced the cohort (stored for reference)
+            username: User who submitted the batch
+            concurrency: Reviews run at once (defaults to the manager default; capped at max_concurrency)
+            options: Passed to run_admission for every review (e.g. bypass_cache)
+
+        Returns:
+            Batch status (see get_batch)
+        """
+        batch_id = str(uuid.uuid4())[:8]
+        items = []
+        seen = set()
+        for row in admissions:
+            patient_id = str(row.get("PatientID") or row.get("PatientSID") or "")
+            admission_id = str(row.get("InpatientSID") or row.get("AdmissionID") or "")
+            key = f"{patient_id}:{admission_id}"
+            if not patient_id or not admission_id or key in seen:
+                continue
+            seen.add(key)
+            items.append({
+                "key": key,
+                "patient_id": patient_id,
+                "admission_id": admission_id,
+                "discharge_date": row.get("DischargeDate"),
+                "specialty": row.get("AdmittingTreatingSpecialty"),
+                "specialty_raw": row.get("AdmittingTreatingSpecialtyRaw"),
+                "status": ITEM_PENDING,
+                "review_id": None,
+                "error": None,
+                "attempts": 0,
+                "started_at": None,
+                "finished_at": None,
+                "summary": {}
+            })
+
+        batch = {
+            "batch_id": batch_id,
+            "status": BATCH_QUEUED,
+            "username": username,
+            "criteria": criteria,
+            "options": options or {},
+            "concurrency": self.clamp_concurrency(concurrency or self.default_concurrency),
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "items": items
+        }
+
+        with self._lock:
+            self._batches[batch_id] = batch
+            self._save(batch)
+
+        logger.info(f"Batch {batch_id} created with {len(items)} admissions (concurrency {batch['concurrency']})")
+        self.start(batch_id)
+        return self.get_batch(batch_id)
+
+    def start(self, batch_id: str) -> bool:
+        """
+        Start (or resume) running a batch's pending admissions in the background.
+
+        Returns:
+            False if the batch is unknown or already running
+        """
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return False
+            if batch_id in self._cancel_flags:
+                return False  # running, or still finishing after cancel
+
+            self._cancel_flags[batch_id] = threading.Event()
+            batch["status"] = BATCH_RUNNING
+            batch["started_at"] = batch.get("started_at") or datetime.now().isoformat()
+            batch["finished_at"] = None
+            self._save(batch)
+
+        threading.Thread(
+            target=self._run_batch,
+            args=(batch_id,),
+            name=f"batch-{batch_id}",
+            daemon=True
+        ).start()
+        return True
+
+    def _run_batch(self, batch_id: str) -> None:
+        """Coordinator: feed pending admissions to the worker pool and wait."""
+        with self._lock:
+            batch = self._batches[batch_id]
+            pending = [item for item in batch["items"] if item["status"] == ITEM_PENDING]
+            # Batches saved before a lower cap (e.g. a smaller pool) resume within it
+            concurrency = self.clamp_concurrency(batch["concurrency"])
+            cancel_flag = self._cancel_flags[batch_id]
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"batch-{batch_id}") as executor:
+                for item in pending:
+                    executor.submit(self._run_item, batch_id, item, cancel_flag)
+        finally:
+            with self._lock:
+                if cancel_flag.is_set():
+                    batch["status"] = BATCH_CANCELLED
+                else:
+                    batch["status"] = BATCH_COMPLETE
+                batch["finished_at"] = datetime.now().isoformat()
+                self._save(batch)
+                self._cancel_flags.pop(batch_id, None)
+            logger.info(f"Batch {batch_id} finished with status {batch['status']}")
+
+    def _run_item(self, batch_id: str, item: Dict[str, Any], cancel_flag: threading.Event) -> None:
+        """Worker: review one admission and record its outcome."""
+        if cancel_flag.is_set():
+            return
+
+        with self._lock:
+            batch = self._batches[batch_id]
+            item["status"] = ITEM_RUNNING
+            item["review_id"] = str(uuid.uuid4())[:8]
+            item["attempts"] += 1
+            item["started_at"] = datetime.now().isoformat()
+            item["error"] = None
+            self._save(batch)
+            options = dict(batch["options"], username=batch["username"], batch_id=batch_id)
+
+        try:
+            outcome = self.run_admission(item["review_id"], item, options) or {}
+        except Exception as e:
+            logger.error(f"Batch {batch_id} admission {item['key']} raised: {e}", exc_info=True)
+            outcome = {"status": ITEM_ERROR, "error": str(e)}
+
+        result = outcome.get("result")
+        if outcome.get("status") == ITEM_COMPLETE and isinstance(result, dict):
+            try:
+                self._save_result(batch_id, item["review_id"], result)
+            except Exception as e:
+                logger.error(f"Could not save batch result {batch_id}/{item['review_id']}: {e}")
+
+        with self._lock:
+            item["status"] = ITEM_COMPLETE if outcome.get("status") == ITEM_COMPLETE else ITEM_ERROR
+            item["error"] = outcome.get("error")
+            item["summary"] = _summarize_result(result)
+            item["finished_at"] = datetime.now().isoformat()
+            self._save(batch)
+
+    def cancel(self, batch_id: str) -> bool:
+        """
+        Stop a running batch after the reviews already in progress.
+
+        Returns:
+            False if the batch is not running
+        """
+        with self._lock:
+            cancel_flag = self._cancel_flags.get(batch_id)
+            if cancel_flag is None:
+                return False
+            cancel_flag.set()
+        logger.info(f"Batch {batch_id} cancellation requested")
+        return True
+
+    def resume(self, batch_id: str, retry_failed: bool = False) -> bool:
+        """
+        Resume a stopped batch, optionally re-queuing admissions that failed.
+
+        Returns:
+            False if the batch is unknown or still running
+        """
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None or batch_id in self._cancel_flags:
+                return False
+            for item in batch["items"]:
+                if item["status"] == ITEM_RUNNING or (retry_failed and item["status"] == ITEM_ERROR):
+                    item["status"] = ITEM_PENDING
+        return self.start(batch_id)
+
+    def recover(self) -> List[str]:
+        """
+        Load persisted batches and resume those interrupted by a shutdown or crash.
+
+        Admissions that were mid-review are re-queued.
+
+        Returns:
+            IDs of resumed batches
+        """
+        resumed = []
+        for path in sorted(self.state_dir.glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    batch = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Skipping unreadable batch state {path}: {e}")
+                continue
+
+            batch_id = batch.get("batch_id")
+            if not batch_id:
+                continue
+            with self._lock:
+                if batch_id in self._batches:
+                    continue
+                self._batches[batch_id] = batch
+
+            if batch.get("status") in (BATCH_QUEUED, BATCH_RUNNING):
+                if self.resume(batch_id):
+                    resumed.append(batch_id)
+
+        if resumed:
+            logger.info(f"Resumed interrupted batches: {resumed}")
+        return resumed
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
+
+    def get_batch(self, batch_id: str, include_items: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a batch's aggregate progress and, optionally, per-admission status.
+
+        Returns:
+            Status dict, or None if the batch is unknown
+        """
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return None
+
+            counts = {state: 0 for state in (ITEM_PENDING, ITEM_RUNNING, ITEM_COMPLETE, ITEM_ERROR)}
+            for item in batch["items"]:
+                counts[item["status"]] = counts.get(item["status"], 0) + 1
+            total = len(batch["items"])
+            finished = counts[ITEM_COMPLETE] + counts[ITEM_ERROR]
+
+            status = {
+                "batch_id": batch_id,
+                "status": batch["status"],
+                "username": batch.get("username"),
+                "criteria": batch.get("criteria"),
+                "concurrency": batch.get("concurrency"),
+                "created_at": batch.get("created_at"),
+                "started_at": batch.get("started_at"),
+                "finished_at": batch.get("finished_at"),
+                "total": total,
+                "counts": counts,
+                "percentage": int(100 * finished / total) if total else 100
+            }
+            if include_items:
+                status["items"] = [dict(item) for item in batch["items"]]
+            return status
+
+    def list_batches(self) -> List[Dict[str, Any]]:
+        """Aggregate status of every known batch, newest first."""
+        with self._lock:
+            batch_ids = list(self._batches)
+        batches = [self.get_batch(batch_id, include_items=False) for batch_id in batch_ids]
+        return sorted(batches, key=lambda b: b.get("created_at") or "", reverse=True)
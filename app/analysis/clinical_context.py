@@ -0,0 +1,239 @@
+"""
+Admission Clinical Context
+
+Precomputes the vitals/labs context that accompanies each note sent to VA GPT.
+Rows from the CDW extraction are indexed once per admission (by VitalType /
+LabChemTestName, sorted by time) and formatted once. For each note, the
+reading of every vital and lab test closest to the note's NoteDateTime is
+selected, so a day-1 H&P and a discharge summary see the values that were
+current when they were written.
+
+When an admission trend summary (see app.analysis.trends) is supplied, each
+listed reading is followed by that test's admission-wide range, trend and
+out-of-range counts, and tests with abnormal readings are listed first.
+"""
+
+import logging
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from app.analysis.trends import format_trend
+from app.database.frames import iter_frame_records
+
+logger = logging.getLogger(__name__)
+
+# CDW column names for Vital.VitalSign / Chem.LabChem extraction rows
+VITAL_NAME_COLUMN = "VitalType"
+VITAL_VALUE_COLUMN = "VitalResult"
+VITAL_TIME_COLUMN = "TakenDateTime"
+
+LAB_NAME_COLUMN = "LabChemTestName"
+LAB_VALUE_COLUMN = "LabChemResultValue"
+LAB_UNITS_COLUMN = "ResultUnits"
+LAB_TIME_COLUMN = "LabChemSpecimenDateTime"
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    """Coerce a CDW timestamp (datetime or ISO string) to datetime."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", ""))
+        except ValueError:
+            return None
+    return None
+
+
+def _iter_rows(rows: Union[pd.DataFrame, List[Dict[str, Any]], None]) -> Iterable[Dict[str, Any]]:
+    """Iterate extraction rows given as a DataFrame (see execute_query_frame) or a list of dicts."""
+    if rows is None:
+        return []
+    if isinstance(rows, pd.DataFrame):
+        return iter_frame_records(rows)
+    return rows
+
+
+def _format_time(value: Optional[datetime], raw: Any) -> str:
+    """Format a reading time for the prompt."""
+    if value is not None:
+        return value.strftime("%Y-%m-%d %H:%M")
+    return str(raw) if raw not in (None, "") else "N/A"
+
+
+class _Series:
+    """Time-ordered readings for one vital type or lab test."""
+
+    __slots__ = ("times", "lines", "untimed_line")
+
+    def __init__(self):
+        self.times: List[datetime] = []
+        self.lines: List[str] = []
+        self.untimed_line: Optional[str] = None
+
+
+class ClinicalContext:
+    """Per-admission vitals/labs index that renders note-specific prompt context."""
+
+    def __init__(
+        self,
+        vitals: Union[pd.DataFrame, List[Dict[str, Any]], None] = None,
+        labs: Union[pd.DataFrame, List[Dict[str, Any]], None] = None,
+        max_vitals: int = 10,
+        max_labs: int = 20,
+        trends: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Index the admission's vitals and labs.
+
+        Args:
+            vitals: Vital sign rows (VitalType, VitalResult, TakenDateTime), as a DataFrame or list of dicts
+            labs: Lab rows (LabChemTestName, LabChemResultValue, ResultUnits, LabChemSpecimenDateTime),
+                as a DataFrame or list of dicts
+            max_vitals: Maximum vital types listed per note
+            max_labs: Maximum lab tests listed per note
+            trends: Optional result of summarize_clinical_trends for the same rows
+        """
+        self.max_vitals = max_vitals
+        self.max_labs = max_labs
+        self.vital_count = 0 if vitals is None else len(vitals)
+        self.lab_count = 0 if labs is None else len(labs)
+
+        self._vitals = self._index(
+            _iter_rows(vitals),
+            VITAL_NAME_COLUMN,
+            VITAL_TIME_COLUMN,
+            lambda row, when: f"- {row.get(VITAL_NAME_COLUMN) or 'Unknown'}: "
+                              f"{row.get(VITAL_VALUE_COLUMN) if row.get(VITAL_VALUE_COLUMN) is not None else 'N/A'} ({when})"
+        )
+        self._labs = self._index(
+            _iter_rows(labs),
+            LAB_NAME_COLUMN,
+            LAB_TIME_COLUMN,
+            lambda row, when: f"- {row.get(LAB_NAME_COLUMN) or 'Unknown'}: "
+                              f"{row.get(LAB_VALUE_COLUMN) if row.get(LAB_VALUE_COLUMN) is not None else 'N/A'} "
+                              f"{row.get(LAB_UNITS_COLUMN) or ''} ({when})"
+        )
+
+        # Admission trend suffix per test name; abnormal tests are listed first
+        trends = trends or {}
+        self._vital_trends = {s["name"]: f"; admission {format_trend(s)}" for s in trends.get("vitals", [])}
+        self._lab_trends = {s["name"]: f"; admission {format_trend(s)}" for s in trends.get("labs", [])}
+        self._abnormal = {
+            s["name"] for s in trends.get("vitals", []) + trends.get("labs", []) if s["out_of_range"]
+        }
+
+        # Rendered text keyed by the exact readings selected; notes written
+        # close together usually select the same readings
+        self._rendered: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _index(rows: Iterable[Dict[str, Any]], name_column: str, time_column: str, format_line) -> Dict[str, _Series]:
+        """Group rows by test name and sort each group by time, formatting every line once."""
+        timed: Dict[str, List[Tuple[datetime, str]]] = {}
+        series: Dict[str, _Series] = {}
+
+        for row in rows:
+            name = row.get(name_column) or "Unknown"
+            raw_time = row.get(time_column)
+            when = _to_datetime(raw_time)
+            line = format_line(row, _format_time(when, raw_time))
+            entry = series.setdefault(name, _Series())
+            if when is None:
+                entry.untimed_line = line
+            else:
+                timed.setdefault(name, []).append((when, line))
+
+        for name, readings in timed.items():
+            readings.sort(key=lambda reading: reading[0])
+            series[name].times = [reading[0] for reading in readings]
+            series[name].lines = [reading[1] for reading in readings]
+
+        return series
+
+    def _select(self, series: Dict[str, _Series], at: Optional[datetime], limit: int) -> Tuple[Tuple[str, int], ...]:
+        """
+        Pick the reading nearest `at` for each name, keeping the `limit` closest names
+        (names with abnormal admission readings first).
+
+        Returns:
+            Tuple of (name, index) pairs sorted by name; index -1 means the untimed reading
+        """
+        candidates = []
+        for name, entry in series.items():
+            if not entry.times:
+                if entry.untimed_line is not None:
+                    candidates.append((float("inf"), name, -1))
+                continue
+
+            if at is None:
+                # No note time: most recent reading, most recently measured first
+                index = len(entry.times) - 1
+                distance = -entry.times[index].timestamp()
+            else:
+                index = bisect_left(entry.times, at)
+                if index == len(entry.times):
+                    index -= 1
+                elif index > 0 and (at - entry.times[index - 1]) <= (entry.times[index] - at):
+                    index -= 1
+                distance = abs((entry.times[index] - at).total_seconds())
+            candidates.append((distance, name, index))
+
+        candidates.sort(key=lambda candidate: (candidate[1] not in self._abnormal, candidate[0]))
+        return tuple(sorted((name, index) for _, name, index in candidates[:limit]))
+
+    @staticmethod
+    def _lines(
+        series: Dict[str, _Series],
+        selection: Tuple[Tuple[str, int], ...],
+        trends: Dict[str, str]
+    ) -> List[str]:
+        """Look up the preformatted lines for a selection, with each test's admission trend."""
+        return [
+            (series[name].untimed_line if index < 0 else series[name].lines[index]) + trends.get(name, "")
+            for name, index in selection
+        ]
+
+    def render_for(self, note_datetime: Any = None) -> str:
+        """
+        Build the context block for a note.
+
+        Args:
+            note_datetime: The note's NoteDateTime (None selects the latest readings)
+
+        Returns:
+            Context text (empty string when there are no vitals or labs)
+        """
+        at = _to_datetime(note_datetime)
+        vital_selection = self._select(self._vitals, at, self.max_vitals)
+        lab_selection = self._select(self._labs, at, self.max_labs)
+
+        key = (vital_selection, lab_selection)
+        cached = self._rendered.get(key)
+        if cached is not None:
+            return cached
+
+        context_section = ""
+        if vital_selection:
+            context_section += "\n\nRECENT VITAL SIGNS:\n"
+            context_section += "".join(line + "\n" for line in self._lines(self._vitals, vital_selection, self._vital_trends))
+
+        if lab_selection:
+            context_section += "\n\nRECENT LABORATORY VALUES:\n"
+            context_section += "".join(line + "\n" for line in self._lines(self._labs, lab_selection, self._lab_trends))
+
+        self._rendered[key] = context_section
+        return context_section
+
+    def render_for_note(self, note: Dict[str, Any]) -> str:
+        """Build the context block for an extracted note row."""
+        return self.render_for(note.get("NoteDateTime"))
+
+    @classmethod
+    def from_patient_context(cls, patient_context: Optional[Dict[str, Any]]) -> "ClinicalContext":
+        """Build a context from a {"vitals": [...], "labs": [...]} dict."""
+        patient_context = patient_context or {}
+        return cls(vitals=patient_context.get("vitals"), labs=patient_context.get("labs"))
@@ -0,0 +1,151 @@
+"""
+Hierarchical Consolidation
+
+Merges per-note analyses into one admission-level diagnosis list by tree
+reduction. Analyses are grouped into bounded batches (by count and by
+serialized size), each batch is consolidated by VA GPT in parallel, and the
+partial consolidations are merged again until one remains. A 30-day stay
+with hundreds of notes therefore needs a few short rounds instead of one
+prompt that overflows the context window.
+
+Partial and final results use the same schema as
+VAGPTClient.consolidate_analyses (principal_diagnosis / secondary_diagnoses).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.ai.va_gpt_client import compact_json
+
+logger = logging.getLogger(__name__)
+
+
+def _group_analyses(
+    analyses: List[Dict[str, Any]],
+    group_size: int,
+    max_group_chars: int
+) -> List[List[Dict[str, Any]]]:
+    """
+    Split analyses, in order, into groups bounded by count and serialized size.
+
+    A group always takes a second analysis even past max_group_chars, so only
+    the last group can be a singleton and every merge call reduces the count.
+    """
+    groups: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_chars = 0
+
+    for analysis in analyses:
+        size = len(compact_json(analysis))
+        if current and (
+            len(current) >= group_size
+            or (len(current) >= 2 and current_chars + size > max_group_chars)
+        ):
+            groups.append(current)
+            current = []
+            current_chars = 0
+        current.append(analysis)
+        current_chars += size
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def consolidate_hierarchically(
+    client: Any,
+    note_analyses: List[Dict[str, Any]],
+    patient_info: Optional[Dict[str, Any]] = None,
+    group_size: int = 12,
+    max_group_chars: int = 60000,
+    max_concurrency: int = 4
+) -> Dict[str, Any]:
+    """
+    Consolidate note analyses with a tree of bounded consolidation calls.
+
+    Args:
+        client: VAGPTClient (or compatible) exposing consolidate_analyses
+        note_analyses: Per-note analysis dicts
+        patient_info: Optional patient demographic/admission info
+        group_size: Maximum analyses merged by one call
+        max_group_chars: Maximum serialized analysis text merged by one call
+        max_concurrency: Maximum consolidation calls in flight per level
+
+    Returns:
+        Dict in the consolidate_analyses shape ('success', 'consolidated',
+        'raw_response', 'usage') plus 'levels' and 'calls'
+    """
+    group_size = max(2, int(group_size or 2))
+    usage: Dict[str, int] = {}
+    calls = 0
+    levels = 0
+    level = list(note_analyses)
+
+    if not level:
+        return {
+            'success': False,
+            'error': 'No note analyses to consolidate',
+            'consolidated': None,
+            'usage': usage,
+            'levels': levels,
+            'calls': calls
+        }
+
+    def _merge(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return client.consolidate_analyses(note_analyses=group, patient_info=patient_info)
+        except Exception as e:
+            logger.error(f"Consolidation call raised: {e}", exc_info=True)
+            return {'success': False, 'error': str(e), 'consolidated': None}
+
+    while True:
+        groups = _group_analyses(level, group_size, max_group_chars)
+        levels += 1
+
+        if len(groups) == 1:
+            # Everything fits in one call: this is the root of the tree
+            result = _merge(groups[0])
+            calls += 1
+            for key, value in (result.get("usage") or {}).items():
+                usage[key] = usage.get(key, 0) + (value or 0)
+            result["usage"] = usage
+            result["levels"] = levels
+            result["calls"] = calls
+            return result
+
+        # A trailing singleton has nothing to merge with; it moves up a level as is
+        merge_groups = [group for group in groups if len(group) > 1]
+        logger.info(f"Consolidation level {levels}: merging {len(level)} analyses in {len(merge_groups)} groups")
+        workers = max(1, min(int(max_concurrency or 1), len(merge_groups)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="consolidate") as executor:
+            partials = iter(list(executor.map(_merge, merge_groups)))
+        calls += len(merge_groups)
+
+        next_level: List[Dict[str, Any]] = []
+        merged = 0
+        for group in groups:
+            if len(group) == 1:
+                next_level.extend(group)
+                continue
+            partial = next(partials)
+            for key, value in (partial.get("usage") or {}).items():
+                usage[key] = usage.get(key, 0) + (value or 0)
+            if partial.get("success") and partial.get("consolidated"):
+                next_level.append(partial["consolidated"])
+                merged += 1
+            else:
+                # Carry the group's inputs up rather than lose their diagnoses
+                logger.warning(f"Partial consolidation failed ({partial.get('error')}); carrying {len(group)} analyses forward")
+                next_level.extend(group)
+
+        if not merged:
+            return {
+                'success': False,
+                'error': 'Consolidation made no progress; every partial merge failed',
+                'consolidated': None,
+                'usage': usage,
+                'levels': levels,
+                'calls': calls
+            }
+        level = next_level
@@ -0,0 +1,261 @@
+"""
+Concurrent Note Analysis
+
+Sends the planned note analysis requests (see token_planner) to VA GPT with
+bounded parallelism so a long admission does not pay one sequential LLM round
+trip per note. Results are returned in plan (note) order.
+
+Two engines are provided: a thread-based one for the synchronous VAGPTClient
+and an asyncio one for AsyncVAGPTClient that multiplexes requests on the
+event loop.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.metrics import review_stage_seconds
+
+logger = logging.getLogger(__name__)
+
+
+def _add_usage(total: Dict[str, int], usage: Optional[Dict[str, int]]) -> None:
+    """Accumulate token usage from one call into a running total."""
+    for key, value in (usage or {}).items():
+        total[key] = total.get(key, 0) + (value or 0)
+
+
+def _observe_request(started: float, result: Any) -> None:
+    """Record one planned request's latency; fully cached requests are kept separate."""
+    cached = isinstance(result, dict) and bool(result.get("cached"))
+    review_stage_seconds.observe(
+        time.perf_counter() - started,
+        stage="note_analysis_cached" if cached else "note_analysis"
+    )
+
+
+def _fallback_summary(chunk: str, target_chars: int) -> str:
+    """Stand-in for a chunk whose summary failed: its head, clearly marked."""
+    return chunk[:target_chars] + "\n[... remainder of section not summarized ...]"
+
+
+def _join_summaries(summaries: List[str]) -> str:
+    """Combine chunk summaries into the text analyzed in place of the note."""
+    if len(summaries) == 1:
+        return summaries[0]
+    return "\n\n".join(
+        f"[Summary of part {position} of {len(summaries)}]\n{summary}"
+        for position, summary in enumerate(summaries, 1)
+    )
+
+
+def _analyze_one(client: Any, request: Dict[str, Any], use_cache: bool) -> Dict[str, Any]:
+    """Run one planned request through the client, converting exceptions to failures."""
+    usage: Dict[str, int] = {}
+    started = time.perf_counter()
+    try:
+        text = request["text"]
+        if request["mode"] == "summarize":
+            summaries = []
+            for chunk in request["chunks"]:
+                summary = client.summarize_note(
+                    chunk, max_length=request["summary_target_chars"], use_cache=use_cache
+                )
+                _add_usage(usage, summary.get("usage"))
+                if summary.get("success") and summary.get("summary"):
+                    summaries.append(summary["summary"])
+                else:
+                    logger.warning(f"Summary failed for note {request['note_ids'][0]}: {summary.get('error')}")
+                    summaries.append(_fallback_summary(chunk, request["summary_target_chars"]))
+            text = _join_summaries(summaries)
+
+        result = client.analyze_clinical_note(
+            note_text=text,
+            note_type=request["note_type"],
+            context_section=request["context_section"],
+            use_cache=use_cache
+        )
+    except Exception as e:
+        logger.error(f"Analysis raised for notes {request.get('note_ids')}: {e}", exc_info=True)
+        result = {'success': False, 'error': str(e), 'usage': usage}
+        _observe_request(started, result)
+        return result
+
+    if isinstance(result, dict):
+        _add_usage(usage, result.get("usage"))
+        result["usage"] = usage
+    _observe_request(started, result)
+    return result
+
+
+def analyze_notes_concurrently(
+    client: Any,
+    note_requests: List[Dict[str, Any]],
+    max_concurrency: int = 5,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    use_cache: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Run planned note analysis requests in parallel with at most max_concurrency in flight.
+
+    Args:
+        client: VAGPTClient (or compatible) exposing analyze_clinical_note and summarize_note
+        note_requests: Requests from token_planner.plan_note_requests
+        max_concurrency: Maximum simultaneous LLM requests
+        on_progress: Optional callback(completed, total) invoked as each request finishes
+        use_cache: Set False to bypass the client's analysis cache
+
+    Returns:
+        List of note analysis results (see _collect_note_analyses), in plan order
+    """
+    total = len(note_requests)
+    if total == 0:
+        return []
+
+    workers = max(1, min(int(max_concurrency or 1), total))
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * total
+    completed = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="note-analysis") as executor:
+        futures = {
+            executor.submit(_analyze_one, client, request, use_cache): index
+            for index, request in enumerate(note_requests)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            outcomes[index] = future.result()
+            completed += 1
+            if on_progress:
+                try:
+                    on_progress(completed, total)
+                except Exception as e:
+                    logger.warning(f"Note analysis progress callback failed: {e}")
+
+    return _collect_note_analyses(note_requests, outcomes)
+
+
+async def _analyze_one_async(
+    async_client: Any,
+    request: Dict[str, Any],
+    use_cache: bool,
+    timeout: Optional[float]
+) -> Dict[str, Any]:
+    """Async counterpart of _analyze_one; chunk summaries run concurrently."""
+    usage: Dict[str, int] = {}
+    text = request["text"]
+    if request["mode"] == "summarize":
+        results = await asyncio.gather(*(
+            async_client.summarize_note(
+                chunk, max_length=request["summary_target_chars"], timeout=timeout, use_cache=use_cache
+            )
+            for chunk in request["chunks"]
+        ))
+        summaries = []
+        for chunk, summary in zip(request["chunks"], results):
+            _add_usage(usage, summary.get("usage"))
+            if summary.get("success") and summary.get("summary"):
+                summaries.append(summary["summary"])
+            else:
+                logger.warning(f"Summary failed for note {request['note_ids'][0]}: {summary.get('error')}")
+                summaries.append(_fallback_summary(chunk, request["summary_target_chars"]))
+        text = _join_summaries(summaries)
+
+    result = await async_client.analyze_clinical_note(
+        note_text=text,
+        note_type=request["note_type"],
+        context_section=request["context_section"],
+        timeout=timeout,
+        use_cache=use_cache
+    )
+    if isinstance(result, dict):
+        _add_usage(usage, result.get("usage"))
+        result["usage"] = usage
+    return result
+
+
+async def analyze_notes_async(
+    async_client: Any,
+    note_requests: List[Dict[str, Any]],
+    max_concurrency: int = 5,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Async counterpart of analyze_notes_concurrently for AsyncVAGPTClient.
+
+    A semaphore bounds in-flight requests; cancelling the returned coroutine
+    cancels every outstanding request.
+
+    Args:
+        async_client: AsyncVAGPTClient (or compatible) exposing async analyze_clinical_note and summarize_note
+        note_requests: Requests from token_planner.plan_note_requests
+        max_concurrency: Maximum simultaneous planned requests
+        on_progress: Optional callback(completed, total) invoked as each request finishes
+        timeout: Optional per-call timeout in seconds
+        use_cache: Set False to bypass the client's analysis cache
+
+    Returns:
+        List of note analysis results (see _collect_note_analyses), in plan order
+    """
+    total = len(note_requests)
+    if total == 0:
+        return []
+
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency or 1)))
+    completed = 0
+
+    async def _run(request: Dict[str, Any]) -> Dict[str, Any]:
+        nonlocal completed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await _analyze_one_async(async_client, request, use_cache, timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis raised for notes {request.get('note_ids')}: {e}", exc_info=True)
+                result = {'success': False, 'error': str(e)}
+            _observe_request(started, result)
+        completed += 1
+        if on_progress:
+            try:
+                on_progress(completed, total)
+            except Exception as e:
+                logger.warning(f"Note analysis progress callback failed: {e}")
+        return result
+
+    outcomes = await asyncio.gather(*(_run(request) for request in note_requests))
+    return _collect_note_analyses(note_requests, list(outcomes))
+
+
+def _collect_note_analyses(
+    note_requests: List[Dict[str, Any]],
+    outcomes: List[Optional[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Pair each planned request with its analysis, keeping successful results in order.
+
+    Returns:
+        List of {"note_id", "note_ids", "note_type", "mode", "analysis", "usage", "cached"};
+        note_id is the first note of the request
+    """
+    note_analyses = []
+    for request, analysis in zip(note_requests, outcomes):
+        if not isinstance(analysis, dict):
+            logger.error(f"analysis is not a dict for notes {request.get('note_ids')}, got {type(analysis)}")
+            continue
+        if analysis.get("success"):
+            note_analyses.append({
+                "note_id": request["note_ids"][0],
+                "note_ids": request["note_ids"],
+                "note_type": request["note_type"],
+                "mode": request["mode"],
+                "analysis": analysis.get("analysis"),
+                "usage": analysis.get("usage") or {},
+                "cached": bool(analysis.get("cached"))
+            })
+
+    return note_analyses
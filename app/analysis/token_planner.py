@@ -0,0 +1,261 @@
+"""
+Note Token Planner
+
+Turns an admission's extracted notes into the list of LLM requests that the
+note analysis stage will send, sized against a token budget:
+
+- Notes up to processing.note_summary_threshold_chars are analyzed as-is.
+- Small notes that sit next to each other are packed into one shared request
+  (nursing and brief progress notes rarely justify a round trip each). A
+  packed request carries the vitals/labs context of its first note, so a pack
+  only spans pack_max_span_hours from that note.
+- Notes over the threshold are summarized first; notes too long for a single
+  summary call are split into chunks that are summarized separately.
+
+Token counts are estimated at ~4 characters per token, which is close enough
+for budgeting GPT-4o prompts. The plan records projected prompt tokens so the
+review can report projected versus actual usage.
+"""
+
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+from app.analysis.clinical_context import ClinicalContext, _to_datetime
+from app.ai.va_gpt_client import SUMMARY_SYSTEM_PROMPT, build_note_analysis_prompt
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+ANALYZE_PREFIX = "Analyze this clinical note:\n\n"
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a piece of text."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_into_chunks(text: str, chunk_chars: int) -> List[str]:
+    """
+    Split text into pieces of at most chunk_chars, preferring paragraph and line breaks.
+
+    Args:
+        text: Note text
+        chunk_chars: Maximum characters per chunk
+
+    Returns:
+        List of chunks covering the whole text in order
+    """
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_chars, length)
+        if end < length:
+            # Break on the last blank line / newline / space in the back half of the window
+            for separator in ("\n\n", "\n", " "):
+                cut = text.rfind(separator, start + chunk_chars // 2, end)
+                if cut > start:
+                    end = cut + len(separator)
+                    break
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def _note_header(note: Dict[str, Any], position: int, count: int) -> str:
+    """Header line that separates notes packed into one request."""
+    return f"=== NOTE {position} of {count}: {note.get('NoteType') or 'Unknown'} ({note.get('NoteDateTime') or 'N/A'}) ==="
+
+
+def _outside_pack_span(first: Dict[str, Any], note: Dict[str, Any], max_span_hours: float) -> bool:
+    """Whether a note is too far in time from a pack's first note to share its context."""
+    first_time = _to_datetime(first.get("NoteDateTime"))
+    note_time = _to_datetime(note.get("NoteDateTime"))
+    if first_time is None or note_time is None:
+        # Context for an unknown time is the latest readings; only pack like with like
+        return (first_time is None) != (note_time is None)
+    return abs((note_time - first_time).total_seconds()) > max_span_hours * 3600
+
+
+def _build_request(
+    mode: str,
+    notes: List[Dict[str, Any]],
+    clinical_context: Optional[ClinicalContext],
+    text: str = "",
+    chunks: Optional[List[str]] = None,
+    summary_target_chars: int = 0
+) -> Dict[str, Any]:
+    """Assemble one planned request and its projected prompt tokens."""
+    first = notes[0]
+    if mode == "packed":
+        note_types = list(dict.fromkeys(note.get("NoteType") or "Unknown" for note in notes))
+        note_type = f"{len(notes)} notes: " + "; ".join(note_types)
+    else:
+        note_type = first.get("NoteType") or "Unknown"
+
+    context_section = clinical_context.render_for_note(first) if clinical_context else ""
+
+    # Analysis prompt: system prompt + note (or the summaries standing in for it)
+    analysis_text_tokens = estimate_tokens(text)
+    projected_summary_tokens = 0
+    if mode == "summarize":
+        projected_summary_tokens = sum(
+            estimate_tokens(SUMMARY_SYSTEM_PROMPT) + estimate_tokens(chunk)
+            for chunk in chunks or []
+        )
+        analysis_text_tokens = len(chunks or []) * estimate_tokens("x" * summary_target_chars)
+
+    projected_prompt_tokens = (
+        estimate_tokens(build_note_analysis_prompt(note_type, context_section))
+        + estimate_tokens(ANALYZE_PREFIX)
+        + analysis_text_tokens
+        + projected_summary_tokens
+    )
+
+    return {
+        "mode": mode,
+        "note_ids": [note.get("NoteID") for note in notes],
+        "note_type": note_type,
+        "note_datetime": first.get("NoteDateTime"),
+        "text": text,
+        "chunks": chunks or [],
+        "summary_target_chars": summary_target_chars,
+        "context_section": context_section,
+        "projected_prompt_tokens": projected_prompt_tokens
+    }
+
+
+def plan_note_requests(
+    notes: List[Dict[str, Any]],
+    clinical_context: Optional[ClinicalContext] = None,
+    summary_threshold_chars: int = 5000,
+    pack_below_chars: int = 1500,
+    max_packed_chars: int = 8000,
+    pack_max_span_hours: float = 12,
+    summary_chunk_chars: int = 24000,
+    summary_target_chars: int = 2000
+) -> Dict[str, Any]:
+    """
+    Plan the note analysis requests for an admission.
+
+    Args:
+        notes: Extracted note rows (NoteID, NoteType, NoteDateTime, NoteText), in time order
+        clinical_context: Admission vitals/labs used to render each request's context
+        summary_threshold_chars: Notes longer than this are summarized before analysis
+        pack_below_chars: Notes shorter than this may share a request with neighbours
+        max_packed_chars: Maximum combined note text in one packed request
+        pack_max_span_hours: Maximum time between a packed request's first and last note
+        summary_chunk_chars: Maximum text sent in a single summary call
+        summary_target_chars: Target length requested for each summary
+
+    Returns:
+        Dict with "requests" (list of planned requests) and "projection" totals
+    """
+    requests: List[Dict[str, Any]] = []
+    pack: List[Dict[str, Any]] = []
+    pack_chars = 0
+
+    def _flush_pack() -> None:
+        nonlocal pack, pack_chars
+        if len(pack) == 1:
+            requests.append(_build_request("single", pack, clinical_context, text=pack[0].get("NoteText") or ""))
+        elif pack:
+            text = "\n\n".join(
+                f"{_note_header(note, position, len(pack))}\n{note.get('NoteText') or ''}"
+                for position, note in enumerate(pack, 1)
+            )
+            requests.append(_build_request("packed", pack, clinical_context, text=text))
+        pack = []
+        pack_chars = 0
+
+    for note in notes:
+        text = note.get("NoteText") or ""
+        length = len(text)
+
+        if length > summary_threshold_chars:
+            _flush_pack()
+            requests.append(_build_request(
+                "summarize",
+                [note],
+                clinical_context,
+                chunks=split_into_chunks(text, summary_chunk_chars),
+                summary_target_chars=summary_target_chars
+            ))
+        elif length < pack_below_chars:
+            if pack and (
+                pack_chars + length > max_packed_chars
+                or _outside_pack_span(pack[0], note, pack_max_span_hours)
+            ):
+                _flush_pack()
+            pack.append(note)
+            pack_chars += length
+        else:
+            _flush_pack()
+            requests.append(_build_request("single", [note], clinical_context, text=text))
+
+    _flush_pack()
+
+    projection = {
+        "notes": len(notes),
+        "requests": len(requests),
+        "packed_notes": sum(len(r["note_ids"]) for r in requests if r["mode"] == "packed"),
+        "summarized_notes": sum(1 for r in requests if r["mode"] == "summarize"),
+        "summary_chunks": sum(len(r["chunks"]) for r in requests),
+        "projected_prompt_tokens": sum(r["projected_prompt_tokens"] for r in requests),
+        # What sending every note whole, one request each, would have cost
+        "unplanned_prompt_tokens": sum(
+            estimate_tokens(build_note_analysis_prompt(
+                note.get("NoteType") or "Unknown",
+                clinical_context.render_for_note(note) if clinical_context else ""
+            )) + estimate_tokens(ANALYZE_PREFIX) + estimate_tokens(note.get("NoteText"))
+            for note in notes
+        )
+    }
+    logger.info(
+        f"Planned {projection['requests']} note requests for {projection['notes']} notes "
+        f"({projection['packed_notes']} packed, {projection['summarized_notes']} summarized), "
+        f"~{projection['projected_prompt_tokens']} prompt tokens"
+    )
+
+    return {"requests": requests, "projection": projection}
+
+
+def build_token_report(
+    plan: Dict[str, Any],
+    note_results: List[Dict[str, Any]],
+    other_usage: Optional[Dict[str, Dict[str, int]]] = None
+) -> Dict[str, Any]:
+    """
+    Compare a plan's projected token usage with what the model reported.
+
+    Args:
+        plan: Output of plan_note_requests
+        note_results: Note analysis results carrying "usage" and "cached"
+        other_usage: Optional usage of later review calls (e.g. consolidation, comparison)
+
+    Returns:
+        Token report for the review
+    """
+    actual_prompt = sum((r.get("usage") or {}).get("prompt_tokens", 0) for r in note_results)
+    actual_completion = sum((r.get("usage") or {}).get("completion_tokens", 0) for r in note_results)
+
+    report = dict(plan.get("projection", {}))
+    report.update({
+        "actual_prompt_tokens": actual_prompt,
+        "actual_completion_tokens": actual_completion,
+        "cached_requests": sum(1 for r in note_results if r.get("cached")),
+        "failed_requests": max(0, len(plan.get("requests", [])) - len(note_results))
+    })
+
+    review_total = actual_prompt + actual_completion
+    for name, usage in (other_usage or {}).items():
+        usage = usage or {}
+        report[f"{name}_tokens"] = usage.get("total_tokens", 0)
+        review_total += usage.get("total_tokens", 0)
+    report["review_total_tokens"] = review_total
+
+    return report
@@ -0,0 +1,330 @@
+"""
+Vitals and Labs Trend Summaries
+
+Reduces an admission's vitals and labs frames (see execute_query_frame) to one
+compact summary per vital type / lab test: count, min/max, first/last value,
+time-binned means, a trend direction and out-of-range counts. Everything is
+computed in a single vectorized pass per frame, so a long ICU stay with tens
+of thousands of readings costs the same few lines of prompt as a short stay.
+
+Lab reference ranges come from the CDW RefLow/RefHigh columns (and the
+Abnormal flag); vitals use the adult ranges in VITAL_REFERENCE_RANGES.
+Flagged results without a numeric value (e.g. 'POSITIVE') cannot be trended
+but are still counted as abnormal, so they reach the review prompt.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Adult reference ranges for common VistA vital types (low, high); None = unbounded.
+# Blood pressure is evaluated on the systolic value.
+VITAL_REFERENCE_RANGES: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    "PULSE": (60, 100),
+    "RESPIRATION": (12, 20),
+    "TEMPERATURE": (96.8, 100.4),
+    "PULSE OXIMETRY": (92, None),
+    "BLOOD PRESSURE": (90, 140),
+    "PAIN": (None, 3)
+}
+
+# A trend is reported as rising/falling when the last bin mean moves this
+# fraction of the reference width (or of the first value, without a range)
+TREND_THRESHOLD = 0.1
+
+# Most recent time bins listed per test
+MAX_BINS = 7
+
+
+def _numeric_values(frame: pd.DataFrame, value_column: str, text_column: Optional[str]) -> pd.Series:
+    """Numeric result column, falling back to the leading number of the text result (e.g. '120/80')."""
+    if value_column in frame.columns:
+        values = pd.to_numeric(frame[value_column], errors="coerce")
+    else:
+        values = pd.Series(np.nan, index=frame.index)
+    if text_column and text_column in frame.columns:
+        parsed = pd.to_numeric(
+            frame[text_column].astype("string").str.extract(r"^\s*(-?\d+(?:\.\d+)?)", expand=False),
+            errors="coerce"
+        )
+        values = values.fillna(parsed)
+    return values.astype("float64")
+
+
+def _summarize(
+    frame: pd.DataFrame,
+    name_column: str,
+    time_column: str,
+    values: pd.Series,
+    low: pd.Series,
+    high: pd.Series,
+    flagged: pd.Series,
+    units: Optional[pd.Series],
+    bin_hours: float
+) -> List[Dict[str, Any]]:
+    """
+    Vectorized per-name summary of one frame.
+
+    Returns:
+        List of summary dicts, tests with out-of-range readings first
+    """
+    data = pd.DataFrame({
+        "name": frame[name_column].astype("string").fillna("Unknown").values,
+        "time": pd.to_datetime(frame[time_column], errors="coerce").values if time_column in frame.columns else pd.NaT,
+        "value": values.values,
+        "low": low.values,
+        "high": high.values,
+        "flagged": flagged.values,
+        "units": units.astype("string").values if units is not None else pd.NA
+    })
+    trendable = data["value"].notna() & data["time"].notna()
+    flagged_other = data[~trendable & data["flagged"]].groupby("name", sort=True).agg(
+        count=("flagged", "size"),
+        units=("units", "last")
+    )
+    summaries = _trend_summaries(data[trendable], bin_hours)
+
+    # Flagged results that could not be trended are added to the test's counts,
+    # or reported as a count-only summary when the test has no numeric results
+    by_name = {s["name"]: s for s in summaries}
+    for name, row in flagged_other.iterrows():
+        count = int(row["count"])
+        summary = by_name.get(str(name))
+        if summary is None:
+            summary = {
+                "name": str(name),
+                "units": None if pd.isna(row["units"]) else str(row["units"]).strip() or None,
+                "count": 0,
+                "min": None,
+                "max": None,
+                "first": None,
+                "last": None,
+                "first_time": None,
+                "last_time": None,
+                "low": None,
+                "high": None,
+                "high_count": 0,
+                "low_count": 0,
+                "out_of_range": 0,
+                "trend": None,
+                "bin_means": []
+            }
+            summaries.append(summary)
+        summary["count"] += count
+        summary["out_of_range"] += count
+        summary["flagged_non_numeric"] = count
+
+    summaries.sort(key=lambda s: (-(s["out_of_range"] / s["count"]), s["name"]))
+    return summaries
+
+
+def _trend_summaries(data: pd.DataFrame, bin_hours: float) -> List[Dict[str, Any]]:
+    """Per-name statistics and time-binned means of rows with a numeric value and a time."""
+    if data.empty:
+        return []
+
+    data = data.sort_values(["name", "time"], kind="stable")
+    data["is_high"] = data["high"].notna() & (data["value"] > data["high"])
+    data["is_low"] = data["low"].notna() & (data["value"] < data["low"])
+    data["out_of_range"] = data["is_high"] | data["is_low"] | data["flagged"]
+
+    grouped = data.groupby("name", sort=True)
+    stats = grouped.agg(
+        count=("value", "size"),
+        min=("value", "min"),
+        max=("value", "max"),
+        first=("value", "first"),
+        last=("value", "last"),
+        first_time=("time", "first"),
+        last_time=("time", "last"),
+        low=("low", "last"),
+        high=("high", "last"),
+        units=("units", "last"),
+        high_count=("is_high", "sum"),
+        low_count=("is_low", "sum"),
+        out_of_range=("out_of_range", "sum")
+    )
+
+    # Time bins are counted from each admission's first reading of any test
+    start = data["time"].min()
+    data["bin"] = ((data["time"] - start) / pd.Timedelta(hours=bin_hours)).astype("int64")
+    bin_means = data.groupby(["name", "bin"], sort=True)["value"].mean()
+
+    summaries = []
+    for name, row in stats.iterrows():
+        means = bin_means.loc[name]
+        width = (row["high"] - row["low"]) if pd.notna(row["high"]) and pd.notna(row["low"]) else abs(row["first"])
+        change = means.iloc[-1] - means.iloc[0]
+        if len(means) < 2 or not width or abs(change) < TREND_THRESHOLD * width:
+            trend = "stable"
+        else:
+            trend = "rising" if change > 0 else "falling"
+
+        summaries.append({
+            "name": str(name),
+            "units": None if pd.isna(row["units"]) else str(row["units"]).strip() or None,
+            "count": int(row["count"]),
+            "min": round(float(row["min"]), 4),
+            "max": round(float(row["max"]), 4),
+            "first": round(float(row["first"]), 4),
+            "last": round(float(row["last"]), 4),
+            "first_time": row["first_time"].isoformat(),
+            "last_time": row["last_time"].isoformat(),
+            "low": None if pd.isna(row["low"]) else float(row["low"]),
+            "high": None if pd.isna(row["high"]) else float(row["high"]),
+            "high_count": int(row["high_count"]),
+            "low_count": int(row["low_count"]),
+            "out_of_range": int(row["out_of_range"]),
+            "trend": trend,
+            "bin_means": [round(float(value), 2) for value in means.iloc[-MAX_BINS:]],
+            "flagged_non_numeric": 0
+        })
+    return summaries
+
+
+def summarize_vitals(vitals: pd.DataFrame, bin_hours: float = 24) -> List[Dict[str, Any]]:
+    """
+    Summarize vital signs per VitalType.
+
+    Args:
+        vitals: Vitals frame (VitalType, TakenDateTime, VitalResultNumeric, VitalResult)
+        bin_hours: Width of the trend bins in hours
+
+    Returns:
+        List of per-type summaries (see summarize_clinical_trends)
+    """
+    if vitals is None or vitals.empty or "VitalType" not in vitals.columns:
+        return []
+
+    names = vitals["VitalType"].astype("string").str.upper()
+    low = pd.to_numeric(names.map({name: r[0] for name, r in VITAL_REFERENCE_RANGES.items()}), errors="coerce")
+    high = pd.to_numeric(names.map({name: r[1] for name, r in VITAL_REFERENCE_RANGES.items()}), errors="coerce")
+
+    return _summarize(
+        vitals,
+        name_column="VitalType",
+        time_column="TakenDateTime",
+        values=_numeric_values(vitals, "VitalResultNumeric", "VitalResult"),
+        low=low,
+        high=high,
+        flagged=pd.Series(False, index=vitals.index),
+        units=None,
+        bin_hours=bin_hours
+    )
+
+
+def summarize_labs(labs: pd.DataFrame, bin_hours: float = 24) -> List[Dict[str, Any]]:
+    """
+    Summarize lab results per LabChemTestName.
+
+    Args:
+        labs: Labs frame (LabChemTestName, LabChemSpecimenDateTime,
+            LabChemResultNumericValue, ResultUnits, RefLow, RefHigh, Abnormal)
+        bin_hours: Width of the trend bins in hours
+
+    Returns:
+        List of per-test summaries (see summarize_clinical_trends)
+    """
+    if labs is None or labs.empty or "LabChemTestName" not in labs.columns:
+        return []
+
+    def _reference(column: str) -> pd.Series:
+        if column not in labs.columns:
+            return pd.Series(np.nan, index=labs.index)
+        return pd.to_numeric(labs[column], errors="coerce")
+
+    if "Abnormal" in labs.columns:
+        # CDW flags: H, L, H*, L* (critical); blank when normal
+        flagged = labs["Abnormal"].astype("string").str.strip().str.upper().str.match(r"^[HL]").fillna(False).astype(bool)
+    else:
+        flagged = pd.Series(False, index=labs.index)
+
+    return _summarize(
+        labs,
+        name_column="LabChemTestName",
+        time_column="LabChemSpecimenDateTime",
+        values=_numeric_values(labs, "LabChemResultNumericValue", "LabChemResultValue"),
+        low=_reference("RefLow"),
+        high=_reference("RefHigh"),
+        flagged=flagged,
+        units=labs["ResultUnits"] if "ResultUnits" in labs.columns else None,
+        bin_hours=bin_hours
+    )
+
+
+def summarize_clinical_trends(
+    vitals: Optional[pd.DataFrame],
+    labs: Optional[pd.DataFrame],
+    bin_hours: float = 24
+) -> Dict[str, Any]:
+    """
+    Summarize an admission's vitals and labs.
+
+    Args:
+        vitals: Vitals frame from execute_query_frame
+        labs: Labs frame from execute_query_frame
+        bin_hours: Width of the trend bins in hours
+
+    Returns:
+        Dict with 'vitals' and 'labs' lists of summaries ({"name", "units", "count",
+        "min", "max", "first", "last", "first_time", "last_time", "low", "high",
+        "high_count", "low_count", "out_of_range", "trend", "bin_means",
+        "flagged_non_numeric"}) and 'bin_hours'. Flagged results without a numeric
+        value are included in count and out_of_range (and counted in
+        flagged_non_numeric); a test with only such results has None for the
+        numeric fields and trend
+    """
+    try:
+        return {
+            "vitals": summarize_vitals(vitals, bin_hours),
+            "labs": summarize_labs(labs, bin_hours),
+            "bin_hours": bin_hours
+        }
+    except Exception as e:
+        # Trends enrich the prompt; a malformed extraction must not fail the review
+        logger.error(f"Trend summary failed: {e}", exc_info=True)
+        return {"vitals": [], "labs": [], "bin_hours": bin_hours}
+
+
+def _format_number(value: float) -> str:
+    return f"{value:.0f}" if float(value).is_integer() else f"{value:.1f}"
+
+
+def format_trend(summary: Dict[str, Any]) -> str:
+    """
+    One-line admission trend for a test, e.g.
+    'range 62-131, first 88 -> last 74, falling; 12/40 high (>100)'.
+    """
+    non_numeric = summary.get("flagged_non_numeric", 0)
+    if summary["min"] is None:
+        return f"{non_numeric} non-numeric result(s) flagged abnormal"
+
+    units = f" {summary['units']}" if summary.get("units") else ""
+    text = (
+        f"range {_format_number(summary['min'])}-{_format_number(summary['max'])}{units}, "
+        f"first {_format_number(summary['first'])} -> last {_format_number(summary['last'])}, {summary['trend']}"
+    )
+    flags = []
+    if summary["high_count"]:
+        flags.append(f"{summary['high_count']}/{summary['count']} high (>{_format_number(summary['high'])})")
+    if summary["low_count"]:
+        flags.append(f"{summary['low_count']}/{summary['count']} low (<{_format_number(summary['low'])})")
+    numeric_flagged = summary["out_of_range"] - non_numeric
+    if not flags and numeric_flagged:
+        flags.append(f"{numeric_flagged}/{summary['count']} flagged abnormal")
+    if non_numeric:
+        flags.append(f"{non_numeric} non-numeric flagged abnormal")
+    if flags:
+        text += "; " + ", ".join(flags)
+    return text
+
+
+def abnormal_trend_lines(trends: Dict[str, Any], limit: int = 20) -> List[str]:
+    """Trend lines for tests with out-of-range readings, most abnormal first."""
+    abnormal = [s for s in trends.get("vitals", []) + trends.get("labs", []) if s["out_of_range"]]
+    abnormal.sort(key=lambda s: -(s["out_of_range"] / s["count"]))
+    return [f"{s['name']}: {format_trend(s)}" for s in abnormal[:limit]]
@@ -1,4 +1,18 @@
 """Database module for CDW connections."""
-from .connection import DatabaseConnection, load_database_config, get_database_connection
+from .connection import (
+    DatabaseConnection,
+    ConnectionPool,
+    PoolExhaustedError,
+    load_database_config,
+    get_database_connection,
+    get_connection_pool
+)
 
-__all__ = ['DatabaseConnection', 'load_database_config', 'get_database_connection']
+__all__ = [
+    'DatabaseConnection',
+    'ConnectionPool',
+    'PoolExhaustedError',
+    'load_database_config',
+    'get_database_connection',
+    'get_connection_pool'
+]
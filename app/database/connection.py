@@ -5,13 +5,29 @@ Handles VA SQL Server connections with Windows/SSPI authentication.
 
 import pyodbc
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Iterator, Callable, Tuple
 from pathlib import Path
 import json
 import time
 
+from app.database.frames import build_frame, empty_frame
+from app.utils.metrics import db_pool_wait_seconds, db_pool_wait_timeouts_total
+
 logger = logging.getLogger(__name__)
 
+# SQLSTATE codes pyodbc reports when the underlying link is gone; a connection
+# that raised one of these must not be handed out again.
+DISCONNECT_SQLSTATES = {"08S01", "08003", "08001", "08007"}
+
+# Row shapes for the streaming query API. Tuple modes avoid building a dict per row.
+ROW_MODE_DICT = "dict"
+ROW_MODE_TUPLE = "tuple"
+ROW_MODE_NAMEDTUPLE = "namedtuple"
+ROW_MODES = (ROW_MODE_DICT, ROW_MODE_TUPLE, ROW_MODE_NAMEDTUPLE)
+
 
 class DatabaseConnection:
     """Manages database connections with retry logic."""
@@ -41,6 +57,8 @@ class DatabaseConnection:
         self.retry_delay = retry_delay
         self.connection = None
         self.is_connected = False
+        self.connected_at: Optional[float] = None
+        self.last_used_at: Optional[float] = None
 
     def connect(self) -> bool:
         """
@@ -64,6 +82,8 @@ class DatabaseConnection:
 
                 self.connection = pyodbc.connect(connection_string)
                 self.is_connected = True
+                self.connected_at = time.monotonic()
+                self.last_used_at = self.connected_at
 
                 logger.info(f"Connected to {self.server}.{self.database}")
                 return True
@@ -94,6 +114,38 @@ class DatabaseConnection:
                 logger.info(f"Disconnected from {self.server}.{self.database}")
             except Exception as e:
                 logger.warning(f"Error disconnecting: {str(e)}")
+            finally:
+                self.is_connected = False
+                self.connection = None
+
+    def ping(self) -> bool:
+        """
+        Run a trivial round trip to confirm the connection is still usable.
+
+        Returns:
+            True if the server answered, False otherwise
+        """
+        if not self.connection or not self.is_connected:
+            return False
+
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            self.last_used_at = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"Connection health check failed: {str(e)}")
+            self.is_connected = False
+            return False
+
+    def _check_disconnect(self, error: Exception) -> None:
+        """Mark the connection unusable if the error indicates a dropped link."""
+        sqlstate = error.args[0] if getattr(error, "args", None) else None
+        if isinstance(sqlstate, str) and sqlstate in DISCONNECT_SQLSTATES:
+            logger.warning(f"Connection to {self.server}.{self.database} lost (SQLSTATE {sqlstate})")
+            self.is_connected = False
 
     def execute_query(
         self,
@@ -147,6 +199,7 @@ class DatabaseConnection:
             rows = [dict(zip(columns, row)) for row in results]
 
             cursor.close()
+            self.last_used_at = time.monotonic()
 
             logger.info(f"Query completed successfully, {len(results)} rows returned")
             return {
@@ -159,6 +212,7 @@ class DatabaseConnection:
 
         except pyodbc.Error as e:
             logger.error(f"Query execution failed: {str(e)}")
+            self._check_disconnect(e)
             return {
                 "success": False,
                 "error": str(e),
@@ -176,20 +230,160 @@ class DatabaseConnection:
                 "row_count": 0
             }
 
+    def _make_row_converter(self, columns: List[str], row_mode: str) -> Callable[[Any], Any]:
+        """Return a function converting a cursor row to the requested row shape."""
+        if row_mode == ROW_MODE_DICT:
+            return lambda row: dict(zip(columns, row))
+        if row_mode == ROW_MODE_TUPLE:
+            return tuple
+        if row_mode == ROW_MODE_NAMEDTUPLE:
+            # rename=True turns columns that are not valid identifiers into _0, _1, ...
+            row_type = namedtuple("Row", columns, rename=True)
+            return lambda row: row_type._make(row)
+        raise ValueError(f"Unknown row_mode '{row_mode}' (expected one of {ROW_MODES})")
+
+    def _stream_batches(
+        self,
+        query: str,
+        params: Optional[tuple],
+        batch_size: int,
+        row_mode: str,
+        timeout: Optional[int]
+    ) -> Iterator[Tuple[List[str], List[Any]]]:
+        """Core of iter_query_batches; yields (columns, batch) so callers can keep column names."""
+        if row_mode not in ROW_MODES:
+            raise ValueError(f"Unknown row_mode '{row_mode}' (expected one of {ROW_MODES})")
+        if not self.connection or not self.is_connected:
+            raise RuntimeError("Database not connected")
+
+        cursor = self.connection.cursor()
+        fetched = 0
+        try:
+            if timeout:
+                cursor.timeout = timeout
+
+            if params:
+                logger.debug(f"Streaming query: {query[:100]}... with {len(params)} params")
+                cursor.execute(query, params)
+            else:
+                logger.debug(f"Streaming query: {query[:100]}...")
+                cursor.execute(query)
+
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            convert = self._make_row_converter(columns, row_mode)
+
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                fetched += len(batch)
+                self.last_used_at = time.monotonic()
+                yield columns, [convert(row) for row in batch]
+
+            if fetched == 0:
+                # Let callers see the column names of an empty result
+                yield columns, []
+        except pyodbc.Error as e:
+            logger.error(f"Streaming query failed after {fetched} rows: {str(e)}")
+            self._check_disconnect(e)
+            raise
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            self.last_used_at = time.monotonic()
+            logger.debug(f"Streaming query closed after {fetched} rows")
+
+    def iter_query_batches(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = 1000,
+        row_mode: str = ROW_MODE_DICT,
+        timeout: Optional[int] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Execute a query and yield rows in batches straight from cursor.fetchmany.
+
+        Only one batch is held at a time, so large extractions (e.g. note text)
+        can be streamed into downstream stages. The cursor is closed when the
+        generator is exhausted, closed early, or raises.
+
+        Args:
+            query: SQL query string
+            params: Optional query parameters
+            batch_size: Number of rows fetched per batch
+            row_mode: 'dict', 'tuple' or 'namedtuple' (tuple modes skip building a dict per row)
+            timeout: Optional query timeout (overrides connection timeout)
+
+        Yields:
+            Lists of up to batch_size rows
+
+        Raises:
+            RuntimeError: If the database is not connected
+            pyodbc.Error: If the query fails
+        """
+        batches = self._stream_batches(query, params, batch_size, row_mode, timeout)
+        try:
+            for _, batch in batches:
+                if batch:
+                    yield batch
+        finally:
+            batches.close()
+
+    def iter_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = 1000,
+        row_mode: str = ROW_MODE_DICT,
+        timeout: Optional[int] = None
+    ) -> Iterator[Any]:
+        """
+        Execute a query and yield one row at a time (see iter_query_batches).
+
+        Args:
+            query: SQL query string
+            params: Optional query parameters
+            batch_size: Number of rows fetched from the server at a time
+            row_mode: 'dict', 'tuple' or 'namedtuple'
+            timeout: Optional query timeout (overrides connection timeout)
+
+        Yields:
+            Rows in the requested shape
+        """
+        batches = self.iter_query_batches(query, params, batch_size, row_mode, timeout)
+        try:
+            for batch in batches:
+                yield from batch
+        finally:
+            # Close the underlying cursor promptly if the caller stops early
+            batches.close()
+
     def execute_query_large(
         self,
         query: str,
         params: Optional[tuple] = None,
-        batch_size: int = 1000
+        batch_size: int = 1000,
+        row_mode: str = ROW_MODE_DICT,
+        timeout: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Execute query with batched fetching for large result sets.
         Useful for extracting large amounts of clinical documentation.
 
+        Rows are converted batch by batch as they arrive, so the full raw
+        result set and its converted copy are never held at the same time.
+        Callers that can process rows incrementally should use iter_query or
+        iter_query_batches instead.
+
         Args:
             query: SQL query string
             params: Optional query parameters
             batch_size: Number of rows to fetch at a time
+            row_mode: 'dict', 'tuple' or 'namedtuple'
+            timeout: Optional query timeout (overrides connection timeout)
 
         Returns:
             Dict with keys: success, rows, columns, row_count, error
@@ -204,25 +398,12 @@ class DatabaseConnection:
             }
 
         try:
-            cursor = self.connection.cursor()
-
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-
-            all_rows = []
-            while True:
-                batch = cursor.fetchmany(batch_size)
-                if not batch:
-                    break
-                all_rows.extend([dict(zip(columns, row)) for row in batch])
+            all_rows: List[Any] = []
+            columns: List[str] = []
+            for columns, batch in self._stream_batches(query, params, batch_size, row_mode, timeout):
+                all_rows.extend(batch)
                 logger.debug(f"Fetched {len(all_rows)} rows so far...")
 
-            cursor.close()
-
             logger.info(f"Large query completed, {len(all_rows)} total rows")
             return {
                 "success": True,
@@ -233,6 +414,7 @@ class DatabaseConnection:
             }
 
         except Exception as e:
+            # _stream_batches has already flagged dropped connections
             logger.error(f"Large query failed: {str(e)}")
             return {
                 "success": False,
@@ -242,6 +424,82 @@ class DatabaseConnection:
                 "row_count": 0
             }
 
+    def execute_query_frame(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        numeric_columns: Optional[List[str]] = None,
+        datetime_columns: Optional[List[str]] = None,
+        category_columns: Optional[List[str]] = None,
+        batch_size: int = 5000,
+        timeout: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute a query and return the result as a typed pandas DataFrame.
+
+        Rows are streamed in tuple mode and transposed into per-column lists
+        batch by batch, so no dict is built per row. Numeric and datetime
+        columns are stored with native dtypes and repeated labels as
+        categoricals (see app.database.frames).
+
+        Args:
+            query: SQL query string
+            params: Optional query parameters
+            numeric_columns: Columns stored as float64
+            datetime_columns: Columns stored as datetime64
+            category_columns: Low-cardinality text columns stored as categoricals
+            batch_size: Number of rows to fetch at a time
+            timeout: Optional query timeout (overrides connection timeout)
+
+        Returns:
+            Dict with keys: success, frame, rows (always empty), columns, row_count, error
+        """
+        if not self.connection or not self.is_connected:
+            return {
+                "success": False,
+                "error": "Database not connected",
+                "frame": empty_frame(),
+                "rows": [],
+                "columns": [],
+                "row_count": 0
+            }
+
+        try:
+            columns: List[str] = []
+            column_values: Dict[str, List[Any]] = {}
+            for columns, batch in self._stream_batches(query, params, batch_size, ROW_MODE_TUPLE, timeout):
+                if not column_values:
+                    column_values = {column: [] for column in columns}
+                for column, values in zip(columns, zip(*batch)):
+                    column_values[column].extend(values)
+
+            frame = build_frame(columns, column_values, numeric_columns, datetime_columns, category_columns)
+            del column_values
+
+            logger.info(
+                f"Frame query completed, {len(frame)} rows "
+                f"({frame.memory_usage(deep=True).sum() / 1024:.0f} KB)"
+            )
+            return {
+                "success": True,
+                "frame": frame,
+                "rows": [],
+                "columns": columns,
+                "row_count": len(frame),
+                "error": None
+            }
+
+        except Exception as e:
+            logger.error(f"Frame query failed: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "frame": empty_frame(),
+                "rows": [],
+                "columns": [],
+                "row_count": 0
+            }
+
     def __enter__(self):
         """Context manager entry."""
         self.connect()
@@ -252,6 +510,311 @@ class DatabaseConnection:
         self.disconnect()
 
 
+class PoolExhaustedError(RuntimeError):
+    """Raised when no pooled connection becomes available within the wait timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of DatabaseConnection objects.
+
+    Connections are checked out for the duration of a unit of work and
+    checked back in afterwards. Idle connections are health-checked before
+    reuse, evicted after sitting unused too long and recycled once they
+    exceed their maximum lifetime.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        database: str,
+        timeout: int = 300,
+        max_retries: int = 3,
+        max_size: int = 10,
+        acquire_timeout: float = 30.0,
+        max_idle_seconds: float = 300.0,
+        max_lifetime_seconds: float = 3600.0,
+        health_check_after_seconds: float = 30.0
+    ):
+        """
+        Initialize pool parameters. Connections are opened lazily on demand.
+
+        Args:
+            server: SQL Server hostname or IP
+            database: Database name
+            timeout: Per-connection timeout in seconds
+            max_retries: Connection retry attempts for each new connection
+            max_size: Maximum number of connections open at once
+            acquire_timeout: Seconds to wait for a free connection before giving up
+            max_idle_seconds: Close idle connections unused for longer than this
+            max_lifetime_seconds: Recycle connections older than this
+            health_check_after_seconds: Ping idle connections unused for longer than this before reuse
+        """
+        self.server = server
+        self.database = database
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_after_seconds = health_check_after_seconds
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle: List[DatabaseConnection] = []
+        self._in_use: set = set()
+        self._opening = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_timeouts": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "connections_created": 0,
+            "connection_failures": 0,
+            "health_check_failures": 0,
+            "idle_evictions": 0,
+            "lifetime_recycles": 0,
+            "discarded": 0
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        """True if at least one pooled connection is open."""
+        with self._lock:
+            return any(c.is_connected for c in list(self._idle) + list(self._in_use))
+
+    def _is_expired(self, conn: DatabaseConnection, now: float) -> bool:
+        """Check whether a connection has outlived max_lifetime_seconds."""
+        return (
+            self.max_lifetime_seconds > 0
+            and conn.connected_at is not None
+            and now - conn.connected_at > self.max_lifetime_seconds
+        )
+
+    def _evict_idle_locked(self, now: float) -> List[DatabaseConnection]:
+        """Remove idle connections that are stale; caller closes them outside the lock."""
+        stale = []
+        keep = []
+        for conn in self._idle:
+            idle_for = now - (conn.last_used_at or now)
+            if self.max_idle_seconds > 0 and idle_for > self.max_idle_seconds:
+                self._stats["idle_evictions"] += 1
+                stale.append(conn)
+            elif self._is_expired(conn, now):
+                self._stats["lifetime_recycles"] += 1
+                stale.append(conn)
+            else:
+                keep.append(conn)
+        self._idle = keep
+        return stale
+
+    def _new_connection(self) -> DatabaseConnection:
+        """Open a fresh connection (called without the pool lock held)."""
+        conn = DatabaseConnection(
+            server=self.server,
+            database=self.database,
+            timeout=self.timeout,
+            max_retries=self.max_retries
+        )
+        if not conn.connect():
+            raise ConnectionError(f"Failed to connect to {self.server}.{self.database}")
+        return conn
+
+    def acquire(self, timeout: Optional[float] = None) -> DatabaseConnection:
+        """
+        Check out a healthy connection, opening a new one if the pool has room.
+
+        Args:
+            timeout: Seconds to wait for a free connection (defaults to acquire_timeout)
+
+        Returns:
+            A connected DatabaseConnection owned by the caller until release()
+
+        Raises:
+            PoolExhaustedError: No connection became available in time
+            ConnectionError: A new connection could not be opened
+        """
+        wait_limit = self.acquire_timeout if timeout is None else timeout
+        wait_started = time.monotonic()
+        # Every attempt is timed, so waits that end in a timeout or a failed
+        # open show up in the histogram too
+        outcome = "error"
+        try:
+            candidate = self._checkout(wait_limit, wait_started)
+            outcome = "acquired"
+            return candidate
+        except PoolExhaustedError:
+            if not self._closed:
+                outcome = "timeout"
+            raise
+        finally:
+            db_pool_wait_seconds.observe(time.monotonic() - wait_started, outcome=outcome)
+
+    def _checkout(self, wait_limit: float, wait_started: float) -> DatabaseConnection:
+        """Wait for, open or validate a connection for acquire()."""
+        waited = False
+
+        while True:
+            candidate = None
+            stale: List[DatabaseConnection] = []
+            should_open = False
+
+            with self._available:
+                if self._closed:
+                    raise PoolExhaustedError("Connection pool is closed")
+
+                while True:
+                    now = time.monotonic()
+                    stale.extend(self._evict_idle_locked(now))
+
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        self._in_use.add(candidate)
+                        break
+
+                    if len(self._in_use) + self._opening < self.max_size:
+                        self._opening += 1
+                        should_open = True
+                        break
+
+                    remaining = wait_limit - (now - wait_started)
+                    if remaining <= 0:
+                        self._stats["wait_timeouts"] += 1
+                        db_pool_wait_timeouts_total.inc()
+                        raise PoolExhaustedError(
+                            f"No database connection available after {wait_limit:g}s "
+                            f"({len(self._in_use)}/{self.max_size} in use)"
+                        )
+                    if not waited:
+                        self._stats["waits"] += 1
+                        waited = True
+                    self._available.wait(remaining)
+
+            for conn in stale:
+                conn.disconnect()
+
+            if should_open:
+                try:
+                    candidate = self._new_connection()
+                except Exception:
+                    with self._available:
+                        self._opening -= 1
+                        self._stats["connection_failures"] += 1
+                        self._available.notify()
+                    raise
+                with self._available:
+                    self._opening -= 1
+                    self._in_use.add(candidate)
+                    self._stats["connections_created"] += 1
+            else:
+                idle_for = time.monotonic() - (candidate.last_used_at or 0)
+                if idle_for > self.health_check_after_seconds and not candidate.ping():
+                    with self._available:
+                        self._stats["health_check_failures"] += 1
+                    self._discard(candidate)
+                    continue
+
+            wait_ms = (time.monotonic() - wait_started) * 1000
+            with self._available:
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["total_wait_ms"] += wait_ms
+                    self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+            return candidate
+
+    def release(self, conn: Optional[DatabaseConnection], discard: bool = False) -> None:
+        """
+        Return a connection to the pool.
+
+        Broken or expired connections (or any when discard=True) are closed
+        instead of being made available again.
+
+        Args:
+            conn: Connection previously returned by acquire()
+            discard: Close the connection rather than reusing it
+        """
+        if conn is None:
+            return
+
+        with self._available:
+            if conn not in self._in_use:
+                logger.warning("Ignoring release of a connection not owned by the pool")
+                return
+            expired = self._is_expired(conn, time.monotonic())
+            if discard or self._closed or not conn.is_connected or expired:
+                if expired and not discard:
+                    self._stats["lifetime_recycles"] += 1
+                close_now = True
+            else:
+                self._in_use.discard(conn)
+                self._idle.append(conn)
+                close_now = False
+            self._available.notify()
+
+        if close_now:
+            self._discard(conn)
+
+    def _discard(self, conn: DatabaseConnection) -> None:
+        """Drop a checked-out connection from the pool and close it."""
+        with self._available:
+            self._in_use.discard(conn)
+            self._stats["discarded"] += 1
+            self._available.notify()
+        conn.disconnect()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[DatabaseConnection]:
+        """
+        Borrow a connection for the duration of a with-block.
+
+        Args:
+            timeout: Seconds to wait for a free connection
+
+        Yields:
+            A connected DatabaseConnection
+        """
+        conn = self.acquire(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get pool occupancy and wait metrics.
+
+        Returns:
+            Dictionary with size, in-use/idle counts and checkout/wait counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "max_size": self.max_size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "opening": self._opening,
+                "avg_wait_ms": round(stats["total_wait_ms"] / stats["waits"], 2) if stats["waits"] else 0.0
+            })
+        stats["total_wait_ms"] = round(stats["total_wait_ms"], 2)
+        stats["max_wait_ms"] = round(stats["max_wait_ms"], 2)
+        return stats
+
+    def close_all(self) -> None:
+        """Close every idle connection and refuse further checkouts."""
+        with self._available:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._available.notify_all()
+        for conn in idle:
+            conn.disconnect()
+        logger.info(f"Connection pool for {self.server}.{self.database} closed")
+
+
 def load_database_config(config_file: Optional[str] = None) -> Dict[str, Any]:
     """
     Load database configuration from JSON file.
@@ -307,3 +870,35 @@ def get_database_connection(config: Dict[str, Any]) -> Optional[DatabaseConnecti
         return connection
     else:
         return None
+
+
+def get_connection_pool(config: Dict[str, Any], pool_settings: Optional[Dict[str, Any]] = None) -> Optional[ConnectionPool]:
+    """
+    Factory function to create a connection pool from config.
+
+    Args:
+        config: Database configuration dictionary with keys: server, database
+        pool_settings: Optional pool tuning (see connection_defaults.pool in database_config.json)
+
+    Returns:
+        ConnectionPool instance or None if config invalid
+    """
+    server = config.get("server")
+    database = config.get("database")
+
+    if not server or not database:
+        logger.error("Database config missing 'server' or 'database' keys")
+        return None
+
+    settings = pool_settings or {}
+    return ConnectionPool(
+        server=server,
+        database=database,
+        timeout=config.get("query_timeout_seconds", config.get("timeout", 300)),
+        max_retries=config.get("max_retries", 3),
+        max_size=settings.get("max_size", 10),
+        acquire_timeout=settings.get("acquire_timeout_seconds", 30.0),
+        max_idle_seconds=settings.get("max_idle_seconds", 300.0),
+        max_lifetime_seconds=settings.get("max_lifetime_seconds", 3600.0),
+        health_check_after_seconds=settings.get("health_check_after_seconds", 30.0)
+    )
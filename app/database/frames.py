@@ -0,0 +1,130 @@
+"""
+Columnar Result Frames
+
+Helpers for returning large, regular result sets (vitals, labs) as typed
+pandas DataFrames instead of lists of dicts. Numeric results and timestamps
+are stored as native float64 / datetime64 columns and repeated labels
+(vital type, lab test name, units) as categoricals, which takes a fraction
+of the memory of one dict per row and allows vectorized summarization.
+"""
+
+import logging
+import math
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column typing for the vitals and labs extraction queries in main.py
+VITALS_FRAME_TYPES = {
+    "numeric_columns": ["VitalResultNumeric"],
+    "datetime_columns": ["TakenDateTime", "EnteredDateTime"],
+    "category_columns": ["VitalType", "Sta3n"]
+}
+
+LABS_FRAME_TYPES = {
+    "numeric_columns": ["LabChemResultNumericValue"],
+    "datetime_columns": ["LabChemSpecimenDateTime", "LabChemCompleteDateTime"],
+    "category_columns": ["LabChemTestName", "ResultUnits", "Abnormal", "Sta3n"]
+}
+
+
+def build_frame(
+    columns: List[str],
+    column_values: Dict[str, List[Any]],
+    numeric_columns: Optional[Sequence[str]] = None,
+    datetime_columns: Optional[Sequence[str]] = None,
+    category_columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """
+    Build a typed DataFrame from per-column value lists.
+
+    Args:
+        columns: Column names in result order
+        column_values: Mapping of column name -> list of values
+        numeric_columns: Columns stored as float64 (unparseable values become NaN)
+        datetime_columns: Columns stored as datetime64 (unparseable values become NaT)
+        category_columns: Low-cardinality text columns stored as categoricals
+            (other columns keep the dtype pandas infers)
+
+    Returns:
+        DataFrame with one column per result column
+    """
+    numeric = set(numeric_columns or ())
+    datetimes = set(datetime_columns or ())
+    categories = set(category_columns or ())
+
+    data = {}
+    for column in columns:
+        values = column_values.get(column, [])
+        if column in numeric:
+            data[column] = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").astype("float64")
+        elif column in datetimes:
+            data[column] = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce")
+        elif column in categories:
+            data[column] = pd.Series(values, dtype="category")
+        else:
+            # Let pandas infer (integer SIDs become int64, text stays text)
+            data[column] = pd.Series(values)
+
+    return pd.DataFrame(data, columns=columns)
+
+
+def empty_frame(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """An empty frame, used when an extraction query fails."""
+    return pd.DataFrame(columns=columns or [])
+
+
+def _python_value(value: Any) -> Any:
+    """Convert a pandas/NumPy scalar to a plain, JSON-friendly Python value."""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, "item"):
+        # NumPy scalar
+        value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+    return value
+
+
+def iter_frame_records(frame: pd.DataFrame) -> Iterator[Dict[str, Any]]:
+    """
+    Yield each row as a dict of plain Python values (NaN/NaT -> None).
+
+    Rows are produced one at a time so a caller that indexes or filters them
+    never holds a full list-of-dicts copy of the frame.
+    """
+    columns = list(frame.columns)
+    for values in frame.itertuples(index=False, name=None):
+        yield {column: _python_value(value) for column, value in zip(columns, values)}
+
+
+def frame_to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a frame to a list of plain dicts (for small frames and samples)."""
+    return list(iter_frame_records(frame))
+
+
+def frame_to_columns(frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Serialize a frame column-wise for JSON responses.
+
+    Column names appear once instead of once per row, and datetimes are
+    rendered as ISO strings.
+
+    Returns:
+        {"row_count": n, "columns": {name: [values...]}}
+    """
+    columns: Dict[str, List[Any]] = {}
+    for name in frame.columns:
+        series = frame[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = [None if pd.isna(value) else value.isoformat() for value in series]
+        else:
+            values = [_python_value(value) for value in series.astype(object)]
+        columns[str(name)] = values
+    return {"row_count": len(frame), "columns": columns}
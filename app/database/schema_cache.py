@@ -0,0 +1,184 @@
+"""
+Schema Metadata Cache
+
+Caches INFORMATION_SCHEMA column lists so that discovering which CDW columns
+exist (the TIU note text column, the staff tables used for provider roles)
+costs one round trip per TTL instead of several per review.
+
+Tables registered up front are loaded together in a single query on first
+use and whenever the TTL expires; any other table is looked up on demand and
+cached the same way. A table that does not exist is cached as an empty
+column list, so missing candidates are not re-queried either.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TableKey = Tuple[str, str]
+
+
+def _key(schema: str, table: str) -> TableKey:
+    # SQL Server metadata lookups are case-insensitive under the CDW collation
+    return (schema.lower(), table.lower())
+
+
+def parse_table_path(table_path: str) -> TableKey:
+    """Split 'Schema.Table' into (schema, table); a bare table name defaults to dbo."""
+    if "." in table_path:
+        schema, table = table_path.split(".", 1)
+        return schema, table
+    return "dbo", table_path
+
+
+class SchemaCache:
+    """TTL cache of table column lists shared by reviews and schema tooling."""
+
+    def __init__(self, ttl_seconds: float = 3600, tables: Optional[Iterable[str]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: How long loaded metadata is trusted before it is re-read
+            tables: 'Schema.Table' paths loaded together in one query on first use
+        """
+        self.ttl_seconds = ttl_seconds
+        self._registered: Dict[TableKey, TableKey] = {}
+        self._columns: Dict[TableKey, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._queries = 0
+        self._failures = 0
+
+        self.register(tables or [])
+
+    def register(self, tables: Iterable[str]) -> None:
+        """Add 'Schema.Table' paths to the set loaded in bulk."""
+        with self._lock:
+            for table_path in tables:
+                schema, table = parse_table_path(table_path)
+                self._registered[_key(schema, table)] = (schema, table)
+
+    def _fresh(self, key: TableKey, now: float) -> Optional[List[str]]:
+        entry = self._columns.get(key)
+        if entry is not None and now - entry[0] <= self.ttl_seconds:
+            return entry[1]
+        return None
+
+    def _load(self, conn: Any, tables: List[TableKey]) -> bool:
+        """Read column lists for tables in one INFORMATION_SCHEMA query and store them."""
+        if not tables:
+            return True
+
+        conditions = " OR ".join(["(TABLE_SCHEMA = ? AND TABLE_NAME = ?)"] * len(tables))
+        query = f"""
+        SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE {conditions}
+        ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+        """
+        params = tuple(value for schema_table in tables for value in schema_table)
+
+        with self._lock:
+            self._queries += 1
+        result = conn.execute_query(query, params=params)
+        if not isinstance(result, dict) or not result.get("success"):
+            error = result.get("error") if isinstance(result, dict) else "invalid response"
+            logger.warning(f"Schema metadata lookup failed for {len(tables)} tables: {error}")
+            with self._lock:
+                self._failures += 1
+            return False
+
+        loaded: Dict[TableKey, List[str]] = {_key(schema, table): [] for schema, table in tables}
+        for row in result.get("rows", []):
+            key = _key(str(row["TABLE_SCHEMA"]), str(row["TABLE_NAME"]))
+            loaded.setdefault(key, []).append(row["COLUMN_NAME"])
+
+        now = time.monotonic()
+        with self._lock:
+            for key, columns in loaded.items():
+                self._columns[key] = (now, columns)
+        logger.info(f"Loaded schema metadata for {len(loaded)} tables")
+        return True
+
+    def get_columns(self, conn: Any, table_path: str) -> Optional[List[str]]:
+        """
+        Column names of a table, in ordinal order.
+
+        On a miss, the table is loaded together with every registered table
+        whose metadata is missing or stale.
+
+        Args:
+            conn: DatabaseConnection (or anything exposing execute_query) used on a miss
+            table_path: 'Schema.Table'
+
+        Returns:
+            Column names ([] if the table does not exist), or None if the lookup failed
+        """
+        schema, table = parse_table_path(table_path)
+        key = _key(schema, table)
+        now = time.monotonic()
+
+        with self._lock:
+            columns = self._fresh(key, now)
+            if columns is not None:
+                self._hits += 1
+                return list(columns)
+            self._misses += 1
+            to_load = [(schema, table)] + [
+                names for other, names in self._registered.items()
+                if other != key and self._fresh(other, now) is None
+            ]
+
+        if not self._load(conn, to_load):
+            return None
+
+        with self._lock:
+            entry = self._columns.get(key)
+            return list(entry[1]) if entry else None
+
+    def load_tables(self, conn: Any, table_paths: Iterable[str]) -> Dict[str, Optional[List[str]]]:
+        """
+        Load several tables in one round trip (ignoring cached entries) and return their columns.
+
+        Returns:
+            Mapping of table path -> column list ([] if missing), or None for every
+            table if the lookup failed
+        """
+        paths = list(table_paths)
+        tables = [parse_table_path(path) for path in paths]
+        if not self._load(conn, tables):
+            return {path: None for path in paths}
+        with self._lock:
+            return {path: list(self._columns[_key(*table)][1]) for path, table in zip(paths, tables)}
+
+    def invalidate(self, table_path: Optional[str] = None) -> None:
+        """Forget one table's metadata, or everything."""
+        with self._lock:
+            if table_path is None:
+                self._columns.clear()
+            else:
+                self._columns.pop(_key(*parse_table_path(table_path)), None)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with cached table count, hits, misses, queries and failures
+        """
+        with self._lock:
+            return {
+                "tables_cached": len(self._columns),
+                "tables_registered": len(self._registered),
+                "hits": self._hits,
+                "misses": self._misses,
+                "queries": self._queries,
+                "failures": self._failures,
+                "ttl_seconds": self.ttl_seconds
+            }
@@ -0,0 +1,177 @@
+"""
+Treating Specialty Catalog
+
+Cached list of the station's treating specialties for /api/specialties. The
+list comes from Dim.TreatingSpecialty and changes a few times a year, so it
+is loaded once, precomputed together with its display names
+(specialty_mapper) and an ETag, and served from memory.
+
+When the TTL expires the current catalog keeps being served while a single
+background thread reloads it; a failed reload keeps the previous catalog and
+the next reload is tried after retry_seconds, not on the next request.
+Only the very first load (or a load after a failure with nothing cached)
+blocks the caller.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.specialty_mapping import specialty_mapper
+
+logger = logging.getLogger(__name__)
+
+
+def build_catalog(names: List[str]) -> Dict[str, Any]:
+    """
+    Build a catalog snapshot from raw specialty names.
+
+    Args:
+        names: Raw Dim.TreatingSpecialty [Specialty] values
+
+    Returns:
+        Dict with 'specialties' ({"id", "name", "display_name"}), 'display_names'
+        (sorted distinct display names), 'count', 'loaded_at' and 'etag'
+    """
+    unique = sorted({str(name).strip() for name in names if name is not None and str(name).strip()})
+    specialties = [
+        {"id": idx, "name": name, "display_name": display_name}
+        for idx, (name, display_name) in enumerate(zip(unique, specialty_mapper.map_many(unique)), 1)
+    ]
+    display_names = sorted({entry["display_name"] for entry in specialties})
+
+    # The ETag depends only on content, so identical reloads keep client caches valid;
+    # display_names and count derive from specialties, and loaded_at is not served
+    digest = hashlib.sha1(json.dumps(specialties, sort_keys=True).encode("utf-8")).hexdigest()
+
+    return {
+        "specialties": specialties,
+        "display_names": display_names,
+        "count": len(specialties),
+        "loaded_at": datetime.now().isoformat(),
+        "etag": f'"{digest}"'
+    }
+
+
+class SpecialtyCatalog:
+    """In-memory specialty catalog with TTL and background refresh."""
+
+    def __init__(self, loader: Callable[[], List[str]], ttl_seconds: float = 86400, retry_seconds: float = 60):
+        """
+        Initialize the catalog (nothing is loaded until first use or warm()).
+
+        Args:
+            loader: Callable returning the raw specialty names; raises on failure
+            ttl_seconds: Age after which the catalog is reloaded in the background
+            retry_seconds: Wait after a failed reload before the next one is started
+        """
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+
+        self._catalog: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+        self._hits = 0
+        self._loads = 0
+        self._failures = 0
+        self._last_error: Optional[str] = None
+
+    def _load(self, only_if_missing: bool = False) -> Optional[Dict[str, Any]]:
+        """Run the loader and install a new snapshot; returns None on failure."""
+        with self._load_lock:
+            if only_if_missing:
+                with self._lock:
+                    if self._catalog is not None:
+                        return self._catalog
+            try:
+                catalog = build_catalog(self.loader())
+            except Exception as e:
+                logger.warning(f"Specialty catalog load failed: {e}")
+                with self._lock:
+                    self._failures += 1
+                    self._last_error = str(e)
+                    # Back off so requests during an outage don't each start a reload
+                    self._expires_at = time.monotonic() + self.retry_seconds
+                return None
+
+            with self._lock:
+                changed = self._catalog is None or self._catalog["etag"] != catalog["etag"]
+                self._catalog = catalog
+                self._loaded_at = time.monotonic()
+                self._expires_at = self._loaded_at + self.ttl_seconds
+                self._loads += 1
+                self._last_error = None
+            logger.info(f"Specialty catalog loaded: {catalog['count']} specialties ({'changed' if changed else 'unchanged'})")
+            return catalog
+
+    def _refresh_in_background(self) -> None:
+        def _run():
+            try:
+                self._load()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="specialty-catalog-refresh", daemon=True).start()
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        Current catalog snapshot (see build_catalog).
+
+        Returns:
+            The catalog, or None if it has never loaded successfully and the
+            blocking load failed
+        """
+        with self._lock:
+            catalog = self._catalog
+            if catalog is not None:
+                self._hits += 1
+                if time.monotonic() >= self._expires_at and not self._refreshing:
+                    self._refreshing = True
+                    self._refresh_in_background()
+                return catalog
+
+        # Nothing cached yet; concurrent first callers share one load
+        return self._load(only_if_missing=True)
+
+    def warm(self) -> None:
+        """Load the catalog in a background thread (used at startup)."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self._refresh_in_background()
+
+    def invalidate(self) -> None:
+        """Expire the catalog so the next request triggers a reload."""
+        with self._lock:
+            self._expires_at = 0.0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get catalog counters.
+
+        Returns:
+            Dictionary with specialty count, age, hits, loads and failures
+        """
+        with self._lock:
+            return {
+                "count": self._catalog["count"] if self._catalog else 0,
+                "etag": self._catalog["etag"] if self._catalog else None,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._catalog else None,
+                "hits": self._hits,
+                "loads": self._loads,
+                "failures": self._failures,
+                "last_error": self._last_error,
+                "ttl_seconds": self.ttl_seconds,
+                "retry_seconds": self.retry_seconds
+            }
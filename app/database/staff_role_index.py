@@ -0,0 +1,190 @@
+"""
+Staff Role Index
+
+Local, persistent StaffSID -> provider role dictionary. The same attendings
+and residents author notes in thousands of admissions, so roles looked up in
+the CDW staff tables are kept in a small SQLite file and an in-memory dict
+loaded from it at startup. Reviews query the index in bulk and only go to
+the database for StaffSIDs never seen before or whose entry is older than
+the refresh age; in steady state role tagging needs no database trip.
+
+StaffSIDs not found in any staff table are stored too (role UNKNOWN) so
+they are not looked up again until they age out.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROLE_TRAINEE = "TRAINEE"
+ROLE_LIP = "LIP"
+ROLE_UNKNOWN = "UNKNOWN"
+
+# Matched as substrings of the upper-cased staff columns, trainee terms first
+_TRAINEE_PATTERN = re.compile("RESIDENT|FELLOW")
+_LIP_PATTERN = re.compile("PHYSICIAN|MD|DO|NURSE PRACTITIONER|NP|PHYSICIAN ASSISTANT|PA|ATTENDING|CONSULTANT")
+
+
+def classify_role(raw_text: str) -> str:
+    """
+    Classify a provider from the text of their staff record columns.
+
+    Args:
+        raw_text: PersonClass/ProviderType/Occupation/PositionTitle/name values joined by spaces
+
+    Returns:
+        TRAINEE, LIP or UNKNOWN
+    """
+    raw_upper = (raw_text or "").upper()
+    if _TRAINEE_PATTERN.search(raw_upper):
+        return ROLE_TRAINEE
+    if _LIP_PATTERN.search(raw_upper):
+        return ROLE_LIP
+    return ROLE_UNKNOWN
+
+
+class StaffRoleIndex:
+    """Persistent StaffSID -> {"role", "raw"} map with age-based refresh."""
+
+    def __init__(self, db_path: str = "data/cache/staff_roles.sqlite3", refresh_after_seconds: float = 7 * 86400):
+        """
+        Open (or create) the index and load it into memory.
+
+        Args:
+            db_path: Path to the SQLite index file
+            refresh_after_seconds: Entries older than this are looked up again on next use
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.refresh_after_seconds = refresh_after_seconds
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS staff_role (
+                staff_sid INTEGER PRIMARY KEY,
+                role TEXT NOT NULL,
+                raw TEXT NOT NULL,
+                found INTEGER NOT NULL,
+                refreshed_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        # staff_sid -> (role, raw, found, refreshed_at)
+        self._entries: Dict[int, Tuple[str, str, bool, float]] = {
+            sid: (role, raw, bool(found), refreshed_at)
+            for sid, role, raw, found, refreshed_at in self._conn.execute(
+                "SELECT staff_sid, role, raw, found, refreshed_at FROM staff_role"
+            )
+        }
+
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._writes = 0
+
+        logger.info(f"Staff role index ready at {self.db_path} ({len(self._entries)} StaffSIDs)")
+
+    def lookup(self, staff_sids: Iterable[Any]) -> Tuple[Dict[int, Dict[str, str]], List[int]]:
+        """
+        Look up many StaffSIDs at once.
+
+        Args:
+            staff_sids: StaffSIDs (anything int() accepts; None is skipped)
+
+        Returns:
+            (roles, to_fetch): roles maps each known StaffSID found in a staff table
+            to {"role", "raw"}; to_fetch lists StaffSIDs that are unknown or due for
+            refresh (stale entries are still returned in roles until replaced)
+        """
+        now = time.time()
+        roles: Dict[int, Dict[str, str]] = {}
+        to_fetch: List[int] = []
+
+        with self._lock:
+            for value in staff_sids:
+                if value is None:
+                    continue
+                sid = int(value)
+                entry = self._entries.get(sid)
+                if entry is None:
+                    self._misses += 1
+                    to_fetch.append(sid)
+                    continue
+                role, raw, found, refreshed_at = entry
+                if now - refreshed_at > self.refresh_after_seconds:
+                    self._stale += 1
+                    to_fetch.append(sid)
+                else:
+                    self._hits += 1
+                if found:
+                    roles[sid] = {"role": role, "raw": raw}
+
+        return roles, sorted(set(to_fetch))
+
+    def store(self, looked_up: Iterable[int], roles: Dict[int, Dict[str, str]]) -> None:
+        """
+        Record the result of a database lookup.
+
+        Args:
+            looked_up: Every StaffSID that was queried
+            roles: StaffSID -> {"role", "raw"} for those found; the rest are stored as not found
+        """
+        now = time.time()
+        rows = []
+        for sid in looked_up:
+            sid = int(sid)
+            info = roles.get(sid)
+            if info is not None:
+                rows.append((sid, info["role"], info.get("raw", ""), 1, now))
+            else:
+                rows.append((sid, ROLE_UNKNOWN, "", 0, now))
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO staff_role (staff_sid, role, raw, found, refreshed_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            for sid, role, raw, found, refreshed_at in rows:
+                self._entries[sid] = (role, raw, bool(found), refreshed_at)
+            self._writes += len(rows)
+
+    def clear(self) -> None:
+        """Drop every entry (forces a full reload on next use)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM staff_role")
+            self._conn.commit()
+            self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get index counters.
+
+        Returns:
+            Dictionary with entry count, hits, misses, stale refreshes and writes
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "writes": self._writes,
+                "refresh_after_seconds": self.refresh_after_seconds
+            }
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
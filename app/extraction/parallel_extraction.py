@@ -0,0 +1,150 @@
+"""
+Parallel Extraction Stage
+
+Runs independent CDW extraction queries (notes, vitals, labs, PTF diagnoses)
+concurrently, each on its own connection borrowed from the shared pool.
+Total wall time becomes roughly that of the slowest query instead of the sum.
+
+A query that fails on a connection it holds is reported as a failed result
+so the review can continue without that data. Failing to get a connection at
+all (pool exhausted, connection could not be opened or was lost) is raised
+instead: the review has no data to work with and must fail.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Optional
+
+from app.database.connection import ConnectionPool, PoolExhaustedError
+
+logger = logging.getLogger(__name__)
+
+
+def _failed_result(error: str, execution_time_ms: float = 0.0) -> Dict[str, Any]:
+    """Build a failed result in the same shape as DatabaseConnection.execute_query."""
+    return {
+        "success": False,
+        "error": error,
+        "rows": [],
+        "columns": [],
+        "row_count": 0,
+        "execution_time_ms": execution_time_ms
+    }
+
+
+def _run_one(pool: ConnectionPool, name: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute a single extraction query on a pooled connection and time it.
+
+    Raises:
+        PoolExhaustedError: No connection became available in time
+        ConnectionError: A connection could not be opened, or dropped during the query
+    """
+    started = time.time()
+    conn = pool.acquire()
+    try:
+        if spec.get("frame") is not None:
+            # Columnar result: typed DataFrame in result["frame"]
+            result = conn.execute_query_frame(
+                spec["query"],
+                params=spec.get("params"),
+                timeout=spec.get("timeout"),
+                **spec["frame"]
+            )
+        elif spec.get("batch_size"):
+            # Fetch in batches so large text columns are not held twice (raw rows + dicts)
+            result = conn.execute_query_large(
+                spec["query"],
+                params=spec.get("params"),
+                batch_size=spec["batch_size"],
+                timeout=spec.get("timeout")
+            )
+        else:
+            result = conn.execute_query(spec["query"], params=spec.get("params"), timeout=spec.get("timeout"))
+    except Exception as e:
+        logger.error(f"Extraction query '{name}' could not run: {e}")
+        result = _failed_result(str(e), (time.time() - started) * 1000)
+    finally:
+        # Read before release(), which disconnects connections past their lifetime
+        connection_lost = not conn.is_connected
+        pool.release(conn)
+
+    if connection_lost and isinstance(result, dict) and not result.get("success"):
+        # The link dropped mid-query; an empty result would be indistinguishable from "no data"
+        raise ConnectionError(f"Database connection lost during '{name}' extraction: {result.get('error')}")
+
+    if not isinstance(result, dict):
+        logger.error(f"Extraction query '{name}' returned {type(result)} instead of dict")
+        return _failed_result("Database query returned invalid response", (time.time() - started) * 1000)
+
+    result["execution_time_ms"] = (time.time() - started) * 1000
+    return result
+
+
+def run_extraction_queries(
+    pool: ConnectionPool,
+    queries: Dict[str, Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    on_complete: Optional[Callable[[str, Dict[str, Any], int], None]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run independent extraction queries in parallel and wait for all of them.
+
+    Args:
+        pool: Connection pool to borrow one connection per query from
+        queries: Mapping of step name -> {"query": sql, "params": tuple, "timeout": optional seconds,
+            "batch_size": optional rows per fetch for large result sets,
+            "frame": optional column typing for execute_query_frame}
+        max_workers: Maximum queries in flight (defaults to one per query, at most pool.max_size)
+        on_complete: Optional callback(name, result, completed_count) invoked in the
+            calling thread as each query finishes, for progress reporting
+
+    Returns:
+        Mapping of step name -> execute_query-style result dict (plus "frame"
+        for columnar queries) with an added execution_time_ms key measured for
+        that query alone
+
+    Raises:
+        PoolExhaustedError, ConnectionError: A query could not get a working
+            connection; queries not yet started are cancelled
+    """
+    if not queries:
+        return {}
+
+    workers = max(1, min(max_workers or len(queries), len(queries), pool.max_size))
+    results: Dict[str, Dict[str, Any]] = {}
+    unavailable: Optional[Exception] = None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as executor:
+        futures = {
+            executor.submit(_run_one, pool, name, spec): name
+            for name, spec in queries.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                result = future.result()
+            except (PoolExhaustedError, ConnectionError) as e:
+                logger.error(f"Extraction query '{name}' could not get a database connection: {e}")
+                if unavailable is None:
+                    unavailable = e
+                    for pending in futures:
+                        pending.cancel()
+                continue
+            except Exception as e:
+                logger.error(f"Extraction query '{name}' raised: {e}", exc_info=True)
+                result = _failed_result(str(e))
+            results[name] = result
+
+            if on_complete:
+                try:
+                    on_complete(name, result, len(results))
+                except Exception as e:
+                    logger.warning(f"Extraction progress callback failed for '{name}': {e}")
+
+    if unavailable is not None:
+        raise unavailable
+    return results
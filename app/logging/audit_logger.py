@@ -17,10 +17,15 @@ This creates a detailed audit trail for compliance and quality review.
 import json
 import logging
 import os
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
+from .log_tail import tail_jsonl
+from .log_writer import BufferedLogWriter
+from .running_stats import RunningStatistics
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,15 +55,17 @@ def _serialize_for_json(obj: Any) -> Any:
 class AuditLogger:
     """Comprehensive audit logger with full context capture."""
 
-    def __init__(self, log_dir: str = "logs"):
+    def __init__(self, log_dir: str = "logs", writer: Optional[BufferedLogWriter] = None):
         """
         Initialize audit logger.
 
         Args:
             log_dir: Directory for log files
+            writer: Background writer for the log files (None writes synchronously)
         """
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
+        self.writer = writer
 
         # Main audit log file (JSON lines format for easy parsing)
         self.audit_log_file = self.log_dir / "audit_log.jsonl"
@@ -72,8 +79,72 @@ class AuditLogger:
         # Current session ID
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+        # Aggregates updated on every write; checkpointed with the audit log
+        # byte offset they cover, so startup only replays newer events
+        self._write_lock = threading.Lock()
+        self.stats = RunningStatistics(self.log_dir / "audit_stats_checkpoint.json")
+        self._replay_audit_log()
+        self._audit_log_size = self.audit_log_file.stat().st_size if self.audit_log_file.exists() else 0
+
         logger.info(f"Audit Logger initialized - Session: {self.session_id}")
 
+    def _append(self, path: Path, line: bytes) -> None:
+        """Append an encoded line, through the background writer if there is one."""
+        if self.writer is not None:
+            self.writer.write(path, line)
+        else:
+            with open(path, 'ab') as f:
+                f.write(line)
+
+    def _record_stats(self, entry: Dict[str, Any], position: int) -> None:
+        """Add an audit entry to the running statistics."""
+        details = entry.get('details') or {}
+        seconds = details.get('processing_time_seconds') if isinstance(details, dict) else None
+        self.stats.record(
+            kind=entry.get('event_type', 'UNKNOWN'),
+            username=entry.get('username', 'UNKNOWN'),
+            success=bool(entry.get('success')),
+            duration_ms=seconds * 1000 if isinstance(seconds, (int, float)) else None,
+            patient_id=entry.get('patient_id'),
+            position=position
+        )
+
+    def _replay_audit_log(self) -> None:
+        """Bring the running statistics up to date with events written after the checkpoint."""
+        if not self.audit_log_file.exists():
+            return
+
+        size = self.audit_log_file.stat().st_size
+        position = self.stats.position or 0
+        if position > size:
+            # Log was truncated or replaced; rebuild from the start
+            logger.info("Audit log is shorter than the statistics checkpoint; rebuilding statistics")
+            self.stats.reset()
+            position = 0
+        if position == size:
+            return
+
+        replayed = 0
+        try:
+            with open(self.audit_log_file, 'rb') as f:
+                f.seek(position)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    position += len(line)
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    self._record_stats(entry, position)
+                    replayed += 1
+        except Exception as e:
+            logger.error(f"Error replaying audit log for statistics: {e}")
+
+        self.stats.position = position
+        self.stats.checkpoint()
+        logger.info(f"Audit statistics replayed {replayed} events written after the last checkpoint")
+
     def log_event(
         self,
         event_type: str,
@@ -114,8 +185,11 @@ class AuditLogger:
 
         # Write to audit log
         try:
-            with open(self.audit_log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry) + '\n')
+            line = (json.dumps(log_entry) + '\n').encode('utf-8')
+            with self._write_lock:
+                self._append(self.audit_log_file, line)
+                self._audit_log_size += len(line)
+                self._record_stats(log_entry, self._audit_log_size)
         except Exception as e:
             logger.error(f"Failed to write to audit log: {e}")
 
@@ -312,8 +386,7 @@ class AuditLogger:
         try:
             # Serialize datetime objects before JSON encoding
             serialized_entry = _serialize_for_json(log_entry)
-            with open(self.analysis_log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(serialized_entry) + '\n')
+            self._append(self.analysis_log_file, (json.dumps(serialized_entry) + '\n').encode('utf-8'))
         except Exception as e:
             logger.error(f"Failed to write analysis details: {e}")
 
@@ -328,68 +401,40 @@ class AuditLogger:
         Returns:
             List of audit log entries
         """
-        events = []
-
-        try:
-            if self.audit_log_file.exists():
-                with open(self.audit_log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            entry = json.loads(line)
-                            if event_type is None or entry.get('event_type') == event_type:
-                                events.append(entry)
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            logger.error(f"Error reading audit log: {e}")
+        if self.writer is not None:
+            self.writer.flush()
 
-        return events[-count:] if len(events) > count else events
+        # Read backwards from the end of the log; stops after count matches
+        return tail_jsonl(self.audit_log_file, count, filters={'event_type': event_type})
 
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get audit statistics.
 
+        Served from the running aggregates; patients_reviewed is a
+        HyperLogLog estimate of the distinct patient IDs.
+
         Returns:
             Dictionary with event counts and statistics
         """
-        stats = {
-            'total_events': 0,
-            'successful': 0,
-            'failed': 0,
-            'event_types': {},
-            'users': {},
-            'patients_reviewed': set()
+        snapshot = self.stats.snapshot()
+        return {
+            'total_events': snapshot['total'],
+            'successful': snapshot['successful'],
+            'failed': snapshot['failed'],
+            'event_types': snapshot['by_type'],
+            'users': snapshot['by_user'],
+            'patients_reviewed': snapshot['distinct_patients_approx'],
+            'patients_reviewed_is_estimate': True,
+            'failed_by_type': snapshot['failed_by_type'],
+            'processing_time': snapshot['execution_time'],
+            'since': snapshot['since']
         }
 
-        try:
-            if self.audit_log_file.exists():
-                with open(self.audit_log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            entry = json.loads(line)
-                            stats['total_events'] += 1
-
-                            if entry.get('success'):
-                                stats['successful'] += 1
-                            else:
-                                stats['failed'] += 1
-
-                            event_type = entry.get('event_type', 'UNKNOWN')
-                            stats['event_types'][event_type] = stats['event_types'].get(event_type, 0) + 1
-
-                            username = entry.get('username', 'UNKNOWN')
-                            stats['users'][username] = stats['users'].get(username, 0) + 1
-
-                            if entry.get('patient_id'):
-                                stats['patients_reviewed'].add(entry['patient_id'])
-
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            logger.error(f"Error calculating statistics: {e}")
-
-        stats['patients_reviewed'] = len(stats['patients_reviewed'])
-        return stats
+    def checkpoint(self) -> None:
+        """Persist the running statistics (called at shutdown)."""
+        with self._write_lock:
+            self.stats.checkpoint()
 
     def export_session_report(self, output_file: Optional[str] = None) -> str:
         """
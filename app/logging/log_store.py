@@ -0,0 +1,627 @@
+"""
+Indexed JSONL Log Store
+
+Append-only JSONL segments with a SQLite sidecar index, used by QueryLogger
+for the query and evaluation logs.
+
+- Segments are named {prefix}_{YYYYMMDD}.jsonl; a new segment starts at
+  midnight and whenever the current one reaches max_segment_mb
+  ({prefix}_{YYYYMMDD}_{n}.jsonl). Segments are never rewritten.
+- Every appended line is indexed by position (segment, byte offset, length),
+  timestamp, kind (e.g. query_type), success and an optional lookup key
+  (e.g. evaluation_id), and added to per-day totals by kind.
+- Recent entries, failures since a time and key lookups read only the
+  matching lines, and statistics come from the per-day totals, so their cost
+  does not grow with the size of the log.
+
+The JSONL segments remain the source of truth: lines not yet in the index
+(logs written before the index existed, or an index that was deleted) are
+indexed when the store opens. With a background writer, a line the writer
+drops is not indexed, and a segment whose batch failed to write is re-read
+and re-indexed from the first line that is not where the index expects it.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .log_writer import BufferedLogWriter
+
+logger = logging.getLogger(__name__)
+
+
+class LogStore:
+    """Rotating JSONL log with a SQLite index by timestamp, kind, success and key."""
+
+    def __init__(
+        self,
+        log_dir: str,
+        prefix: str,
+        kind_field: str,
+        key_field: Optional[str] = None,
+        max_segment_mb: float = 64,
+        writer: Optional[BufferedLogWriter] = None,
+        index_batch_size: int = 200,
+        index_flush_seconds: float = 1.0
+    ):
+        """
+        Open (or create) the store and index any unindexed lines.
+
+        Args:
+            log_dir: Directory holding the segments and the index
+            prefix: Segment file prefix (e.g. 'queries')
+            kind_field: Entry field indexed as the kind (e.g. 'query_type')
+            key_field: Optional entry field indexed for exact lookups (e.g. 'evaluation_id')
+            max_segment_mb: Size at which a new segment is started
+            writer: Background writer for the segments (None writes synchronously)
+            index_batch_size: Index rows buffered before they are committed
+            index_flush_seconds: Longest index rows stay buffered while entries arrive
+        """
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.kind_field = kind_field
+        self.key_field = key_field
+        self.max_segment_bytes = int(max_segment_mb * 1024 * 1024)
+        self.writer = writer
+        self.index_batch_size = index_batch_size
+        self.index_flush_seconds = index_flush_seconds
+
+        self._segment_pattern = re.compile(rf"^{re.escape(prefix)}_(\d{{8}})(?:_(\d+))?\.jsonl$")
+        self._lock = threading.Lock()
+
+        self.index_path = self.log_dir / f"{prefix}_index.sqlite3"
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                ts TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                kind TEXT,
+                success INTEGER,
+                lookup_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_entries_ts ON entries (ts);
+            CREATE INDEX IF NOT EXISTS ix_entries_kind ON entries (kind, id);
+            CREATE INDEX IF NOT EXISTS ix_entries_failed ON entries (success, ts);
+            CREATE INDEX IF NOT EXISTS ix_entries_key ON entries (lookup_key);
+            CREATE TABLE IF NOT EXISTS segments (
+                segment TEXT PRIMARY KEY,
+                indexed_bytes INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                day TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                successful INTEGER NOT NULL,
+                rows_returned INTEGER NOT NULL,
+                execution_time_ms REAL NOT NULL,
+                PRIMARY KEY (day, kind)
+            );
+        """)
+        self._conn.commit()
+
+        self._segment: Optional[Path] = None
+        self._segment_day: Optional[str] = None
+        self._segment_size = 0
+
+        # Index rows of recent appends, committed in batches (and before any read)
+        self._pending_rows: List[Tuple] = []
+        self._pending_entries: List[Dict[str, Any]] = []
+        self._pending_segments: Dict[str, int] = {}
+        self._last_commit = time.monotonic()
+        # Writer failure counts already handled, per segment path
+        self._failures_seen: Dict[Path, int] = {}
+
+        self._drop_unwritten()
+        self._catch_up()
+        self._next_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0] + 1
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+
+    def _segment_order(self, path: Path) -> Optional[Tuple[str, int]]:
+        match = self._segment_pattern.match(path.name)
+        if not match:
+            return None
+        return match.group(1), int(match.group(2) or 0)
+
+    def _list_segments(self) -> List[Path]:
+        segments = []
+        for path in self.log_dir.glob(f"{self.prefix}_*.jsonl"):
+            order = self._segment_order(path)
+            if order is not None:
+                segments.append((order, path))
+        return [path for _, path in sorted(segments)]
+
+    def _segment_path(self, day: str, number: int) -> Path:
+        suffix = f"_{number}" if number else ""
+        return self.log_dir / f"{self.prefix}_{day}{suffix}.jsonl"
+
+    def _current_segment(self, incoming_bytes: int) -> Path:
+        """Segment to append to, rotating on a new day or when the size limit is reached."""
+        day = datetime.now().strftime("%Y%m%d")
+        if self._segment is None or self._segment_day != day:
+            # Continue the newest segment of the day (e.g. after a restart)
+            todays = [path for path in self._list_segments() if self._segment_order(path)[0] == day]
+            self._segment = todays[-1] if todays else self._segment_path(day, 0)
+            self._segment_day = day
+            self._segment_size = self._segment.stat().st_size if self._segment.exists() else 0
+
+        if self._segment_size and self._segment_size + incoming_bytes > self.max_segment_bytes:
+            _, number = self._segment_order(self._segment)
+            self._segment = self._segment_path(day, number + 1)
+            self._segment_size = 0
+            logger.info(f"Started log segment {self._segment.name}")
+
+        return self._segment
+
+    @property
+    def current_path(self) -> Path:
+        """Segment that the next entry will be written to."""
+        with self._lock:
+            return self._current_segment(0)
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _index_row(self, entry: Dict[str, Any], segment: str, offset: int, length: int) -> Tuple:
+        success = entry.get("success")
+        key = entry.get(self.key_field) if self.key_field else None
+        return (
+            str(entry.get("timestamp", "")),
+            segment,
+            offset,
+            length,
+            entry.get(self.kind_field, "unknown"),
+            None if success is None else int(bool(success)),
+            None if key is None else str(key)
+        )
+
+    @staticmethod
+    def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            entry = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def _row_key(self, entry: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+        """Indexed fields that identify an entry: ts, kind, success, lookup key."""
+        if entry is None:
+            return None
+        row = self._index_row(entry, "", 0, 0)
+        return (row[0], row[4], row[5], row[6])
+
+    def _add_to_totals(self, entries: List[Dict[str, Any]]) -> None:
+        totals: Dict[Tuple[str, str], List[float]] = {}
+        for entry in entries:
+            day = str(entry.get("timestamp", ""))[:10]
+            kind = str(entry.get(self.kind_field, "unknown"))
+            bucket = totals.setdefault((day, kind), [0, 0, 0, 0.0])
+            bucket[0] += 1
+            if entry.get("success"):
+                bucket[1] += 1
+                bucket[2] += entry.get("row_count", 0) or 0
+            bucket[3] += entry.get("execution_time_ms", 0) or 0
+
+        self._conn.executemany(
+            """
+            INSERT INTO daily_totals (day, kind, total, successful, rows_returned, execution_time_ms)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (day, kind) DO UPDATE SET
+                total = total + excluded.total,
+                successful = successful + excluded.successful,
+                rows_returned = rows_returned + excluded.rows_returned,
+                execution_time_ms = execution_time_ms + excluded.execution_time_ms
+            """,
+            [(day, kind, *values) for (day, kind), values in totals.items()]
+        )
+
+    def _drop_unwritten(self) -> None:
+        """
+        Remove index rows for lines that never reached their segment (queued
+        in the background writer when the process stopped).
+        """
+        for segment, indexed_bytes in self._conn.execute("SELECT segment, indexed_bytes FROM segments").fetchall():
+            path = self.log_dir / segment
+            size = path.stat().st_size if path.exists() else 0
+            if indexed_bytes <= size:
+                continue
+            removed = self._conn.execute(
+                "DELETE FROM entries WHERE segment = ? AND offset + length > ?", (segment, size)
+            ).rowcount
+            self._conn.execute("UPDATE segments SET indexed_bytes = ? WHERE segment = ?", (size, segment))
+            self._conn.commit()
+            logger.warning(f"Dropped {removed} index entries for unwritten lines of {segment}")
+
+    def _commit_pending(self) -> None:
+        """Commit buffered index rows (lock held)."""
+        if not self._pending_rows:
+            return
+        self._conn.executemany(
+            "INSERT INTO entries (id, ts, segment, offset, length, kind, success, lookup_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self._pending_rows
+        )
+        self._add_to_totals(self._pending_entries)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO segments (segment, indexed_bytes) VALUES (?, ?)",
+            list(self._pending_segments.items())
+        )
+        self._conn.commit()
+        self._pending_rows = []
+        self._pending_entries = []
+        self._pending_segments = {}
+        self._last_commit = time.monotonic()
+
+    def flush(self) -> None:
+        """Write queued lines to the segments and commit buffered index rows."""
+        if self.writer is not None:
+            self.writer.flush()
+        with self._lock:
+            self._commit_pending()
+            self._check_write_failures()
+
+    def _check_write_failures(self) -> None:
+        """Re-index segments the writer failed to write to since the last check (lock held)."""
+        if self.writer is None:
+            return
+        failed = [
+            path for path, count in self.writer.write_failures().items()
+            if path.parent == self.log_dir and self._segment_order(path) is not None
+            and count != self._failures_seen.get(path, 0)
+        ]
+        if not failed:
+            return
+
+        # Let every queued line land first so the segments stop changing
+        self.writer.flush()
+        self._commit_pending()
+        failures = self.writer.write_failures()
+        for path in failed:
+            self._failures_seen[path] = failures.get(path, 0)
+            self._reindex_segment(path)
+            if path == self._segment:
+                self._segment_size = path.stat().st_size if path.exists() else 0
+
+    def _reindex_segment(self, path: Path) -> None:
+        """
+        Re-index a segment from the first indexed line that is not on disk
+        where the index says (lock held, nothing pending).
+
+        Lines that are still on disk keep their index ids; entries whose line
+        was lost are dropped, and the daily totals of the affected days are
+        recomputed from what remains.
+        """
+        size = path.stat().st_size if path.exists() else 0
+        rows = self._conn.execute(
+            "SELECT id, ts, offset, length, kind, success, lookup_key FROM entries WHERE segment = ? ORDER BY offset",
+            (path.name,)
+        ).fetchall()
+
+        # First row that does not point at the start of its own line
+        first_bad = None
+        handle = open(path, "rb") if size else None
+        try:
+            for i, (_, ts, offset, length, kind, success, key) in enumerate(rows):
+                valid = handle is not None and offset + length <= size
+                if valid and offset:
+                    handle.seek(offset - 1)
+                    valid = handle.read(1) == b"\n"
+                if valid:
+                    handle.seek(offset)
+                    line = handle.readline()
+                    valid = len(line) == length and line.endswith(b"\n")
+                if valid:
+                    valid = self._row_key(self._parse_line(line)) == (ts, kind, success, key)
+                if not valid:
+                    first_bad = i
+                    break
+        finally:
+            if handle is not None:
+                handle.close()
+        if first_bad is None:
+            return
+
+        stale = rows[first_bad:]
+        position = stale[0][2]
+        self._conn.execute("DELETE FROM entries WHERE segment = ? AND offset >= ?", (path.name, position))
+
+        # Match the lines on disk, in order, to the stale rows they belonged to
+        new_rows: List[Tuple] = []
+        matched = 0
+        next_stale = 0
+        if size:
+            with open(path, "rb") as f:
+                f.seek(position)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    entry = self._parse_line(line)
+                    if entry is not None:
+                        row = self._index_row(entry, path.name, position, len(line))
+                        fields = self._row_key(entry)
+                        entry_id = None
+                        for k in range(next_stale, len(stale)):
+                            if tuple(stale[k][i] for i in (1, 4, 5, 6)) == fields:
+                                entry_id = stale[k][0]
+                                next_stale = k + 1
+                                matched += 1
+                                break
+                        if entry_id is None:
+                            entry_id = self._next_id
+                            self._next_id += 1
+                        new_rows.append((entry_id,) + row)
+                    position += len(line)
+
+        self._conn.executemany(
+            "INSERT INTO entries (id, ts, segment, offset, length, kind, success, lookup_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            new_rows
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO segments (segment, indexed_bytes) VALUES (?, ?)", (path.name, position)
+        )
+        for day in sorted({str(row[1])[:10] for row in stale}):
+            self._recompute_totals(day)
+        self._conn.commit()
+        logger.warning(
+            f"Re-indexed {path.name} after a failed write: {len(stale) - matched} entries lost, "
+            f"{matched} kept"
+        )
+
+    def _recompute_totals(self, day: str, batch_size: int = 5000) -> None:
+        """Rebuild one day's totals from the indexed lines (lock held; caller commits)."""
+        self._conn.execute("DELETE FROM daily_totals WHERE day = ?", (day,))
+        last_id = 0
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, segment, offset, length FROM entries WHERE ts LIKE ? AND id > ? ORDER BY id LIMIT ?",
+                (f"{day}%", last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            self._add_to_totals(self._read([row[1:] for row in rows]))
+            last_id = rows[-1][0]
+
+    def _catch_up(self, batch_size: int = 10000) -> None:
+        """Index lines appended to any segment beyond what the index has recorded."""
+        indexed = dict(self._conn.execute("SELECT segment, indexed_bytes FROM segments"))
+        added = 0
+
+        for path in self._list_segments():
+            size = path.stat().st_size
+            position = indexed.get(path.name, 0)
+            if position >= size:
+                continue
+
+            rows: List[Tuple] = []
+            entries: List[Dict[str, Any]] = []
+
+            def _flush():
+                self._conn.executemany(
+                    "INSERT INTO entries (ts, segment, offset, length, kind, success, lookup_key) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._add_to_totals(entries)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO segments (segment, indexed_bytes) VALUES (?, ?)",
+                    (path.name, position)
+                )
+                self._conn.commit()
+                rows.clear()
+                entries.clear()
+
+            with open(path, "rb") as f:
+                f.seek(position)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Partially written line; indexed once complete
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        entry = None
+                    if isinstance(entry, dict):
+                        rows.append(self._index_row(entry, path.name, position, len(line)))
+                        entries.append(entry)
+                    position += len(line)
+                    if len(rows) >= batch_size:
+                        added += len(rows)
+                        _flush()
+            added += len(rows)
+            _flush()
+
+        if added:
+            logger.info(f"Indexed {added} existing {self.prefix} log entries")
+
+    # ------------------------------------------------------------------
+    # Writing and reading
+    # ------------------------------------------------------------------
+
+    def append(self, entry: Dict[str, Any]) -> Optional[int]:
+        """
+        Append one entry to the current segment and index it.
+
+        Args:
+            entry: JSON-serializable dict with at least 'timestamp'
+
+        Returns:
+            Index id of the entry (increasing in log order), or None if the
+            background writer dropped it
+        """
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+
+        with self._lock:
+            self._check_write_failures()
+            segment = self._current_segment(len(line))
+            if self.writer is not None:
+                # This store is the only writer of its segments and the writer keeps
+                # per-file order, so the line lands at the tracked segment size
+                offset = self._segment_size
+                if not self.writer.write(segment, line):
+                    return None  # Dropped: nothing was written, so nothing is indexed
+            else:
+                with open(segment, "ab") as f:
+                    offset = f.tell()
+                    f.write(line)
+            self._segment_size = offset + len(line)
+
+            # Lines that reach disk but whose index rows are lost (crash before
+            # the commit) are re-indexed by _catch_up on the next start
+            entry_id = self._next_id
+            self._next_id += 1
+            self._pending_rows.append((entry_id,) + self._index_row(entry, segment.name, offset, len(line)))
+            self._pending_entries.append(entry)
+            self._pending_segments[segment.name] = self._segment_size
+            if (
+                len(self._pending_rows) >= self.index_batch_size
+                or time.monotonic() - self._last_commit >= self.index_flush_seconds
+            ):
+                self._commit_pending()
+            return entry_id
+
+    def _read(self, locations: List[Tuple[str, int, int]], keep_missing: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """
+        Read indexed lines (in the given order), keeping each segment open once.
+
+        Unreadable lines are skipped, or returned as None with keep_missing.
+        """
+        entries = []
+        handles = {}
+        try:
+            for segment, offset, length in locations:
+                handle = handles.get(segment)
+                if handle is None:
+                    try:
+                        handle = handles[segment] = open(self.log_dir / segment, "rb")
+                    except FileNotFoundError:
+                        handle = handles[segment] = None
+                if handle is None:
+                    if keep_missing:
+                        entries.append(None)
+                    continue
+                handle.seek(offset)
+                try:
+                    entries.append(json.loads(handle.read(length)))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    if keep_missing:
+                        entries.append(None)
+        finally:
+            for handle in handles.values():
+                if handle is not None:
+                    handle.close()
+        return entries
+
+    def recent(self, count: int = 20, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Most recent entries, oldest first.
+
+        Args:
+            count: Maximum number of entries
+            kind: Only entries of this kind
+        """
+        self.flush()
+        with self._lock:
+            if kind is None:
+                rows = self._conn.execute(
+                    "SELECT segment, offset, length FROM entries ORDER BY id DESC LIMIT ?", (count,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT segment, offset, length FROM entries WHERE kind = ? ORDER BY id DESC LIMIT ?", (kind, count)
+                ).fetchall()
+        return self._read(rows[::-1])
+
+    def failures_since(self, since: datetime, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Failed entries logged after a time, oldest first.
+
+        Args:
+            since: Only entries with a later timestamp
+            limit: Maximum number of entries (the most recent are kept)
+        """
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT segment, offset, length FROM entries WHERE success = 0 AND ts > ? ORDER BY id DESC LIMIT ?",
+                (since.isoformat(), limit)
+            ).fetchall()
+        return self._read(rows[::-1])
+
+    def find(self, key: str) -> List[Dict[str, Any]]:
+        """All entries whose key field equals key, in log order."""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT segment, offset, length FROM entries WHERE lookup_key = ? ORDER BY id", (str(key),)
+            ).fetchall()
+        return self._read(rows)
+
+    def last_id(self) -> int:
+        """Index id of the newest entry (0 if empty)."""
+        with self._lock:
+            return self._next_id - 1
+
+    def iter_since(self, entry_id: int, batch_size: int = 5000) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield (id, entry) for every entry after entry_id, in log order.
+
+        Args:
+            entry_id: Last id already processed (0 for all)
+            batch_size: Index rows fetched per batch
+        """
+        self.flush()
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, segment, offset, length FROM entries WHERE id > ? ORDER BY id LIMIT ?",
+                    (entry_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            ids = [row[0] for row in rows]
+            for row_id, entry in zip(ids, self._read([row[1:] for row in rows], keep_missing=True)):
+                if entry is not None:
+                    yield row_id, entry
+            entry_id = ids[-1]
+
+    def daily_totals(self, day: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Per-kind totals for a day.
+
+        Args:
+            day: YYYY-MM-DD (defaults to today)
+
+        Returns:
+            kind -> {"total", "successful", "rows_returned", "execution_time_ms"}
+        """
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            self._commit_pending()
+            rows = self._conn.execute(
+                "SELECT kind, total, successful, rows_returned, execution_time_ms FROM daily_totals WHERE day = ?",
+                (day,)
+            ).fetchall()
+        return {
+            kind: {"total": total, "successful": successful, "rows_returned": rows_returned, "execution_time_ms": time_ms}
+            for kind, total, successful, rows_returned, time_ms in rows
+        }
+
+    def close(self) -> None:
+        """Commit buffered index rows and close the index connection."""
+        if self.writer is not None:
+            self.writer.flush()
+        with self._lock:
+            self._commit_pending()
+            self._conn.close()
@@ -0,0 +1,134 @@
+"""
+JSONL Tail Reader
+
+Reads the last entries of an append-only JSON-lines log by seeking
+backwards from the end of the file, so "recent" lookups cost in proportion
+to the entries returned rather than to the size of the log.
+
+- Lines are read in fixed-size blocks from EOF (or located with rfind on a
+  read-only memory map) and yielded newest first.
+- Field filters are applied while scanning: a line is only parsed if the
+  JSON-encoded value occurs in its raw bytes, and the scan stops as soon as
+  enough matching entries are found. A filter on a rare value still has to
+  walk back until it finds them.
+- A partial last line (a write in progress) or an unreadable line is skipped.
+"""
+
+import json
+import logging
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines_reversed(path: Path, block_size: int = DEFAULT_BLOCK_SIZE, use_mmap: bool = False) -> Iterator[bytes]:
+    """
+    Yield the non-empty lines of a file from last to first.
+
+    Args:
+        path: File to read
+        block_size: Bytes read per backwards seek
+        use_mmap: Locate lines in a read-only memory map instead of reading blocks
+
+    Yields:
+        Raw lines without the trailing newline
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+
+        if use_mmap:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                end = size
+                while end > 0:
+                    start = mapped.rfind(b"\n", 0, end) + 1
+                    if start < end:
+                        yield mapped[start:end]
+                    end = start - 1
+            return
+
+        position = size
+        # Pieces of the line that spans the current block boundary, newest first
+        carry: List[bytes] = []
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+            if b"\n" not in block and position > 0:
+                # Entirely inside one long line; join once its start is found
+                carry.append(block)
+                continue
+
+            lines = block.split(b"\n")
+            if carry:
+                lines[-1] = lines[-1] + b"".join(reversed(carry))
+                carry = []
+            if position > 0:
+                # The first piece may continue in the previous block
+                carry.append(lines.pop(0))
+            for line in reversed(lines):
+                if line:
+                    yield line
+
+        if carry:
+            line = b"".join(reversed(carry))
+            if line:
+                yield line
+
+
+def tail_jsonl(
+    path: Path,
+    count: int,
+    filters: Optional[Dict[str, Any]] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    use_mmap: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Last entries of a JSON-lines log, oldest first.
+
+    Args:
+        path: Log file (a missing file returns no entries)
+        count: Maximum number of entries
+        filters: Only entries whose fields equal these values (None values are ignored)
+        block_size: Bytes read per backwards seek
+        use_mmap: Use a memory map instead of block reads
+
+    Returns:
+        List of parsed entries
+    """
+    path = Path(path)
+    if count <= 0 or not path.exists():
+        return []
+
+    filters = {field: value for field, value in (filters or {}).items() if value is not None}
+    # Cheap byte test before parsing; entries are written with json.dumps defaults
+    needles = [json.dumps(value).encode("utf-8") for value in filters.values()]
+
+    entries: List[Dict[str, Any]] = []
+    try:
+        for line in iter_lines_reversed(path, block_size=block_size, use_mmap=use_mmap):
+            if any(needle not in line for needle in needles):
+                continue
+            try:
+                entry = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if not isinstance(entry, dict):
+                continue
+            if any(entry.get(field) != value for field, value in filters.items()):
+                continue
+            entries.append(entry)
+            if len(entries) >= count:
+                break
+    except Exception as e:
+        logger.error(f"Error reading {path}: {e}")
+
+    entries.reverse()
+    return entries
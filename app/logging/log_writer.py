@@ -0,0 +1,331 @@
+"""
+Buffered Background Log Writer
+
+Shared sink for the JSONL logs (audit, analysis, query, evaluation and
+error logs). Callers enqueue encoded lines and return immediately; one
+background thread writes them in batches, keeping files open between
+batches, flushing each batch to the OS and fsyncing periodically.
+
+- The queue is bounded. When it is full a caller waits up to
+  max_block_seconds, then the line is dropped; waits and drops are counted.
+- Lines for the same file are written in the order they were enqueued, so
+  a caller that tracks the file size can know a line's offset in advance.
+  Failed writes are counted per file (write_failures()), so such a caller
+  can tell when a batch for its file never reached disk and re-read the size.
+- flush() waits until everything enqueued before it is written (used by
+  readers of the logs); close() drains the queue and stops the thread.
+  After close() starts, new lines are written synchronously; lines already
+  being enqueued are let in ahead of the stop marker, so none are lost.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BufferedLogWriter:
+    """Bounded queue of log lines drained by one writer thread."""
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 0.2,
+        fsync_interval_seconds: float = 1.0,
+        max_block_seconds: float = 5.0,
+        idle_close_seconds: float = 60.0
+    ):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            max_queue: Lines held in memory before callers have to wait
+            batch_size: Maximum lines written per batch
+            flush_interval_seconds: Longest a line waits before its batch is written
+            fsync_interval_seconds: Minimum time between fsyncs of written files
+            max_block_seconds: Longest a caller waits on a full queue before the line is dropped
+            idle_close_seconds: Files not written for this long are closed
+        """
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.max_block_seconds = max_block_seconds
+        self.idle_close_seconds = idle_close_seconds
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._files: Dict[Path, Tuple[Any, float]] = {}
+        self._dirty: set = set()
+        self._last_fsync = time.monotonic()
+        self._closed = False
+        # Guards _closed and the count of write() calls currently enqueueing
+        self._state = threading.Condition()
+        self._enqueuing = 0
+        self._sync_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._blocked = 0
+        self._blocked_seconds = 0.0
+        self._batches = 0
+        self._fsyncs = 0
+        self._errors = 0
+        self._max_depth = 0
+        # Failed writes per file, for callers that track file sizes
+        self._failures: Dict[Path, int] = {}
+
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def write(self, path: Path, data: bytes) -> bool:
+        """
+        Enqueue data to be appended to a file.
+
+        Args:
+            path: File to append to (parent directories are created)
+            data: Encoded line(s), including the trailing newline
+
+        Returns:
+            False if the line was dropped because the queue stayed full (or,
+            after close(), the synchronous write failed)
+        """
+        path = Path(path)
+        with self._state:
+            closed = self._closed
+            if not closed:
+                self._enqueuing += 1
+        if closed:
+            return self._write_now(path, data)
+
+        try:
+            return self._enqueue((path, data))
+        finally:
+            with self._state:
+                self._enqueuing -= 1
+                self._state.notify_all()
+
+    def _enqueue(self, item: Tuple[Path, bytes]) -> bool:
+        """Put a line on the queue, waiting up to max_block_seconds when it is full."""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            started = time.monotonic()
+            try:
+                self._queue.put(item, timeout=self.max_block_seconds)
+            except queue.Full:
+                with self._stats_lock:
+                    self._blocked += 1
+                    self._blocked_seconds += time.monotonic() - started
+                    self._dropped += 1
+                logger.warning(f"Log queue full; dropped a line for {item[0].name}")
+                return False
+            with self._stats_lock:
+                self._blocked += 1
+                self._blocked_seconds += time.monotonic() - started
+
+        with self._stats_lock:
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until every line enqueued before this call has been written.
+
+        Returns:
+            False if the writer did not catch up within timeout
+        """
+        if self._closed:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        if not self._thread.is_alive():
+            return True
+        marker = threading.Event()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write everything still queued, fsync and stop the writer thread."""
+        with self._state:
+            if self._closed:
+                return
+            # Later writes go straight to disk; wait for those already enqueueing
+            # so nothing lands behind the stop marker
+            self._closed = True
+            if not self._state.wait_for(lambda: self._enqueuing == 0, timeout):
+                logger.error("Log writes still enqueueing at shutdown; their lines may be lost")
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Log queue still full at shutdown; remaining lines may be lost")
+        self._thread.join(timeout)
+        logger.info(f"Log writer closed ({self._written} lines written, {self._dropped} dropped)")
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def write_failures(self) -> Dict[Path, int]:
+        """Number of failed writes so far, per file (files never failed are absent)."""
+        with self._stats_lock:
+            return dict(self._failures)
+
+    def _record_failure(self, path: Path) -> None:
+        with self._stats_lock:
+            self._errors += 1
+            self._failures[path] = self._failures.get(path, 0) + 1
+
+    def _write_now(self, path: Path, data: bytes) -> bool:
+        """Synchronous append, used after close(). Returns False if it failed."""
+        # Lines still being drained go first, keeping per-file order
+        self._thread.join(self.max_block_seconds)
+        try:
+            with self._sync_lock:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "ab") as f:
+                    f.write(data)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write log {path}: {e}")
+            self._record_failure(path)
+            return False
+
+    def _handle(self, path: Path, now: float):
+        entry = self._files.get(path)
+        if entry is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(path, "ab")
+        else:
+            handle = entry[0]
+        self._files[path] = (handle, now)
+        return handle
+
+    def _write_batch(self, lines: List[Tuple[Path, bytes]]) -> None:
+        """Append lines grouped by file, preserving per-file order."""
+        if not lines:
+            return
+        grouped: Dict[Path, List[bytes]] = {}
+        for path, data in lines:
+            grouped.setdefault(path, []).append(data)
+
+        now = time.monotonic()
+        written = 0
+        for path, chunks in grouped.items():
+            try:
+                handle = self._handle(path, now)
+                handle.write(b"".join(chunks))
+                handle.flush()
+                self._dirty.add(path)
+                written += len(chunks)
+            except Exception as e:
+                logger.error(f"Failed to write {len(chunks)} lines to {path}: {e}")
+                self._record_failure(path)
+                self._close_file(path)
+
+        with self._stats_lock:
+            self._written += written
+            self._batches += 1
+
+    def _close_file(self, path: Path) -> None:
+        entry = self._files.pop(path, None)
+        self._dirty.discard(path)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+
+    def _fsync(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_fsync < self.fsync_interval_seconds:
+            return
+        for path in list(self._dirty):
+            entry = self._files.get(path)
+            if entry is None:
+                continue
+            try:
+                os.fsync(entry[0].fileno())
+            except Exception as e:
+                logger.error(f"Failed to fsync {path}: {e}")
+                with self._stats_lock:
+                    self._errors += 1
+        if self._dirty:
+            with self._stats_lock:
+                self._fsyncs += 1
+        self._dirty.clear()
+        self._last_fsync = now
+
+        # Release files that are no longer written (e.g. yesterday's segments)
+        for path, (_, last_used) in list(self._files.items()):
+            if now - last_used > self.idle_close_seconds:
+                self._close_file(path)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval_seconds)]
+            except queue.Empty:
+                items = []
+            while items and len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: List[Tuple[Path, bytes]] = []
+            for item in items:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    # Everything before the marker must be on disk (OS buffers) first
+                    self._write_batch(lines)
+                    lines = []
+                    item.set()
+                else:
+                    lines.append(item)
+            self._write_batch(lines)
+            self._fsync(force=stopping)
+
+        for path in list(self._files):
+            self._close_file(path)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get writer counters.
+
+        Returns:
+            Dictionary with queue depth, lines written/dropped and backpressure waits
+        """
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_depth,
+                "queue_capacity": self._queue.maxsize,
+                "submitted": self._submitted,
+                "written": self._written,
+                "dropped": self._dropped,
+                "blocked": self._blocked,
+                "blocked_seconds": round(self._blocked_seconds, 3),
+                "batches": self._batches,
+                "fsyncs": self._fsyncs,
+                "errors": self._errors,
+                "open_files": len(self._files),
+                "closed": self._closed
+            }
@@ -4,28 +4,98 @@ Query Logger for Inpatient Documentation and Coding Evaluation
 Tracks all database queries, parameters, results, and AI evaluation steps.
 """
 
-import json
 import logging
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .log_store import LogStore
+from .log_writer import BufferedLogWriter
+from .running_stats import RunningStatistics
+
 
 class QueryLogger:
     """Comprehensive query and evaluation logger."""
 
-    def __init__(self, log_dir: str = "logs"):
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        max_segment_mb: float = 64,
+        writer: Optional[BufferedLogWriter] = None
+    ):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Setup file handler for query logs
-        self.query_log_file = self.log_dir / f"queries_{datetime.now().strftime('%Y%m%d')}.jsonl"
-        self.eval_log_file = self.log_dir / f"evaluations_{datetime.now().strftime('%Y%m%d')}.jsonl"
-        
+
+        # Rotating JSONL segments (queries_YYYYMMDD*.jsonl, evaluations_YYYYMMDD*.jsonl)
+        # with SQLite sidecar indexes for the read endpoints
+        self.query_store = LogStore(
+            self.log_dir, "queries", kind_field="query_type", max_segment_mb=max_segment_mb, writer=writer
+        )
+        self.eval_store = LogStore(
+            self.log_dir, "evaluations", kind_field="step_type", key_field="evaluation_id",
+            max_segment_mb=max_segment_mb, writer=writer
+        )
+
         # Setup Python logger
         self.logger = logging.getLogger("QueryLogger")
         self.logger.setLevel(logging.INFO)
 
+        # All-time aggregates updated on every write; checkpointed with the last
+        # index id they cover, so startup only replays newer entries
+        self._write_lock = threading.Lock()
+        self.query_stats = RunningStatistics(self.log_dir / "queries_stats_checkpoint.json")
+        self.eval_stats = RunningStatistics(self.log_dir / "evaluations_stats_checkpoint.json")
+        self._replay(self.query_store, self.query_stats, self._record_query_stats)
+        self._replay(self.eval_store, self.eval_stats, self._record_eval_stats)
+
+    @staticmethod
+    def _record_query_stats(stats: RunningStatistics, entry: Dict[str, Any], entry_id: Optional[int]) -> None:
+        stats.record(
+            kind=entry.get("query_type", "unknown"),
+            username=entry.get("username"),
+            success=bool(entry.get("success")),
+            duration_ms=entry.get("execution_time_ms"),
+            rows=entry.get("row_count", 0) or 0,
+            position=entry_id
+        )
+
+    @staticmethod
+    def _record_eval_stats(stats: RunningStatistics, entry: Dict[str, Any], entry_id: Optional[int]) -> None:
+        stats.record(
+            kind=entry.get("step_type", "unknown"),
+            username=entry.get("username"),
+            success=bool(entry.get("success")),
+            duration_ms=entry.get("execution_time_ms"),
+            patient_id=entry.get("patient_id"),
+            position=entry_id
+        )
+
+    def _replay(self, store: LogStore, stats: RunningStatistics, record) -> None:
+        """Bring running statistics up to date with entries indexed after their checkpoint."""
+        last_id = store.last_id()
+        if stats.position is None or stats.position > last_id:
+            # No checkpoint, or the index was rebuilt; recount everything
+            stats.reset()
+        replayed = 0
+        for entry_id, entry in store.iter_since(stats.position or 0):
+            record(stats, entry, entry_id)
+            replayed += 1
+        stats.position = last_id
+        stats.checkpoint()
+        if replayed:
+            self.logger.info(f"Replayed {replayed} {store.prefix} log entries into running statistics")
+
+    @property
+    def query_log_file(self) -> Path:
+        """Query log segment currently being written."""
+        return self.query_store.current_path
+
+    @property
+    def eval_log_file(self) -> Path:
+        """Evaluation log segment currently being written."""
+        return self.eval_store.current_path
+
     def log_query(
         self,
         query_type: str,
@@ -76,9 +146,10 @@ class QueryLogger:
             "results_sample": sanitized_results
         }
 
-        # Write to JSONL file
-        with open(self.query_log_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_entry, default=str) + '\n')
+        # Write to the indexed JSONL log
+        with self._write_lock:
+            entry_id = self.query_store.append(log_entry)
+            self._record_query_stats(self.query_stats, log_entry, entry_id)
 
         # Also log to Python logger
         if success:
@@ -116,9 +187,10 @@ class QueryLogger:
             "error": error
         }
 
-        # Write to JSONL file
-        with open(self.eval_log_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_entry, default=str) + '\n')
+        # Write to the indexed JSONL log
+        with self._write_lock:
+            entry_id = self.eval_store.append(log_entry)
+            self._record_eval_stats(self.eval_stats, log_entry, entry_id)
 
         # Also log to Python logger
         if success:
@@ -148,93 +220,53 @@ class QueryLogger:
 
     def get_recent_queries(self, count: int = 20, query_type: Optional[str] = None) -> List[Dict]:
         """Get recent query logs."""
-        if not self.query_log_file.exists():
-            return []
-
-        logs = []
-        with open(self.query_log_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    log = json.loads(line)
-                    if query_type is None or log.get("query_type") == query_type:
-                        logs.append(log)
-                except json.JSONDecodeError:
-                    continue
-
-        return logs[-count:]
+        return self.query_store.recent(count=count, kind=query_type)
 
     def get_evaluation_log(self, evaluation_id: str) -> List[Dict]:
         """Get all steps for a specific evaluation."""
-        if not self.eval_log_file.exists():
-            return []
-
-        logs = []
-        with open(self.eval_log_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    log = json.loads(line)
-                    if log.get("evaluation_id") == evaluation_id:
-                        logs.append(log)
-                except json.JSONDecodeError:
-                    continue
-
-        return logs
+        return self.eval_store.find(evaluation_id)
 
     def get_failed_queries(self, hours: int = 24) -> List[Dict]:
         """Get failed queries from the last N hours."""
-        if not self.query_log_file.exists():
-            return []
-
-        from datetime import timedelta
         cutoff = datetime.now() - timedelta(hours=hours)
-
-        failed = []
-        with open(self.query_log_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    log = json.loads(line)
-                    log_time = datetime.fromisoformat(log["timestamp"])
-                    if not log.get("success") and log_time > cutoff:
-                        failed.append(log)
-                except (json.JSONDecodeError, KeyError):
-                    continue
-
-        return failed
+        return self.query_store.failures_since(cutoff)
 
     def get_query_statistics(self) -> Dict[str, Any]:
-        """Get statistics about queries."""
-        if not self.query_log_file.exists():
-            return {"total_queries": 0}
-
-        total = 0
-        successful = 0
-        failed = 0
-        total_time = 0
-        total_rows = 0
-        by_type = {}
-
-        with open(self.query_log_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    log = json.loads(line)
-                    total += 1
-                    if log.get("success"):
-                        successful += 1
-                        total_rows += log.get("row_count", 0)
-                    else:
-                        failed += 1
-                    total_time += log.get("execution_time_ms", 0)
-
-                    qtype = log.get("query_type", "unknown")
-                    by_type[qtype] = by_type.get(qtype, 0) + 1
-                except json.JSONDecodeError:
-                    continue
+        """Get statistics about today's queries."""
+        totals = self.query_store.daily_totals()
+        if not totals:
+            return {"total_queries": 0, "all_time": self.query_stats.snapshot()}
+
+        total = sum(t["total"] for t in totals.values())
+        successful = sum(t["successful"] for t in totals.values())
+        total_time = sum(t["execution_time_ms"] for t in totals.values())
 
         return {
             "total_queries": total,
             "successful": successful,
-            "failed": failed,
-            "total_rows_returned": total_rows,
+            "failed": total - successful,
+            "total_rows_returned": sum(t["rows_returned"] for t in totals.values()),
             "avg_execution_time_ms": round(total_time / total, 2) if total > 0 else 0,
-            "queries_by_type": by_type
+            "queries_by_type": {kind: t["total"] for kind, t in totals.items()},
+            "all_time": self.query_stats.snapshot()
         }
+
+    def get_evaluation_statistics(self) -> Dict[str, Any]:
+        """Get all-time evaluation step statistics (distinct patients are estimated)."""
+        return self.eval_stats.snapshot()
+
+    def checkpoint(self) -> None:
+        """Persist buffered index rows and the running statistics (called at shutdown)."""
+        self.query_store.flush()
+        self.eval_store.flush()
+        with self._write_lock:
+            self.query_stats.checkpoint()
+            self.eval_stats.checkpoint()
+
+    def close(self) -> None:
+        """Checkpoint the running statistics and close the log indexes."""
+        with self._write_lock:
+            self.query_stats.checkpoint()
+            self.eval_stats.checkpoint()
+        self.query_store.close()
+        self.eval_store.close()
@@ -0,0 +1,340 @@
+"""
+Running Log Statistics
+
+Aggregates maintained as log entries are written, so statistics endpoints
+read a handful of counters instead of rescanning the logs:
+
+- counts by type, success/failure and user
+- execution-time histograms (overall and per type)
+- an approximate distinct-patient count (HyperLogLog, ~1% error in 16 KB)
+
+The aggregates are checkpointed to a small JSON file together with the log
+position they cover. On restart the checkpoint is loaded and only entries
+written after that position are replayed. Periodic checkpoints are taken as
+a snapshot under the lock and written by a background thread, so the
+threads logging entries never wait on the file; checkpoint() writes
+synchronously (used at startup and shutdown).
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+# Upper bounds (ms) of the execution-time histogram buckets; larger values go in the last bucket
+DURATION_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000]
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over string values."""
+
+    def __init__(self, precision: int = 14, registers: Optional[bytearray] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            precision: log2 of the register count (14 -> 16384 registers, ~0.8% standard error)
+            registers: Existing registers (from to_dict)
+        """
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+        self._estimate: Optional[int] = None
+
+    def add(self, value: Any) -> None:
+        """Add a value (compared by its string form)."""
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remainder = (hashed << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = min(64 - remainder.bit_length() + 1, 64 - self.precision + 1)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._estimate = None
+
+    def count(self) -> int:
+        """Estimated number of distinct values added."""
+        if self._estimate is None:
+            alpha = 0.7213 / (1 + 1.079 / self.size)
+            estimate = alpha * self.size * self.size / sum(2.0 ** -r for r in self.registers)
+            zeros = self.registers.count(0)
+            if estimate <= 2.5 * self.size and zeros:
+                # Small-range correction (linear counting)
+                estimate = self.size * math.log(self.size / zeros)
+            self._estimate = int(round(estimate))
+        return self._estimate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision, "registers": base64.b64encode(bytes(self.registers)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        return cls(precision=data["precision"], registers=bytearray(base64.b64decode(data["registers"])))
+
+
+class DurationHistogram:
+    """Fixed-bucket execution-time histogram."""
+
+    def __init__(self, counts: Optional[List[int]] = None, total_ms: float = 0.0, max_ms: float = 0.0):
+        self.counts = counts if counts is not None else [0] * (len(DURATION_BUCKETS_MS) + 1)
+        self.total_ms = total_ms
+        self.max_ms = max_ms
+
+    def add(self, duration_ms: float) -> None:
+        position = len(DURATION_BUCKETS_MS)
+        for index, bound in enumerate(DURATION_BUCKETS_MS):
+            if duration_ms <= bound:
+                position = index
+                break
+        self.counts[position] += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def _percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of values."""
+        count = sum(self.counts)
+        if not count:
+            return None
+        threshold = fraction * count
+        running = 0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= threshold:
+                return float(DURATION_BUCKETS_MS[index]) if index < len(DURATION_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        labels = [f"<={bound}" for bound in DURATION_BUCKETS_MS] + [f">{DURATION_BUCKETS_MS[-1]}"]
+        return {
+            "count": count,
+            "mean_ms": round(self.total_ms / count, 2) if count else 0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self._percentile(0.5),
+            "p95_ms": self._percentile(0.95),
+            "buckets": {label: value for label, value in zip(labels, self.counts) if value}
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "total_ms": self.total_ms, "max_ms": self.max_ms}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DurationHistogram":
+        counts = list(data["counts"])
+        if len(counts) != len(DURATION_BUCKETS_MS) + 1:
+            raise ValueError("Histogram bucket layout changed")
+        return cls(counts=counts, total_ms=data["total_ms"], max_ms=data["max_ms"])
+
+
+class RunningStatistics:
+    """Write-time aggregates for one log, checkpointed with the log position they cover."""
+
+    def __init__(
+        self,
+        checkpoint_path: Path,
+        checkpoint_every: int = 200,
+        checkpoint_interval_seconds: float = 60
+    ):
+        """
+        Initialize the aggregates, loading the checkpoint if there is one.
+
+        Args:
+            checkpoint_path: JSON checkpoint file
+            checkpoint_every: Records between checkpoints
+            checkpoint_interval_seconds: Maximum time between checkpoints while records arrive
+        """
+        self.checkpoint_path = Path(checkpoint_path)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval_seconds = checkpoint_interval_seconds
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
+        # Snapshots are numbered so an older one never overwrites a newer file
+        self._snapshot_seq = 0
+        self._saved_seq = 0
+        self._save_lock = threading.Lock()
+        # Latest snapshot waiting for the background writer (older ones are superseded)
+        self._queued: Optional[Tuple[int, Dict[str, Any]]] = None
+        self._queued_cond = threading.Condition()
+        self._writer_thread: Optional[threading.Thread] = None
+
+        self.reset()
+        if self.checkpoint_path.exists():
+            try:
+                self._restore(json.loads(self.checkpoint_path.read_text(encoding="utf-8")))
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable statistics checkpoint {self.checkpoint_path}: {e}")
+                self.reset()
+
+    def reset(self) -> None:
+        """Clear all aggregates (the caller replays the log from the start)."""
+        self.position: Any = None
+        self.since = datetime.now().isoformat()
+        self.total = 0
+        self.successful = 0
+        self.by_type: Dict[str, Dict[str, int]] = {}
+        self.by_user: Dict[str, int] = {}
+        self.rows_returned = 0
+        self.durations = DurationHistogram()
+        self.durations_by_type: Dict[str, DurationHistogram] = {}
+        self.patients = HyperLogLog()
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported version {data.get('version')}")
+        self.position = data["position"]
+        self.since = data["since"]
+        self.total = data["total"]
+        self.successful = data["successful"]
+        self.by_type = data["by_type"]
+        self.by_user = data["by_user"]
+        self.rows_returned = data["rows_returned"]
+        self.durations = DurationHistogram.from_dict(data["durations"])
+        self.durations_by_type = {
+            kind: DurationHistogram.from_dict(histogram) for kind, histogram in data["durations_by_type"].items()
+        }
+        self.patients = HyperLogLog.from_dict(data["patients"])
+
+    def record(
+        self,
+        kind: str,
+        username: Optional[str],
+        success: bool,
+        duration_ms: Optional[float] = None,
+        patient_id: Optional[str] = None,
+        rows: int = 0,
+        position: Any = None
+    ) -> None:
+        """
+        Add one log entry to the aggregates.
+
+        Args:
+            kind: Event/query/step type
+            username: User who triggered the entry
+            success: Whether it succeeded
+            duration_ms: Execution time, if the entry has one
+            patient_id: Patient the entry concerns, if any
+            rows: Rows returned (counted for successful entries)
+            position: Log position just after this entry
+        """
+        kind = kind or "UNKNOWN"
+        with self._lock:
+            self.total += 1
+            counts = self.by_type.setdefault(kind, {"total": 0, "failed": 0})
+            counts["total"] += 1
+            if success:
+                self.successful += 1
+                self.rows_returned += rows or 0
+            else:
+                counts["failed"] += 1
+            user = username or "UNKNOWN"
+            self.by_user[user] = self.by_user.get(user, 0) + 1
+            if duration_ms is not None:
+                self.durations.add(duration_ms)
+                self.durations_by_type.setdefault(kind, DurationHistogram()).add(duration_ms)
+            if patient_id:
+                self.patients.add(patient_id)
+            if position is not None:
+                self.position = position
+
+            self._pending += 1
+            snapshot = None
+            if (
+                self._pending >= self.checkpoint_every
+                or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval_seconds
+            ):
+                snapshot = self._snapshot_locked()
+        if snapshot is not None:
+            self._checkpoint_in_background(snapshot)
+
+    def _snapshot_locked(self) -> Tuple[int, Dict[str, Any]]:
+        """Copy the aggregates for a checkpoint (lock held)."""
+        self._snapshot_seq += 1
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+        return self._snapshot_seq, {
+            "version": CHECKPOINT_VERSION,
+            "position": self.position,
+            "since": self.since,
+            "saved_at": datetime.now().isoformat(),
+            "total": self.total,
+            "successful": self.successful,
+            "by_type": {kind: dict(counts) for kind, counts in self.by_type.items()},
+            "by_user": dict(self.by_user),
+            "rows_returned": self.rows_returned,
+            "durations": self.durations.to_dict(),
+            "durations_by_type": {kind: histogram.to_dict() for kind, histogram in self.durations_by_type.items()},
+            "patients": self.patients.to_dict()
+        }
+
+    def _write_snapshot(self, snapshot: Tuple[int, Dict[str, Any]]) -> None:
+        """Atomically replace the checkpoint file, unless a newer snapshot is already saved."""
+        seq, data = snapshot
+        with self._save_lock:
+            if seq <= self._saved_seq:
+                return
+            try:
+                temp_path = self.checkpoint_path.with_suffix(".tmp")
+                temp_path.write_text(json.dumps(data), encoding="utf-8")
+                os.replace(temp_path, self.checkpoint_path)
+                self._saved_seq = seq
+            except Exception as e:
+                logger.warning(f"Failed to write statistics checkpoint {self.checkpoint_path}: {e}")
+
+    def _checkpoint_in_background(self, snapshot: Tuple[int, Dict[str, Any]]) -> None:
+        """Hand a snapshot to the checkpoint thread (started on first use)."""
+        with self._queued_cond:
+            self._queued = snapshot
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(
+                    target=self._run_writer, name=f"stats-checkpoint-{self.checkpoint_path.stem}", daemon=True
+                )
+                self._writer_thread.start()
+            self._queued_cond.notify()
+
+    def _run_writer(self) -> None:
+        while True:
+            with self._queued_cond:
+                self._queued_cond.wait_for(lambda: self._queued is not None)
+                snapshot, self._queued = self._queued, None
+            self._write_snapshot(snapshot)
+
+    def checkpoint(self) -> None:
+        """Write the aggregates and their log position atomically, on this thread."""
+        with self._lock:
+            snapshot = self._snapshot_locked()
+        self._write_snapshot(snapshot)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current aggregates.
+
+        Returns:
+            Dictionary with totals, counts by type and user, execution-time
+            histograms and the approximate distinct patient count
+        """
+        with self._lock:
+            return {
+                "since": self.since,
+                "total": self.total,
+                "successful": self.successful,
+                "failed": self.total - self.successful,
+                "by_type": {kind: counts["total"] for kind, counts in self.by_type.items()},
+                "failed_by_type": {kind: counts["failed"] for kind, counts in self.by_type.items() if counts["failed"]},
+                "by_user": dict(self.by_user),
+                "rows_returned": self.rows_returned,
+                "execution_time": self.durations.summary(),
+                "execution_time_by_type": {kind: histogram.summary() for kind, histogram in self.durations_by_type.items()},
+                "distinct_patients_approx": self.patients.count()
+            }
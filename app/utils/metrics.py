@@ -0,0 +1,370 @@
+"""
+In-Process Metrics
+
+Counters and latency histograms for the review pipeline, exposed in the
+Prometheus text format at /metrics and summarized (count, mean, p50/p95/p99)
+in /api/diagnostics.
+
+- Counter: monotonically increasing total, optionally split by labels.
+- Histogram: fixed buckets plus sum and count per label set; percentiles are
+  interpolated within the bucket that holds them (as histogram_quantile does).
+- Gauge callbacks: read at scrape time from existing get_statistics() style
+  sources (pool occupancy, queue depth), so nothing is tracked twice.
+
+The metrics used by the app are declared at the bottom of this module and
+imported where they are recorded.
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Review stages run from milliseconds (cached lookups) to minutes (LLM calls on long stays)
+STAGE_BUCKETS_SECONDS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300, 600
+)
+WAIT_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Number in Prometheus text format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(text: str, quote: bool = False) -> str:
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value, quote=True)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    """Common label handling for counters and histograms."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: LabelKey) -> str:
+        return ",".join(f"{name}={value}" for name, value in zip(self.labelnames, key)) or "all"
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """
+        Add to the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Value for each of the counter's label names
+        """
+        if amount < 0:
+            raise ValueError(f"{self.name} can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Current total for one label set."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {self._label_text(key): value for key, value in sorted(self._values.items())}
+
+
+class _HistogramSeries:
+    """Bucket counts of one label set (non-cumulative; the last slot is +Inf)."""
+
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * (bucket_count + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+
+class Histogram(_Metric):
+    """Fixed-bucket distribution with sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = STAGE_BUCKETS_SECONDS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value (seconds for the latency histograms)
+            **labels: Value for each of the histogram's label names
+        """
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            series.counts[position] += 1
+            series.total += value
+            series.count += 1
+            series.max = max(series.max, value)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of a with-block in seconds (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _quantile(self, series: _HistogramSeries, fraction: float) -> Optional[float]:
+        if not series.count:
+            return None
+        rank = fraction * series.count
+        cumulative = 0
+        for index, bucket_count in enumerate(series.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else series.max
+                upper = min(upper, series.max)
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return series.max
+
+    def quantile(self, fraction: float, **labels: Any) -> Optional[float]:
+        """
+        Estimated quantile for one label set.
+
+        Args:
+            fraction: Quantile between 0 and 1 (e.g. 0.95)
+
+        Returns:
+            Estimate interpolated within its bucket, or None with no observations
+        """
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            return self._quantile(series, fraction) if series else None
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            snapshot = [(key, list(series.counts), series.total, series.count) for key, series in sorted(self._series.items())]
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for key, series in sorted(self._series.items()):
+                percentiles = {f"p{int(q * 100)}": self._quantile(series, q) for q in (0.5, 0.95, 0.99)}
+                result[self._label_text(key)] = {
+                    "count": series.count,
+                    "mean": round(series.total / series.count, 4) if series.count else 0.0,
+                    **{name: round(value, 4) for name, value in percentiles.items() if value is not None},
+                    "max": round(series.max, 4)
+                }
+            return result
+
+
+class GaugeCallback(_Metric):
+    """Gauge whose values are read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Union[float, Dict[LabelKey, float], None]],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _read(self) -> Dict[LabelKey, float]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning(f"Metric callback {self.name} failed: {e}")
+            return {}
+        if values is None:
+            return {}
+        if not isinstance(values, dict):
+            return {(): float(values)}
+        return {tuple(str(part) for part in key): float(value) for key, value in values.items()}
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._read().items())
+        ]
+
+    def summary(self) -> Dict[str, float]:
+        return {self._label_text(key): value for key, value in sorted(self._read().items())}
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered with a different type or labels")
+                if isinstance(existing, GaugeCallback):
+                    existing.callback = metric.callback
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = STAGE_BUCKETS_SECONDS
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Union[float, Dict[LabelKey, float], None]],
+        labelnames: Sequence[str] = ()
+    ) -> GaugeCallback:
+        """
+        Register a gauge read from callback at scrape time (re-registering replaces the callback).
+
+        Args:
+            callback: Returns a number, or {label value tuple: number} when labelnames are given
+        """
+        return self._register(GaugeCallback(name, documentation, callback, labelnames))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get a JSON summary of every metric.
+
+        Returns:
+            Dictionary of metric name -> values per label set; histograms carry
+            count, mean, p50/p95/p99 and max
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return {metric.name: metric.summary() for metric in metrics}
+
+
+metrics = MetricsRegistry()
+
+review_stage_seconds = metrics.histogram(
+    "review_stage_duration_seconds",
+    "Duration of each review stage (admission_lookup, notes, vitals, labs, ptf, note_analysis, "
+    "note_analysis_cached, consolidation, comparison, export)",
+    ["stage"]
+)
+review_seconds = metrics.histogram("review_duration_seconds", "End-to-end duration of completed reviews")
+reviews_total = metrics.counter("reviews_total", "Reviews finished, by status", ["status"])
+db_pool_wait_seconds = metrics.histogram(
+    "db_pool_wait_seconds",
+    "Time spent checking out a pooled database connection, including opening or validating it, "
+    "by outcome (acquired, timeout, error)",
+    ["outcome"],
+    buckets=WAIT_BUCKETS_SECONDS
+)
+db_pool_wait_timeouts_total = metrics.counter(
+    "db_pool_wait_timeouts_total", "Connection checkouts that gave up because the pool stayed full"
+)
+llm_tokens_total = metrics.counter("llm_tokens_total", "LLM tokens reported by the model, by review stage", ["stage", "kind"])
+analysis_cache_lookups_total = metrics.counter(
+    "note_analysis_cache_lookups_total", "Note analysis cache lookups, by result", ["result"]
+)
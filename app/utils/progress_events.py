@@ -0,0 +1,116 @@
+"""
+Progress Event Broadcaster
+
+Pushes review and batch progress updates to Server-Sent Events subscribers.
+Reviews run in worker threads, while subscribers are asyncio queues owned by
+the event loop, so publishing hands each event to the loop with
+call_soon_threadsafe. Events are full progress snapshots: if a slow
+subscriber's queue fills up, the oldest pending snapshot is dropped.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def review_channel(review_id: str) -> str:
+    """Channel name for a single review."""
+    return f"review:{review_id}"
+
+
+def batch_channel(batch_id: str) -> str:
+    """Channel name for a batch (aggregate and member review events)."""
+    return f"batch:{batch_id}"
+
+
+def format_sse(event_type: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class ProgressBroadcaster:
+    """Fan-out of progress events from worker threads to SSE streams."""
+
+    def __init__(self, queue_size: int = 100):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            queue_size: Pending events kept per subscriber before the oldest is dropped
+        """
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = threading.Lock()
+
+    def set_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Bind to the event loop that owns the subscriber queues (call at startup)."""
+        self._loop = loop
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        """Register a subscriber queue for a channel (call from the event loop)."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue."""
+        with self._lock:
+            queues = self._subscribers.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[channel]
+
+    def has_subscribers(self, channel: str) -> bool:
+        """Whether anyone is listening on a channel (lets publishers skip building events)."""
+        with self._lock:
+            return bool(self._subscribers.get(channel))
+
+    def publish(self, channel: str, event_type: str, data: Dict[str, Any]) -> None:
+        """
+        Send an event to every subscriber of a channel. Safe to call from any thread.
+
+        Args:
+            channel: Channel name (see review_channel / batch_channel)
+            event_type: SSE event name
+            data: JSON-serializable payload
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with self._lock:
+            queues = list(self._subscribers.get(channel, ()))
+        if not queues:
+            return
+
+        event = (event_type, data)
+        for queue in queues:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Loop shutting down
+                return
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Any) -> None:
+        """Enqueue on the loop thread, dropping the oldest snapshot if the queue is full."""
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Subscriber counts."""
+        with self._lock:
+            return {
+                "channels": len(self._subscribers),
+                "subscribers": sum(len(queues) for queues in self._subscribers.values())
+            }
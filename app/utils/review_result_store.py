@@ -0,0 +1,265 @@
+"""
+Review Result Store
+
+Holds completed review results (which include full note text, vitals and labs)
+for retrieval by /api/review/result/{review_id}, without letting a long-running
+server grow without bound:
+
+- Results expire after a TTL.
+- In-memory results are kept within a byte budget, measured as the Python
+  objects' own size (sys.getsizeof over the result's dicts, lists, strings
+  and numbers); the least recently used ones are spilled to gzip-compressed
+  JSON files (or dropped if spilling is disabled) when the budget is exceeded.
+- Spilling and expiry sweeps touch the disk outside the store lock, so a
+  slow spill does not hold up get(); a result being spilled stays readable.
+- Spilled results stay retrievable until they expire, including after a
+  restart.
+"""
+
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate in-memory size of a JSON-like result in bytes.
+
+    Sums sys.getsizeof over every dict, list, tuple, string and number reachable
+    from value, counting objects shared between places once.
+    """
+    seen = set()
+    total = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+    return total
+
+
+class ReviewResultStore:
+    """TTL- and memory-bounded store of review results with optional disk spill."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 86400,
+        max_memory_mb: float = 256,
+        spill_dir: Optional[str] = None,
+        sweep_interval_seconds: float = 60
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds: How long a result remains retrievable
+            max_memory_mb: Memory budget for in-memory results (see estimate_size)
+            spill_dir: Directory for compressed spilled results (None to drop instead)
+            sweep_interval_seconds: Minimum time between expiry sweeps
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.sweep_interval_seconds = sweep_interval_seconds
+
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+        # review_id -> (stored_at, size_bytes, result); ordered oldest-used first
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._memory_bytes = 0
+        # review_id -> (stored_at, result) evicted from memory but not yet written to disk
+        self._spilling: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+        self._spilled = 0
+        self._dropped = 0
+        self._expired = 0
+
+    def _spill_path(self, review_id: str) -> Optional[Path]:
+        if not self.spill_dir:
+            return None
+        # review IDs are generated server-side, but never let one escape the directory
+        safe_id = "".join(ch for ch in review_id if ch.isalnum() or ch in "-_")
+        return self.spill_dir / f"{safe_id}.json.gz"
+
+    def put(self, review_id: str, result: Dict[str, Any]) -> None:
+        """Store a completed review result."""
+        size = estimate_size(result)
+        now = time.time()
+
+        with self._lock:
+            previous = self._entries.pop(review_id, None)
+            if previous:
+                self._memory_bytes -= previous[1]
+            self._entries[review_id] = (now, size, result)
+            self._memory_bytes += size
+            sweep_disk = self._sweep_locked(now, force=False)
+            victims = self._evict_locked()
+
+        self._spill(victims)
+        if sweep_disk:
+            self._sweep_disk(now)
+
+    def get(self, review_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a result from memory or, if spilled, from disk.
+
+        Returns:
+            The result, or None if unknown or expired
+        """
+        now = time.time()
+        with self._lock:
+            sweep_disk = self._sweep_locked(now, force=False)
+            entry = self._entries.get(review_id)
+            spilling = self._spilling.get(review_id)
+            if entry is not None:
+                if now - entry[0] > self.ttl_seconds:
+                    self._remove_locked(review_id)
+                    self._expired += 1
+                    return None
+                self._entries.move_to_end(review_id)
+                return entry[2]
+
+        if sweep_disk:
+            self._sweep_disk(now)
+        if spilling is not None:
+            return spilling[1] if now - spilling[0] <= self.ttl_seconds else None
+
+        path = self._spill_path(review_id)
+        if path is None or not path.exists():
+            return None
+        try:
+            if now - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read spilled review result {review_id}: {e}")
+            return None
+
+    def _remove_locked(self, review_id: str) -> None:
+        entry = self._entries.pop(review_id, None)
+        if entry:
+            self._memory_bytes -= entry[1]
+
+    def _evict_locked(self) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Take least recently used results out of memory until within the budget.
+
+        Returns:
+            (review_id, stored_at, result) to spill; empty when spilling is
+            disabled (the results are dropped)
+        """
+        victims = []
+        while self._memory_bytes > self.max_bytes and len(self._entries) > 1:
+            review_id, (stored_at, size, result) = self._entries.popitem(last=False)
+            self._memory_bytes -= size
+            if self.spill_dir is None:
+                self._dropped += 1
+                logger.info(f"Dropped review result {review_id} to stay within memory budget")
+                continue
+            self._spilling[review_id] = (stored_at, result)
+            victims.append((review_id, stored_at, result))
+        return victims
+
+    def _spill(self, victims: List[Tuple[str, float, Dict[str, Any]]]) -> None:
+        """Write evicted results to disk (without holding the lock)."""
+        for review_id, stored_at, result in victims:
+            path = self._spill_path(review_id)
+            try:
+                tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+                with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                    json.dump(result, f, default=str)
+                os.replace(tmp_path, path)
+                # Keep the original completion time so the TTL still applies
+                os.utime(path, (stored_at, stored_at))
+                spilled = True
+            except OSError as e:
+                spilled = False
+                logger.error(f"Could not spill review result {review_id}: {e}")
+
+            with self._lock:
+                self._spilling.pop(review_id, None)
+                if spilled:
+                    self._spilled += 1
+                else:
+                    self._dropped += 1
+
+    def _sweep_locked(self, now: float, force: bool) -> bool:
+        """
+        Drop expired in-memory results (at most every sweep interval).
+
+        Returns:
+            True if the spill directory should be swept as well (see _sweep_disk)
+        """
+        if not force and now - self._last_sweep < self.sweep_interval_seconds:
+            return False
+        self._last_sweep = now
+
+        expired = [rid for rid, (stored_at, _, _) in self._entries.items() if now - stored_at > self.ttl_seconds]
+        for review_id in expired:
+            self._remove_locked(review_id)
+        self._expired += len(expired)
+        return self.spill_dir is not None
+
+    def _sweep_disk(self, now: float) -> None:
+        """Delete expired spilled results (without holding the lock)."""
+        expired = 0
+        for path in self.spill_dir.glob("*.json.gz"):
+            try:
+                if now - path.stat().st_mtime > self.ttl_seconds:
+                    path.unlink(missing_ok=True)
+                    expired += 1
+            except OSError:
+                continue
+        if expired:
+            with self._lock:
+                self._expired += expired
+
+    def sweep(self) -> None:
+        """Drop expired results now."""
+        now = time.time()
+        with self._lock:
+            sweep_disk = self._sweep_locked(now, force=True)
+        if sweep_disk:
+            self._sweep_disk(now)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get store counters.
+
+        Returns:
+            Dictionary with in-memory entries and bytes, budget, and spill/drop/expiry counts
+        """
+        spilled_on_disk = len(list(self.spill_dir.glob("*.json.gz"))) if self.spill_dir else 0
+        with self._lock:
+            return {
+                "in_memory": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "max_bytes": self.max_bytes,
+                "spilling": len(self._spilling),
+                "on_disk": spilled_on_disk,
+                "spilled": self._spilled,
+                "dropped": self._dropped,
+                "expired": self._expired,
+                "ttl_seconds": self.ttl_seconds
+            }
@@ -4,6 +4,11 @@ Specialty code mapping based on VA standards and VSSC data definitions.
 Maps database specialty codes to clinical display names.
 """
 
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
 # Create a mapping dictionary for specialty codes to display names
 SPECIALTY_CODE_MAP = {
     # Based on DischargeFromService codes + LOSInService
@@ -139,6 +144,139 @@ SPECIALTY_CODE_MAP = {
     '*Unknown at this time*': 'UNKNOWN',
 }
 
+# Resolution kinds for a specialty description (see SpecialtyMapper._resolve)
+_FIXED = 0           # display name depends only on the description
+_ACUTE_MEDICINE = 1  # OBSERVATION when LOS is 0, otherwise MEDICAL
+_FALLBACK = 2        # no rule matched; DischargeFromService code may still apply
+
+
+class SpecialtyMapper:
+    """
+    Compiled specialty description -> display name mapper.
+
+    The partial-match rules are evaluated once per distinct description and
+    memoized; per-row work is then a dict lookup (plus the LOS check for
+    acute medicine). map_many maps a whole list or pandas Series at once.
+    """
+
+    def __init__(self, code_map: Optional[Dict[Any, str]] = None, max_memo_size: int = 10000):
+        """
+        Initialize the mapper.
+
+        Args:
+            code_map: Exact description / (service, LOS) mapping (defaults to SPECIALTY_CODE_MAP)
+            max_memo_size: Distinct descriptions memoized before the memo is reset
+        """
+        code_map = SPECIALTY_CODE_MAP if code_map is None else code_map
+        self._exact = {key: value for key, value in code_map.items() if isinstance(key, str)}
+        self._service = {key: value for key, value in code_map.items() if isinstance(key, tuple)}
+        self._max_memo_size = max_memo_size
+        self._memo: Dict[Any, Tuple[int, str]] = {}
+
+    def _resolve(self, specialty_desc: Any) -> Tuple[int, str]:
+        """Apply the exact and partial-match rules to one description (memoized)."""
+        resolved = self._memo.get(specialty_desc)
+        if resolved is not None:
+            return resolved
+
+        if specialty_desc in self._exact:
+            resolved = (_FIXED, self._exact[specialty_desc])
+        elif specialty_desc:
+            desc_upper = specialty_desc.upper()
+            if 'MEDICINE' in desc_upper and 'ACUTE' in desc_upper:
+                resolved = (_ACUTE_MEDICINE, 'MEDICAL')
+            elif 'MEDICINE' in desc_upper:
+                resolved = (_FIXED, 'MEDICAL')
+            elif 'NHCU' in desc_upper or 'NURSING' in desc_upper or 'LONG STAY' in desc_upper:
+                resolved = (_FIXED, 'HOSPICE/LONG-TERM CARE')
+            elif 'SURGERY' in desc_upper:
+                resolved = (_FIXED, 'SURGICAL')
+            elif 'PSYCH' in desc_upper:
+                resolved = (_FIXED, 'PSYCHIATRIC')
+            else:
+                resolved = (_FALLBACK, specialty_desc)
+        else:
+            resolved = (_FALLBACK, 'UNKNOWN')
+
+        if len(self._memo) >= self._max_memo_size:
+            self._memo.clear()
+        self._memo[specialty_desc] = resolved
+        return resolved
+
+    def map(self, specialty_desc: Any, discharge_service: Any = None, los_in_service: Any = None) -> str:
+        """
+        Map one specialty description to its display name (see map_specialty_display).
+        """
+        kind, value = self._resolve(specialty_desc)
+        if kind == _ACUTE_MEDICINE and los_in_service == 0:
+            return 'OBSERVATION'
+        if kind == _FALLBACK and discharge_service and (discharge_service, los_in_service) in self._service:
+            return self._service[(discharge_service, los_in_service)]
+        return value
+
+    def map_many(
+        self,
+        specialty_descs: Union[Sequence[Any], pd.Series],
+        discharge_services: Optional[Union[Sequence[Any], pd.Series]] = None,
+        los_values: Optional[Union[Sequence[Any], pd.Series]] = None
+    ) -> Union[List[str], pd.Series]:
+        """
+        Map a column of specialty descriptions.
+
+        Args:
+            specialty_descs: Descriptions as a list or Series (None/NaN map like None)
+            discharge_services: Optional DischargeFromService codes, aligned with specialty_descs
+            los_values: Optional lengths of service, aligned with specialty_descs (NaN = missing)
+
+        Returns:
+            Display names, as a Series (same index) if specialty_descs is a Series, else a list
+        """
+        if not isinstance(specialty_descs, pd.Series):
+            descs = pd.Series(list(specialty_descs), dtype=object)
+            return self.map_many(descs, discharge_services, los_values).tolist()
+
+        # Rules run once per distinct description; rows then take their result by code
+        codes, uniques = pd.factorize(specialty_descs, use_na_sentinel=True)
+        resolved = [self._resolve(None if _is_missing(desc) else desc) for desc in uniques]
+        resolved.append(self._resolve(None))  # code -1 (missing) takes the last entry
+        kinds = np.array([kind for kind, _ in resolved])[codes]
+        result = np.array([value for _, value in resolved], dtype=object)[codes]
+
+        los = None
+        if los_values is not None:
+            los = _numeric_array(los_values)
+            result[(kinds == _ACUTE_MEDICINE) & (los == 0)] = 'OBSERVATION'
+
+        if discharge_services is not None:
+            services = list(discharge_services)
+            for position in np.flatnonzero(kinds == _FALLBACK):
+                length = None if los is None or np.isnan(los[position]) else los[position]
+                key = (services[position], length)
+                if key[0] and key in self._service:
+                    result[position] = self._service[key]
+
+        return pd.Series(result, index=specialty_descs.index, dtype=object)
+
+
+def _numeric_array(values: Union[Sequence[Any], pd.Series]) -> np.ndarray:
+    """Values as a float array (None and unparseable values become NaN)."""
+    if isinstance(values, pd.Series):
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    try:
+        return np.asarray(values, dtype="float64")
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(list(values), dtype=object), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _is_missing(value: Any) -> bool:
+    """True for None and NaN/NA scalars."""
+    return value is None or (not isinstance(value, str) and bool(pd.isna(value)))
+
+
+# Shared mapper for patient lists, cohort batches and the specialty catalog
+specialty_mapper = SpecialtyMapper()
+
+
 def map_specialty_display(specialty_desc, discharge_service=None, los_in_service=None):
     """
     Map database specialty description to user-facing display name.
@@ -151,30 +289,9 @@ def map_specialty_display(specialty_desc, discharge_service=None, los_in_service
     Returns:
         User-friendly specialty name for display
     """
-    # Try exact mapping first
-    if specialty_desc in SPECIALTY_CODE_MAP:
-        return SPECIALTY_CODE_MAP[specialty_desc]
-    
-    # Try partial matches
-    if specialty_desc:
-        desc_lower = specialty_desc.upper()
-        if 'MEDICINE' in desc_lower and 'ACUTE' in desc_lower and los_in_service == 0:
-            return 'OBSERVATION'
-        if 'MEDICINE' in desc_lower:
-            return 'MEDICAL'
-        if 'NHCU' in desc_lower or 'NURSING' in desc_lower or 'LONG STAY' in desc_lower:
-            return 'HOSPICE/LONG-TERM CARE'
-        if 'SURGERY' in desc_lower:
-            return 'SURGICAL'
-        if 'PSYCH' in desc_lower:
-            return 'PSYCHIATRIC'
-    
-    # Try service code if specialty description doesn't match
-    if discharge_service and (discharge_service, los_in_service) in SPECIALTY_CODE_MAP:
-        return SPECIALTY_CODE_MAP[(discharge_service, los_in_service)]
-    
-    # Default fallback
-    return specialty_desc if specialty_desc else 'UNKNOWN'
+    # Exact mapping first, then partial matches, then the service code;
+    # falls back to the description itself (or 'UNKNOWN')
+    return specialty_mapper.map(specialty_desc, discharge_service, los_in_service)
 
 
 # Test the mapping
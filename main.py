@@ -6,6 +6,7 @@ AI-powered evaluation of inpatient clinical documentation against coded diagnose
 """
 
 import asyncio
+import base64
 import json
 import logging
 import os
@@ -14,7 +15,7 @@ import getpass
 import traceback
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import time
 import pandas as pd
 from io import BytesIO
@@ -40,15 +41,39 @@ from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 # Local imports
-from app.database.connection import DatabaseConnection, load_database_config
+from app.database.connection import (
+    DatabaseConnection,
+    ConnectionPool,
+    PoolExhaustedError,
+    load_database_config,
+    get_connection_pool
+)
 from app.ai.va_gpt_client import VAGPTClient
+from app.ai.async_va_gpt_client import AsyncVAGPTClient
+from app.ai.analysis_cache import NoteAnalysisCache
+from app.analysis.note_analysis import analyze_notes_concurrently, analyze_notes_async
+from app.analysis.clinical_context import ClinicalContext
+from app.analysis.trends import summarize_clinical_trends, abnormal_trend_lines
+from app.analysis.token_planner import plan_note_requests, build_token_report
+from app.analysis.consolidation import consolidate_hierarchically
+from app.analysis.batch_review import BatchReviewManager
+from app.utils.review_result_store import ReviewResultStore
+from app.utils.progress_events import ProgressBroadcaster, review_channel, batch_channel, format_sse
+from app.database.schema_cache import SchemaCache
+from app.database.staff_role_index import StaffRoleIndex, classify_role
+from app.database.specialty_catalog import SpecialtyCatalog
+from app.database.frames import VITALS_FRAME_TYPES, LABS_FRAME_TYPES, empty_frame, frame_to_records, frame_to_columns
+from app.extraction.parallel_extraction import run_extraction_queries
 from app.logging.audit_logger import AuditLogger
 from app.logging.query_logger import QueryLogger
-from app.utils.specialty_mapping import map_specialty_display
+from app.logging.log_writer import BufferedLogWriter
+from app.logging.log_tail import tail_jsonl
+from app.utils.specialty_mapping import specialty_mapper
+from app.utils.metrics import metrics, review_stage_seconds, review_seconds, reviews_total, llm_tokens_total
 
 # Configure logging
 logging.basicConfig(
@@ -82,19 +107,121 @@ templates_dir.mkdir(exist_ok=True)
 app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 templates = Jinja2Templates(directory=str(templates_dir))
 
+def load_app_config() -> Dict[str, Any]:
+    """Load application settings from config/app_config.json."""
+    config_file = project_root / "config" / "app_config.json"
+    try:
+        with open(config_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"App config not found at {config_file}")
+        return {}
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid JSON in app config: {str(e)}")
+        return {}
+
+
 # Initialize components
 db_config = load_database_config()
+app_config = load_app_config()
 logger.info(f"Database config loaded: {json.dumps(db_config, indent=2)[:500]}...")
-audit_logger = AuditLogger(log_dir="logs")
-query_logger = QueryLogger(log_dir="logs")
-va_gpt_client = VAGPTClient()
+
+# Audit, query, evaluation and error log lines are written by one background
+# thread so logging doesn't add file I/O to the review path
+log_settings = app_config.get("logging", {})
+log_writer = BufferedLogWriter(
+    max_queue=log_settings.get("writer_queue_size", 10000),
+    fsync_interval_seconds=log_settings.get("writer_fsync_interval_seconds", 1.0)
+)
+audit_logger = AuditLogger(log_dir="logs", writer=log_writer)
+query_logger = QueryLogger(
+    log_dir="logs",
+    max_segment_mb=log_settings.get("query_log_max_segment_mb", 64),
+    writer=log_writer
+)
+
+
+def create_note_analysis_cache() -> Optional[NoteAnalysisCache]:
+    """Open the on-disk note analysis cache if enabled in app_config.json."""
+    cache_settings = app_config.get("ai", {}).get("analysis_cache", {})
+    if not cache_settings.get("enabled", True):
+        logger.info("Note analysis cache disabled")
+        return None
+    try:
+        return NoteAnalysisCache(
+            db_path=str(project_root / cache_settings.get("path", "data/cache/note_analysis_cache.sqlite3")),
+            max_size_mb=cache_settings.get("max_size_mb", 256)
+        )
+    except Exception as e:
+        logger.error(f"Could not open note analysis cache, continuing without it: {e}")
+        return None
+
+
+note_analysis_cache = create_note_analysis_cache()
+va_gpt_client = VAGPTClient(cache=note_analysis_cache)
+
+# Async client and the event loop it lives on (both created at startup).
+# Background review threads submit note analysis to this loop so in-flight
+# LLM requests don't each hold a threadpool worker.
+async_va_gpt_client: Optional[AsyncVAGPTClient] = None
+main_event_loop: Optional[asyncio.AbstractEventLoop] = None
 
 # Global database connection (will be initialized on first use)
 db_connection: Optional[DatabaseConnection] = None
 
+# Shared connection pool for reviews and patient searches (created on first use)
+db_pool: Optional[ConnectionPool] = None
+db_pool_lock = threading.Lock()
+
+# Staff tables probed, in order, when classifying provider roles
+PROVIDER_ROLE_TABLES = [
+    "Dim.Staff",
+    "Staff.Staff",
+    "Dim.Provider",
+    "Dim.PersonClass"
+]
+
+# INFORMATION_SCHEMA column lists shared by reviews (TIU text column, provider
+# role tables); registered tables are loaded together in one query per TTL
+schema_cache_settings = app_config.get("schema_cache", {})
+schema_cache = SchemaCache(
+    ttl_seconds=schema_cache_settings.get("ttl_minutes", 60) * 60,
+    tables=["TIU.TIUDocument"] + PROVIDER_ROLE_TABLES
+)
+
+
+
+def create_staff_role_index() -> Optional[StaffRoleIndex]:
+    """Open the on-disk StaffSID role index configured in app_config.json."""
+    role_settings = app_config.get("staff_roles", {})
+    try:
+        return StaffRoleIndex(
+            db_path=str(project_root / role_settings.get("path", "data/cache/staff_roles.sqlite3")),
+            refresh_after_seconds=role_settings.get("refresh_after_days", 7) * 86400
+        )
+    except Exception as e:
+        logger.error(f"Could not open staff role index, roles will be looked up per review: {e}")
+        return None
+
+
+staff_role_index = create_staff_role_index()
+
 # Progress tracking for long-running review operations
 review_progress: Dict[str, Dict[str, Any]] = {}
 
+# Pushes progress changes to /api/review/progress/{id}/stream and /api/batch/{id}/stream
+progress_broadcaster = ProgressBroadcaster()
+
+# Completed review results live in a bounded store rather than in review_progress
+# (they carry full note text, vitals and labs); old ones are spilled to disk and expire
+result_settings = app_config.get("review_results", {})
+review_result_store = ReviewResultStore(
+    ttl_seconds=result_settings.get("ttl_hours", 24) * 3600,
+    max_memory_mb=result_settings.get("max_memory_mb", 256),
+    spill_dir=str(project_root / result_settings.get("spill_dir", "data/review_results"))
+    if result_settings.get("spill_to_disk", True) else None
+)
+
 # Error log file for bug tracking
 error_log_path = Path("logs") / "error_log.jsonl"
 
@@ -113,20 +240,60 @@ def log_error_event(event_type: str, message: str, context: Optional[Dict[str, A
                 "exception_type": type(exc).__name__,
                 "stack": traceback.format_exc()
             })
-        with error_log_path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(payload) + "\n")
+        log_writer.write(error_log_path, (json.dumps(payload) + "\n").encode("utf-8"))
     except Exception as log_exc:
         logger.error(f"Failed to write error log: {log_exc}")
 
-def create_progress_tracker(review_id: str) -> None:
+def prune_review_progress() -> None:
+    """Forget progress records of reviews that finished longer ago than the result TTL."""
+    cutoff = datetime.now() - timedelta(seconds=review_result_store.ttl_seconds)
+    for review_id, progress in list(review_progress.items()):
+        end_time = progress.get("end_time")
+        if end_time and datetime.fromisoformat(end_time) < cutoff:
+            review_progress.pop(review_id, None)
+
+def build_progress_snapshot(review_id: str, progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Progress payload shared by the polling endpoint and the event streams"""
+    start_time = datetime.fromisoformat(progress["start_time"])
+    elapsed_seconds = (datetime.now() - start_time).total_seconds()
+
+    return {
+        "review_id": review_id,
+        "status": progress["status"],
+        "percentage": progress["percentage"],
+        "current_step": progress["current_step"],
+        "steps_completed": list(progress["steps_completed"]),
+        "elapsed_seconds": int(elapsed_seconds),
+        "error": progress.get("error")
+    }
+
+def publish_progress(review_id: str) -> None:
+    """Push a review's current progress to its stream (and its batch's stream)"""
+    progress = review_progress.get(review_id)
+    if progress is None:
+        return
+    channels = [review_channel(review_id)]
+    if progress.get("batch_id"):
+        channels.append(batch_channel(progress["batch_id"]))
+    channels = [channel for channel in channels if progress_broadcaster.has_subscribers(channel)]
+    if not channels:
+        return
+
+    snapshot = build_progress_snapshot(review_id, progress)
+    for channel in channels:
+        progress_broadcaster.publish(channel, "progress", snapshot)
+
+def create_progress_tracker(review_id: str, batch_id: Optional[str] = None) -> None:
     """Initialize progress tracking for a review"""
+    prune_review_progress()
     review_progress[review_id] = {
         "status": "initializing",
         "percentage": 0,
         "current_step": "Initializing review...",
         "steps_completed": [],
         "start_time": datetime.now().isoformat(),
-        "error": None
+        "error": None,
+        "batch_id": batch_id
     }
 
 def update_progress(review_id: str, percentage: int, current_step: str, status: str = "processing") -> None:
@@ -139,23 +306,27 @@ def update_progress(review_id: str, percentage: int, current_step: str, status:
             "last_update": datetime.now().isoformat()
         })
         logger.info(f"Progress update: {review_id} - {percentage}% - {current_step}")
+        publish_progress(review_id)
 
 def mark_step_complete(review_id: str, step_name: str) -> None:
     """Mark a step as completed"""
     if review_id in review_progress:
         if step_name not in review_progress[review_id]["steps_completed"]:
             review_progress[review_id]["steps_completed"].append(step_name)
+            publish_progress(review_id)
 
 def complete_review(review_id: str, data: Any = None) -> None:
-    """Mark review as complete"""
+    """Mark review as complete and hand its results to the result store"""
     if review_id in review_progress:
+        if data:
+            review_result_store.put(review_id, data)
         review_progress[review_id].update({
             "status": "complete",
             "percentage": 100,
             "current_step": "Review complete",
-            "end_time": datetime.now().isoformat(),
-            "result_data": data
+            "end_time": datetime.now().isoformat()
         })
+        publish_progress(review_id)
 
 def fail_review(review_id: str, error: str) -> None:
     """Mark review as failed"""
@@ -165,6 +336,7 @@ def fail_review(review_id: str, error: str) -> None:
             "error": error,
             "end_time": datetime.now().isoformat()
         })
+        publish_progress(review_id)
 
 
 # ============================================================================
@@ -175,6 +347,13 @@ class DateRangeRequest(BaseModel):
     start_date: str
     end_date: str
     specialties: Optional[List[str]] = None  # Optional list of specialty filters
+    page_size: int = 100  # Patients per page
+    cursor: Optional[str] = None  # next_cursor from the previous page
+
+
+class BatchReviewRequest(DateRangeRequest):
+    concurrency: Optional[int] = None  # Reviews run at once (defaults to batch.max_concurrent_reviews; at most pool max_size // EXTRACTION_CONNECTIONS_PER_REVIEW)
+    bypass_cache: bool = False
 
 
 class PatientSelectionRequest(BaseModel):
@@ -184,6 +363,7 @@ class PatientSelectionRequest(BaseModel):
 class ReviewRequest(BaseModel):
     patient_id: str | int
     admission_id: str | int
+    bypass_cache: bool = False
 
 
 class NotesDiagnosticsRequest(BaseModel):
@@ -262,39 +442,69 @@ def get_db_connection() -> DatabaseConnection:
     return db_connection
 
 
-def classify_provider_roles(conn: DatabaseConnection, staff_sids: List[int]) -> Dict[int, Dict[str, str]]:
+def get_db_pool() -> ConnectionPool:
+    """Get or create the shared database connection pool."""
+    global db_pool
+
+    with db_pool_lock:
+        if db_pool is None:
+            lsv_config = db_config.get("databases", {}).get("LSV", {})
+            if not lsv_config:
+                logger.error("Database configuration not found in config file")
+                raise HTTPException(status_code=500, detail="Database configuration not found")
+
+            pool_settings = db_config.get("connection_defaults", {}).get("pool", {})
+            db_pool = get_connection_pool(lsv_config, pool_settings)
+            if db_pool is None:
+                raise HTTPException(status_code=500, detail="Database configuration not found")
+
+            logger.info(
+                f"Database connection pool created for {lsv_config.get('server')}/{lsv_config.get('database')} "
+                f"(max_size={db_pool.max_size})"
+            )
+
+    return db_pool
+
+
+def acquire_db_connection() -> DatabaseConnection:
+    """
+    Check out a pooled database connection.
+
+    Callers must hand it back with get_db_pool().release(conn).
     """
-    Attempt to classify provider roles (LIP vs trainee vs unknown) for given StaffSIDs.
+    try:
+        return get_db_pool().acquire()
+    except PoolExhaustedError as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="All database connections are busy, please retry")
+    except ConnectionError as e:
+        logger.error(f"Failed to open pooled database connection: {e}")
+        raise HTTPException(status_code=500, detail="Failed to connect to database")
+
+
+def fetch_provider_roles(conn: DatabaseConnection, staff_sids: List[int]) -> Optional[Dict[int, Dict[str, str]]]:
+    """
+    Look up provider roles for StaffSIDs in the CDW staff tables.
 
     Best-effort: tries multiple likely staff tables and uses available columns.
+
+    Returns:
+        StaffSID -> {"role", "raw"} for StaffSIDs found, or None if no staff table could be queried
     """
     if not staff_sids:
         return {}
 
-    candidates = [
-        "Dim.Staff",
-        "Staff.Staff",
-        "Dim.Provider",
-        "Dim.PersonClass"
-    ]
-
     role_map: Dict[int, Dict[str, str]] = {}
+    queried = False
     sid_list = ",".join(str(int(sid)) for sid in staff_sids if sid is not None)
 
-    for table_path in candidates:
+    for table_path in PROVIDER_ROLE_TABLES:
         try:
             table_ref = get_table_reference(table_path)
-            # Discover available columns
-            schema, name = table_path.split(".")
-            col_query = """
-            SELECT COLUMN_NAME
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
-            """
-            cols_result = conn.execute_query(col_query, params=(schema, name))
-            if not isinstance(cols_result, dict) or not cols_result.get("success"):
+            # Discover available columns (cached across reviews)
+            available = set(schema_cache.get_columns(conn, table_path) or [])
+            if not available:
                 continue
-            available = {row["COLUMN_NAME"] for row in cols_result.get("rows", [])}
 
             select_cols = []
             for col in ["StaffSID", "PersonClass", "ProviderType", "Occupation", "PositionTitle", "StaffName", "Name"]:
@@ -313,21 +523,13 @@ def classify_provider_roles(conn: DatabaseConnection, staff_sids: List[int]) ->
             role_result = conn.execute_query(role_query)
             if not isinstance(role_result, dict) or not role_result.get("success"):
                 continue
+            queried = True
 
             for row in role_result.get("rows", []):
                 sid = row.get("StaffSID")
                 raw_values = " ".join(str(row.get(c, "") or "") for c in select_cols if c != "StaffSID")
-                raw_upper = raw_values.upper()
-                role = "UNKNOWN"
-                if any(tag in raw_upper for tag in ["RESIDENT", "FELLOW"]):
-                    role = "TRAINEE"
-                elif any(tag in raw_upper for tag in ["PHYSICIAN", "MD", "DO", "NURSE PRACTITIONER", "NP", "PHYSICIAN ASSISTANT", "PA"]):
-                    role = "LIP"
-                elif any(tag in raw_upper for tag in ["ATTENDING", "CONSULTANT"]):
-                    role = "LIP"
-
                 role_map[int(sid)] = {
-                    "role": role,
+                    "role": classify_role(raw_values),
                     "raw": raw_values.strip()[:200]
                 }
 
@@ -338,7 +540,100 @@ def classify_provider_roles(conn: DatabaseConnection, staff_sids: List[int]) ->
             logger.warning(f"Provider role lookup failed for {table_path}: {e}")
             continue
 
-    return role_map
+    return role_map if queried else None
+
+
+def classify_provider_roles(staff_sids: List[int], conn: Optional[DatabaseConnection] = None) -> Dict[int, Dict[str, str]]:
+    """
+    Classify provider roles (LIP vs trainee vs unknown) for given StaffSIDs.
+
+    Roles come from the local staff role index; only StaffSIDs that are new
+    or due for refresh are looked up in the database (in one bulk query).
+
+    Args:
+        staff_sids: StaffSIDs of note authors and cosigners
+        conn: Optional connection to use for lookups (borrowed from the pool if needed)
+
+    Returns:
+        StaffSID -> {"role", "raw"} for StaffSIDs found in a staff table
+    """
+    if not staff_sids:
+        return {}
+    if staff_role_index is None:
+        if conn is not None:
+            return fetch_provider_roles(conn, staff_sids) or {}
+        with get_db_pool().connection() as role_conn:
+            return fetch_provider_roles(role_conn, staff_sids) or {}
+
+    roles, to_fetch = staff_role_index.lookup(staff_sids)
+    if not to_fetch:
+        return roles
+
+    try:
+        if conn is not None:
+            fetched = fetch_provider_roles(conn, to_fetch)
+        else:
+            with get_db_pool().connection() as role_conn:
+                fetched = fetch_provider_roles(role_conn, to_fetch)
+    except Exception as e:
+        # Keep whatever the index already knows (including stale entries)
+        logger.warning(f"Provider role refresh failed for {len(to_fetch)} StaffSIDs: {e}")
+        return roles
+
+    if fetched is None:
+        # No staff table answered; don't record these StaffSIDs as not found
+        return roles
+
+    staff_role_index.store(to_fetch, fetched)
+    roles.update(fetched)
+    return roles
+
+
+def load_treating_specialties() -> List[str]:
+    """
+    Read the station's treating specialty names from Dim.TreatingSpecialty.
+
+    Returns:
+        Raw specialty names
+
+    Raises:
+        RuntimeError: If the query fails or returns no specialties
+    """
+    specialty_table = get_table_reference("Dim.TreatingSpecialty")
+    station = db_config.get("extraction_settings", {}).get("station_focus", 626)
+
+    # Query treating specialties for the station - use [Specialty] column
+    query = f"""
+    SELECT DISTINCT [Specialty]
+    FROM {specialty_table}
+    WHERE [Sta3n] = ?
+      AND [Specialty] NOT LIKE '%Missing%'
+      AND [Specialty] NOT LIKE '%Unknown%'
+      AND [Specialty] NOT LIKE '%Delete%'
+      AND [Specialty] IS NOT NULL
+      AND LTRIM(RTRIM([Specialty])) != ''
+    ORDER BY [Specialty]
+    """
+
+    logger.info(f"Loading specialty catalog from {specialty_table} for station {station}")
+    with get_db_pool().connection() as conn:
+        result = conn.execute_query(query, params=(station,))
+
+    if not result.get("success"):
+        raise RuntimeError(result.get("error") or "Specialty query failed")
+    if not result.get("rows"):
+        raise RuntimeError("No specialties found in database")
+    return [row.get("Specialty") for row in result["rows"]]
+
+
+# Station specialty list with display names, served from memory and reloaded
+# in the background after ttl_hours
+specialty_catalog_settings = app_config.get("specialty_catalog", {})
+specialty_catalog = SpecialtyCatalog(
+    loader=load_treating_specialties,
+    ttl_seconds=specialty_catalog_settings.get("ttl_hours", 24) * 3600,
+    retry_seconds=specialty_catalog_settings.get("retry_seconds", 60)
+)
 
 
 # ============================================================================
@@ -382,7 +677,8 @@ async def health_check():
         # Check component health, but don't fail the endpoint if checks fail
         db_healthy = False
         try:
-            db_healthy = db_connection.is_connected if db_connection else False
+            db_healthy = (db_connection.is_connected if db_connection else False) or \
+                (db_pool.is_connected if db_pool else False)
         except Exception:
             pass
         
@@ -411,6 +707,38 @@ async def health_check():
         }
 
 
+def drain_logs() -> None:
+    """
+    Write out queued log lines, then persist running log statistics and the
+    query log indexes so the next start replays nothing.
+
+    Used by the shutdown event and by /api/shutdown, which ends the process
+    with os._exit and so never reaches the shutdown event.
+    """
+    log_writer.close()
+    audit_logger.checkpoint()
+    query_logger.close()
+
+
+def exit_process(delay_seconds: float = 0.5) -> None:
+    """Drain the logs and end the process once the response has been sent."""
+    def _exit():
+        time.sleep(delay_seconds)
+        logger.info("Executing server shutdown...")
+        try:
+            audit_logger.log_event(
+                event_type="APPLICATION_SHUTDOWN",
+                username=get_username(),
+                details={"source": "api"}
+            )
+            drain_logs()
+        except Exception as e:
+            logger.error(f"Shutdown error: {e}", exc_info=True)
+        os._exit(0)
+
+    threading.Thread(target=_exit, name="shutdown", daemon=True).start()
+
+
 @app.post("/api/shutdown")
 async def shutdown():
     """Shutdown endpoint - gracefully stops the server."""
@@ -419,34 +747,22 @@ async def shutdown():
     # Return success response
     response = {"status": "shutdown_initiated", "timestamp": datetime.now().isoformat()}
     
-    # Schedule server shutdown after a brief delay to allow response to be sent
-    async def delayed_shutdown():
-        await asyncio.sleep(0.5)
-        logger.info("Executing server shutdown...")
-        os._exit(0)
-    
-    asyncio.create_task(delayed_shutdown())
+    # Shut down after a brief delay to allow response to be sent
+    exit_process()
     return response
 
 
 @app.get("/api/errors/recent")
-async def get_recent_errors(limit: int = 50):
-    """Return the most recent error records for troubleshooting."""
-    safe_limit = max(1, min(limit, 200))
-    if not error_log_path.exists():
-        return {"count": 0, "errors": []}
-
-    lines: List[str]
-    with error_log_path.open("r", encoding="utf-8") as handle:
-        lines = handle.readlines()
-
-    recent = []
-    for line in lines[-safe_limit:]:
-        try:
-            recent.append(json.loads(line))
-        except json.JSONDecodeError:
-            continue
+def get_recent_errors(limit: int = 50, event_type: Optional[str] = None):
+    """
+    Return the most recent error records for troubleshooting.
 
+    Declared as a plain function (run on the threadpool) because it waits for
+    the log writer and reads the log file.
+    """
+    safe_limit = max(1, min(limit, 200))
+    log_writer.flush()
+    recent = tail_jsonl(error_log_path, safe_limit, filters={"event_type": event_type})
     return {"count": len(recent), "errors": recent}
 
 
@@ -476,22 +792,55 @@ async def get_review_progress(review_id: str):
     """
     if review_id not in review_progress:
         raise HTTPException(status_code=404, detail="Review not found")
-    
-    progress = review_progress[review_id]
-    
-    # Calculate elapsed time
-    start_time = datetime.fromisoformat(progress["start_time"])
-    elapsed_seconds = (datetime.now() - start_time).total_seconds()
-    
-    return {
-        "review_id": review_id,
-        "status": progress["status"],
-        "percentage": progress["percentage"],
-        "current_step": progress["current_step"],
-        "steps_completed": progress["steps_completed"],
-        "elapsed_seconds": int(elapsed_seconds),
-        "error": progress.get("error")
-    }
+
+    return build_progress_snapshot(review_id, review_progress[review_id])
+
+
+# Terminal states end a progress stream
+REVIEW_FINAL_STATUSES = {"complete", "error"}
+BATCH_FINAL_STATUSES = {"complete", "cancelled"}
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+@app.get("/api/review/progress/{review_id}/stream")
+async def stream_review_progress(review_id: str, request: Request):
+    """
+    Stream a review's progress as Server-Sent Events.
+
+    Sends the current snapshot immediately, then a "progress" event (same
+    payload as /api/review/progress/{review_id}) each time the review's
+    progress changes. The stream ends once the review completes or fails.
+    """
+    if review_id not in review_progress:
+        raise HTTPException(status_code=404, detail="Review not found")
+
+    channel = review_channel(review_id)
+    queue = progress_broadcaster.subscribe(channel)
+
+    async def event_stream():
+        try:
+            snapshot = build_progress_snapshot(review_id, review_progress[review_id])
+            yield format_sse("progress", snapshot)
+            if snapshot["status"] in REVIEW_FINAL_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    event_type, data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event_type, data)
+                if data.get("status") in REVIEW_FINAL_STATUSES:
+                    return
+        finally:
+            progress_broadcaster.unsubscribe(channel, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.exception_handler(Exception)
@@ -507,17 +856,17 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 
 
 @app.get("/api/review/result/{review_id}")
-async def get_review_result(review_id: str):
-    """Get completed review results once processing is done."""
-    if review_id not in review_progress:
-        raise HTTPException(status_code=404, detail="Review not found")
-
-    progress = review_progress[review_id]
-    if progress.get("status") != "complete":
+def get_review_result(review_id: str):
+    """Get completed review results once processing is done (until they expire)."""
+    progress = review_progress.get(review_id)
+    if progress is not None and progress.get("status") != "complete":
         raise HTTPException(status_code=409, detail="Review not complete")
 
-    result_data = progress.get("result_data")
+    # Spilled results outlive their progress record (e.g. across a restart)
+    result_data = review_result_store.get(review_id)
     if not result_data:
+        if progress is None:
+            raise HTTPException(status_code=404, detail="Review not found")
         raise HTTPException(status_code=404, detail="Review results not available")
 
     return result_data
@@ -659,95 +1008,231 @@ async def diagnose_notes(request: NotesDiagnosticsRequest):
 
 
 @app.get("/api/specialties")
-async def get_available_specialties():
-    """Get list of available treating specialties from database for Station 626."""
+def get_available_specialties(request: Request):
+    """
+    Get the station's treating specialties with their display names.
+
+    Served from the cached specialty catalog. The response carries an ETag;
+    a request whose If-None-Match matches gets 304 Not Modified.
+    """
     try:
-        try:
-            conn = get_db_connection()
-        except HTTPException as e:
-            logger.error(f"Failed to get database connection: {e.detail}")
-            return {
-                "success": False,
-                "specialties": [],
-                "count": 0,
-                "error": str(e.detail)
-            }
-        except Exception as e:
-            logger.error(f"Unexpected error getting database connection: {e}", exc_info=True)
-            return {
-                "success": False,
-                "specialties": [],
-                "count": 0,
-                "error": str(e)
-            }
-        
-        specialty_table = get_table_reference("Dim.TreatingSpecialty")
-        station = db_config.get("extraction_settings", {}).get("station_focus", 626)
-        
-        # Query treating specialties for the station - use [Specialty] column
-        query = f"""
-        SELECT DISTINCT [Specialty]
-        FROM {specialty_table}
-        WHERE [Sta3n] = {station}
-          AND [Specialty] NOT LIKE '%Missing%'
-          AND [Specialty] NOT LIKE '%Unknown%'
-          AND [Specialty] NOT LIKE '%Delete%'
-          AND [Specialty] IS NOT NULL
-          AND LTRIM(RTRIM([Specialty])) != ''
-        ORDER BY [Specialty]
-        """
-        
-        logger.info(f"Executing specialty query with table: {specialty_table}, station: {station}")
-        result = conn.execute_query(query)
-        logger.info(f"Specialty query result: success={result.get('success')}, rows={len(result.get('rows', []))}, error={result.get('error')}")
-        
-        if result.get("success") and result.get("rows"):
-            specialties = [
-                {
-                    "id": idx,
-                    "name": row.get("Specialty", "Unknown")
-                }
-                for idx, row in enumerate(result.get("rows", []), 1)
-            ]
-            logger.info(f"Retrieved {len(specialties)} specialties for station {station}")
-            return {
-                "success": True,
-                "specialties": specialties,
-                "count": len(specialties)
-            }
-        else:
-            error_msg = result.get("error", "No specialties found in database")
-            logger.warning(f"No specialties found for station {station}. Query result: {result}")
-            return {
-                "success": False,
-                "specialties": [],
-                "count": 0,
-                "error": "No specialties found in database"
-            }
+        catalog = specialty_catalog.get()
     except Exception as e:
-        logger.error(f"Error fetching specialties: {str(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error(f"Error fetching specialties: {e}", exc_info=True)
+        catalog = None
+
+    if catalog is None:
+        stats = specialty_catalog.get_statistics()
         return {
             "success": False,
             "specialties": [],
+            "display_names": [],
             "count": 0,
-            "error": str(e)
+            "error": stats.get("last_error") or "No specialties found in database"
         }
 
+    headers = {"ETag": catalog["etag"], "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if catalog["etag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(
+        content={
+            "success": True,
+            "specialties": catalog["specialties"],
+            "display_names": catalog["display_names"],
+            "count": catalog["count"]
+        },
+        headers=headers
+    )
+
+
+def apply_specialty_display(patients: List[Dict[str, Any]]) -> None:
+    """
+    Replace AdmittingTreatingSpecialty with its display name, in place, for a
+    whole patient list (the raw value is kept in AdmittingTreatingSpecialtyRaw).
+    """
+    if not patients or "AdmittingTreatingSpecialty" not in patients[0]:
+        return
+    raw = [patient.get("AdmittingTreatingSpecialty") for patient in patients]
+    display = specialty_mapper.map_many(raw, los_values=[patient.get("LOS") for patient in patients])
+    for patient, raw_value, display_value in zip(patients, raw, display):
+        patient["AdmittingTreatingSpecialtyRaw"] = raw_value
+        patient["AdmittingTreatingSpecialty"] = display_value
+
+
+def parse_discharge_date_range(start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+    """
+    Parse a YYYY-MM-DD discharge date range.
+
+    Returns:
+        (start, end_exclusive) where end_exclusive is the day after end_date
+
+    Raises:
+        HTTPException: 400 if either date is malformed or the range is reversed
+    """
+    try:
+        start = datetime.strptime(start_date.strip()[:10], "%Y-%m-%d")
+        end = datetime.strptime(end_date.strip()[:10], "%Y-%m-%d")
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    return start, end + timedelta(days=1)
+
+
+def encode_discharge_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor for the row after which the next page starts."""
+    discharge = row.get("DischargeDate")
+    payload = {
+        "d": discharge.isoformat() if isinstance(discharge, datetime) else str(discharge),
+        "i": int(row["InpatientSID"])
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_discharge_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor from encode_discharge_cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def build_discharged_patients_query(
+    table_ref: str,
+    start_date: str,
+    end_date: str,
+    station: Any,
+    specialties: Optional[List[str]] = None,
+    top: Optional[int] = 100,
+    cursor: Optional[str] = None
+) -> Tuple[str, tuple]:
+    """
+    Build the discharged-admissions query used by the patient search and batch reviews.
+
+    Results are ordered newest discharge first on (DischargeDateTime, InpatientSID),
+    which is also the keyset used for paging: pass the cursor of the last row of a
+    page to get the rows after it. All values are bound as parameters.
+
+    Args:
+        table_ref: Fully qualified discharge (Inpat.Inpatient) table reference
+        start_date: First discharge date (inclusive, YYYY-MM-DD)
+        end_date: Last discharge date (inclusive, YYYY-MM-DD)
+        station: Sta3n to search
+        specialties: Admitting treating specialties to keep (None or empty for all)
+        top: Maximum rows to return (None for all)
+        cursor: Keyset cursor from encode_discharge_cursor (None for the first page)
+
+    Returns:
+        (SQL query text, parameters)
+    """
+    range_start, range_end = parse_discharge_date_range(start_date, end_date)
+    top_clause = f"TOP {int(top)}" if top else ""
+    params: List[Any] = [range_start, range_end, station]
+
+    # Get other table references from config
+    patient_table = get_table_reference("SPatient.SPatient")
+    specialty_transfer_table = get_table_reference("Inpat.SpecialtyTransfer")
+    treating_specialty_table = get_table_reference("Dim.TreatingSpecialty")
+
+    specialty_clause = ""
+    selected_specialties = sorted({s.strip().upper() for s in specialties or [] if s and s.strip()})
+    if selected_specialties:
+        placeholders = ", ".join("?" for _ in selected_specialties)
+        # Same comparison the UI uses: trimmed, upper-cased, missing specialty = 'UNKNOWN'
+        specialty_clause = (
+            f"AND UPPER(LTRIM(RTRIM(COALESCE(admitting_spec.Specialty, 'UNKNOWN')))) IN ({placeholders})"
+        )
+        params.extend(selected_specialties)
+
+    keyset_clause = ""
+    if cursor:
+        after_discharge, after_inpatient_sid = decode_discharge_cursor(cursor)
+        keyset_clause = (
+            "AND (i.DischargeDateTime < ? "
+            "OR (i.DischargeDateTime = ? AND i.InpatientSID < ?))"
+        )
+        params.extend([after_discharge, after_discharge, after_inpatient_sid])
+
+    # Query inpatient admissions/discharges with patient demographics and admitting specialty
+    # Admitting treating specialty comes from earliest SpecialtyTransfer (501 record)
+    # joined to Dim.TreatingSpecialty using TreatingSpecialtySID
+    query = f"""
+    SELECT {top_clause}
+        i.InpatientSID,
+        i.PatientSID,
+        i.PTFIEN as AdmissionID,
+        CAST(i.PatientSID AS VARCHAR(20)) as PatientID,
+        p.PatientName,
+        p.PatientSSN,
+        p.ScrSSN,
+        COALESCE(admitting_spec.Specialty, 'UNKNOWN') as AdmittingTreatingSpecialty,
+        i.AdmitDateTime as AdmissionDate,
+        i.DischargeDateTime as DischargeDate,
+        i.AdmitDiagnosis as AdmittingDiagnosis,
+        CASE 
+            WHEN i.PrincipalDiagnosisICD10SID IS NOT NULL THEN 'ICD10'
+            WHEN i.PrincipalDiagnosisICD9SID IS NOT NULL THEN 'ICD9'
+            ELSE 'Not Coded'
+        END as DischargeDiagnosis,
+        DATEDIFF(day, i.AdmitDateTime, i.DischargeDateTime) as LOS,
+        i.Sta3n as Station
+    FROM {table_ref} i
+    LEFT JOIN {patient_table} p ON i.PatientSID = p.PatientSID
+    OUTER APPLY (
+        -- First (admitting) specialty transfer of this admission only; a seek on
+        -- InpatientSID per admission in the date range instead of ranking every
+        -- row of SpecialtyTransfer (see tools/benchmark_admitting_specialty.py)
+        SELECT TOP 1 st.TreatingSpecialtySID
+        FROM {specialty_transfer_table} st
+        WHERE st.InpatientSID = i.InpatientSID
+          AND st.TreatingSpecialtySID IS NOT NULL AND st.TreatingSpecialtySID > 0
+        ORDER BY st.SpecialtyTransferDateTime ASC
+    ) first_transfer
+    LEFT JOIN {treating_specialty_table} admitting_spec
+        ON first_transfer.TreatingSpecialtySID = admitting_spec.TreatingSpecialtySID
+    WHERE i.DischargeDateTime >= ?
+      AND i.DischargeDateTime < ?
+      AND i.Sta3n = ?
+      AND i.DischargeDateTime IS NOT NULL
+      AND i.AdmitDateTime IS NOT NULL
+      {specialty_clause}
+      {keyset_clause}
+    ORDER BY i.DischargeDateTime DESC, i.InpatientSID DESC
+    """
+    return query, tuple(params)
+
+
+# Upper bound on a single page of the discharged-patient search
+MAX_DISCHARGE_PAGE_SIZE = 500
+
 
 @app.post("/api/patients/discharged")
-async def get_discharged_patients(request: DateRangeRequest):
+def get_discharged_patients(request: DateRangeRequest):
     """
     Get list of patients discharged within the specified date range.
 
+    Declared as a plain function so FastAPI runs it on the threadpool with its
+    own pooled connection instead of blocking the event loop.
+
+    Results are paged newest discharge first: when has_more is true, send
+    next_cursor back as cursor (with the same criteria) for the next page.
+
     NOTE: This query will need to be updated once we identify the correct
     discharge table in the LSV schema.
     """
     username = get_username()
+    conn = None
 
     try:
-        conn = get_db_connection()
+        conn = acquire_db_connection()
         discharge_table = db_config.get("tables", {}).get("discharge_table")
         station = db_config.get("extraction_settings", {}).get("station_focus", 626)
 
@@ -761,91 +1246,35 @@ async def get_discharged_patients(request: DateRangeRequest):
         else:
             table_ref = get_table_reference(discharge_table)
 
-        # Get other table references from config
-        patient_table = get_table_reference("SPatient.SPatient")
-        ward_table = get_table_reference("Inpat.Inpatient")  # Using base inpatient table
-        specialty_transfer_table = get_table_reference("Inpat.SpecialtyTransfer")
-        treating_specialty_table = get_table_reference("Dim.TreatingSpecialty")
-        
-        # Query inpatient admissions/discharges with patient demographics and admitting specialty
-        # Admitting treating specialty comes from earliest SpecialtyTransfer (501 record)
-        # joined to Dim.TreatingSpecialty using TreatingSpecialtySID
-        # Specialty filter is applied AFTER query (in Python, below)
-        query = f"""
-        SELECT TOP 100
-            i.InpatientSID,
-            i.PatientSID,
-            i.PTFIEN as AdmissionID,
-            CAST(i.PatientSID AS VARCHAR(20)) as PatientID,
-            p.PatientName,
-            p.PatientSSN,
-            p.ScrSSN,
-            COALESCE(admitting_spec.Specialty, 'UNKNOWN') as AdmittingTreatingSpecialty,
-            i.AdmitDateTime as AdmissionDate,
-            i.DischargeDateTime as DischargeDate,
-            i.AdmitDiagnosis as AdmittingDiagnosis,
-            CASE 
-                WHEN i.PrincipalDiagnosisICD10SID IS NOT NULL THEN 'ICD10'
-                WHEN i.PrincipalDiagnosisICD9SID IS NOT NULL THEN 'ICD9'
-                ELSE 'Not Coded'
-            END as DischargeDiagnosis,
-            DATEDIFF(day, i.AdmitDateTime, i.DischargeDateTime) as LOS,
-            i.Sta3n as Station
-        FROM {table_ref} i
-        LEFT JOIN {patient_table} p ON i.PatientSID = p.PatientSID
-        LEFT JOIN (
-            -- Get the first (admitting) specialty transfer for each admission
-            SELECT 
-                ranked.InpatientSID,
-                ranked.TreatingSpecialtySID,
-                ts.Specialty
-            FROM (
-                SELECT 
-                    st.InpatientSID,
-                    st.TreatingSpecialtySID,
-                    ROW_NUMBER() OVER (PARTITION BY st.InpatientSID ORDER BY st.SpecialtyTransferDateTime ASC) as rn
-                FROM {specialty_transfer_table} st
-                WHERE st.TreatingSpecialtySID IS NOT NULL AND st.TreatingSpecialtySID > 0
-            ) ranked
-            INNER JOIN {treating_specialty_table} ts 
-                ON ranked.TreatingSpecialtySID = ts.TreatingSpecialtySID
-            WHERE ranked.rn = 1
-        ) admitting_spec ON i.InpatientSID = admitting_spec.InpatientSID
-        WHERE i.DischargeDateTime >= '{request.start_date}'
-          AND i.DischargeDateTime < DATEADD(day, 1, '{request.end_date}')
-          AND i.Sta3n = {station}
-          AND i.DischargeDateTime IS NOT NULL
-          AND i.AdmitDateTime IS NOT NULL
-        ORDER BY i.DischargeDateTime DESC
-        """
+        # Specialty filter and paging are applied in SQL; one extra row tells
+        # us whether another page follows
+        page_size = max(1, min(int(request.page_size or 100), MAX_DISCHARGE_PAGE_SIZE))
+        query, query_params = build_discharged_patients_query(
+            table_ref,
+            request.start_date,
+            request.end_date,
+            station,
+            specialties=request.specialties,
+            top=page_size + 1,
+            cursor=request.cursor
+        )
 
         # Log the search parameters
-        logger.info(f"Searching discharged patients: date_range={request.start_date} to {request.end_date}, specialties={request.specialties}")
+        logger.info(
+            f"Searching discharged patients: date_range={request.start_date} to {request.end_date}, "
+            f"specialties={request.specialties}, page_size={page_size}, cursor={'yes' if request.cursor else 'no'}"
+        )
 
         # Execute query with timing
         start_time = time.time()
-        result = conn.execute_query(query)
+        result = conn.execute_query(query, params=query_params)
         execution_time_ms = (time.time() - start_time) * 1000
 
-        # Apply specialty filter AFTER query (in Python)
-        # Only filter if specialties are actually selected (non-empty list)
-        if request.specialties is not None and len(request.specialties) > 0 and result.get("rows"):
-            original_count = len(result["rows"])
-            selected_specialties = {
-                s.strip().upper() for s in request.specialties if s and s.strip()
-            }
-            logger.info(
-                f"Specialty filter: filtering {original_count} patients by specialties: {sorted(selected_specialties)}"
-            )
-            result["rows"] = [
-                row for row in result["rows"]
-                if row.get("AdmittingTreatingSpecialty", "").strip().upper() in selected_specialties
-            ]
-            filtered_count = len(result["rows"])
-            logger.info(f"Specialty filter applied: {original_count} patients → {filtered_count} patients")
-            result["row_count"] = filtered_count
-        else:
-            logger.info(f"No specialty filter applied - specialties list: {request.specialties}")
+        next_cursor = None
+        if result.get("success") and len(result.get("rows") or []) > page_size:
+            result["rows"] = result["rows"][:page_size]
+            result["row_count"] = page_size
+            next_cursor = encode_discharge_cursor(result["rows"][-1])
 
         # Sanitize results for logging (remove PII, keep non-PII identifiers)
         sanitized_results = []
@@ -864,7 +1293,10 @@ async def get_discharged_patients(request: DateRangeRequest):
                 "start_date": request.start_date,
                 "end_date": request.end_date,
                 "station": station,
-                "discharge_table": discharge_table
+                "discharge_table": discharge_table,
+                "specialties": request.specialties,
+                "page_size": page_size,
+                "cursor": request.cursor
             },
             success=result["success"],
             results=sanitized_results,  # Use sanitized results
@@ -887,19 +1319,14 @@ async def get_discharged_patients(request: DateRangeRequest):
         )
 
         # Apply specialty mapping to convert database codes to display names
-        if result.get("rows"):
-            for patient in result["rows"]:
-                if "AdmittingTreatingSpecialty" in patient:
-                    patient["AdmittingTreatingSpecialtyRaw"] = patient["AdmittingTreatingSpecialty"]
-                    patient["AdmittingTreatingSpecialty"] = map_specialty_display(
-                        specialty_desc=patient["AdmittingTreatingSpecialty"],
-                        los_in_service=patient.get("LOS")
-                    )
+        apply_specialty_display(result.get("rows", []))
 
         return {
             "success": True,
             "patients": result.get("rows", []),
             "count": len(result.get("rows", [])),
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
             "date_range": {
                 "start": request.start_date,
                 "end": request.end_date
@@ -918,6 +1345,27 @@ async def get_discharged_patients(request: DateRangeRequest):
             "count": 0,
             "error": str(e)
         }
+    finally:
+        if conn is not None:
+            get_db_pool().release(conn)
+
+
+# Notes carry full ReportText (often tens of KB each); fetch them in small batches
+NOTES_FETCH_BATCH_SIZE = 50
+
+# Connection budget: a review runs EXTRACTION_QUERIES_PER_REVIEW extraction
+# queries, but on at most pool max_size // expected_concurrent_reviews pooled
+# connections at once (queries beyond that wait for one of the review's own
+# workers). With the configured max_size of 20 and 10 concurrent reviews, each
+# review extracts on 2 connections and the pool covers every review without
+# any of them queuing for acquire_timeout_seconds.
+EXTRACTION_QUERIES_PER_REVIEW = 4
+db_pool_settings = db_config.get("connection_defaults", {}).get("pool", {})
+pool_max_size = db_pool_settings.get("max_size", 10)
+EXTRACTION_CONNECTIONS_PER_REVIEW = max(1, min(
+    EXTRACTION_QUERIES_PER_REVIEW,
+    pool_max_size // max(1, db_pool_settings.get("expected_concurrent_reviews", 10))
+))
 
 
 def _run_review_task(
@@ -929,7 +1377,12 @@ def _run_review_task(
     """
     Background task for review processing.
     Runs asynchronously so progress polling can continue.
+
+    Database work runs on connections borrowed from the shared pool. The
+    independent extraction queries run concurrently, and no connection is
+    held during the long AI analysis phase.
     """
+    conn = None
     try:
         # Validate request parameters
         if not request or not hasattr(request, 'patient_id') or not hasattr(request, 'admission_id'):
@@ -943,12 +1396,13 @@ def _run_review_task(
         update_progress(review_id, 5, "Loading patient admission data...")
         logger.info(f"Starting review {review_id} for patient={normalized_patient_id}, admission={normalized_admission_id}")
 
-        conn = get_db_connection()
+        conn = acquire_db_connection()
         if not conn or not conn.is_connected:
             fail_review(review_id, "Unable to connect to database")
             raise HTTPException(status_code=500, detail="Unable to connect to database")
 
         # Resolve admission (InpatientSID) and date window
+        lookup_started = time.perf_counter()
         inpat_table = get_table_reference("Inpat.Inpatient")
         admission_lookup = f"""
         SELECT TOP 1
@@ -993,6 +1447,7 @@ def _run_review_task(
             raise HTTPException(status_code=404, detail="Admission not found for provided identifiers")
         
         admission_info = admission_res["rows"][0]
+        review_stage_seconds.observe(time.perf_counter() - lookup_started, stage="admission_lookup")
         inpatient_sid = admission_info.get("InpatientSID")
         admission_start = admission_info.get("AdmitDateTime")
         admission_end = admission_info.get("DischargeDateTime") or admission_start
@@ -1007,9 +1462,10 @@ def _run_review_task(
         )
 
         # ================================================================
-        # Step 1: Extract Clinical Notes
+        # Build Extraction Queries
+        # Notes, vitals, labs and PTF diagnoses depend only on the resolved
+        # admission window, so they run concurrently on pooled connections.
         # ================================================================
-        step_start = time.time()
         # Provider classes to include - notes authored by these provider types
         provider_classes_to_include = [
             "PHYSICIAN",
@@ -1044,74 +1500,183 @@ def _run_review_task(
         ]
 
         text_column = None
-        column_query = """
-        SELECT COLUMN_NAME
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = 'TIU' AND TABLE_NAME = 'TIUDocument'
+        # Column metadata is cached across reviews (see SchemaCache)
+        tiu_columns = schema_cache.get_columns(conn, "TIU.TIUDocument")
+        if tiu_columns:
+            available_columns = set(tiu_columns)
+            for candidate in ["ReportText", "NoteText", "DocumentText", "TIUText", "Text"]:
+                if candidate in available_columns:
+                    text_column = candidate
+                    break
+        note_text_expression = f"td.[{text_column}]" if text_column else "CAST(NULL as varchar(max))"
+
+        # Build fully qualified table references
+        tiu_doc_table = get_table_reference("TIU.TIUDocument")
+        tiu_def_table = get_table_reference("Dim.TIUDocumentDefinition")
+        note_text_table = get_table_reference("STIUNotes.TIUDocument_8925")
+        staff_table = get_table_reference("Dim.Staff")
+
+
+        # Use COALESCE with multiple name column options for Dim.Staff
+        # Most common columns in CDW are StaffName or FullName
+        staff_name_expression = "COALESCE(s.[StaffName], s.[FullName], s.[PersonName], CAST(td.SignedByStaffSID AS VARCHAR(50)), 'Unknown Author')"
+        # Build IN clause for provider classes
+        provider_class_placeholders = ", ".join(["?" for _ in provider_classes_to_include])
+
+        notes_query = f"""
+        SELECT TOP 200
+            td.TIUDocumentSID as NoteID,
+            ddef.TIUDocumentDefinitionPrintName as NoteType,
+            td.ReferenceDateTime as NoteDateTime,
+            td.SignedByStaffSID as AuthorStaffSID,
+            td.CosignedByStaffSID as CosignedByStaffSID,
+            td.SignatureDateTime,
+            txt.ReportText as NoteText,
+            COALESCE(s.[ProviderClass], 'UNKNOWN') as AuthorProviderClass,
+            {staff_name_expression} as AuthorName
+        FROM {tiu_doc_table} td
+        LEFT JOIN {tiu_def_table} ddef
+            ON td.TIUDocumentDefinitionSID = ddef.TIUDocumentDefinitionSID
+        INNER JOIN {note_text_table} txt
+            ON td.TIUDocumentSID = txt.TIUDocumentSID
+        LEFT JOIN {staff_table} s
+            ON td.SignedByStaffSID = s.StaffSID
+        WHERE td.PatientSID = TRY_CAST(? as int)
+          AND td.ReferenceDateTime >= ?
+          AND ( ? IS NULL OR td.ReferenceDateTime <= ? )
+          AND txt.ReportText IS NOT NULL
+        ORDER BY td.ReferenceDateTime DESC
+        """
+
+        notes_params = (
+            normalized_patient_id,
+            admission_start,
+            admission_end,
+            admission_end,
+        )
+
+        vital_table = get_table_reference(db_config.get("tables", {}).get("vitals_table", "Vital.VitalSign"))
+        vital_type_table = get_table_reference("Dim.VitalType")
+        vitals_query = f"""
+        SELECT
+            vs.VitalSignSID,
+            vs.PatientSID,
+            vs.Sta3n,
+            vs.VitalSignTakenDateTime AS TakenDateTime,
+            vs.VitalSignTakenDateTime AS EnteredDateTime,
+            vs.VitalTypeSID,
+            vt.VitalType,
+            vs.VitalResult,
+            vs.VitalResultNumeric
+        FROM {vital_table} vs
+        LEFT JOIN {vital_type_table} vt
+            ON vs.VitalTypeSID = vt.VitalTypeSID
+        WHERE vs.PatientSID = TRY_CAST(? as int)
+          AND vs.Sta3n = ?
+          AND vs.VitalSignTakenDateTime BETWEEN ? AND DATEADD(day, 1, ?)
+        ORDER BY vs.VitalSignTakenDateTime
+        """
+
+        labs_table = get_table_reference(db_config.get("tables", {}).get("labs_table", "Chem.LabChem"))
+        lab_test_table = get_table_reference("Dim.LabChemTest")
+        labs_query = f"""
+        SELECT
+            lc.LabChemSID,
+            lc.PatientSID,
+            lc.Sta3n,
+            lc.LabChemSpecimenDateTime,
+            lc.LabChemCompleteDateTime,
+            lc.LabChemTestSID,
+            dlt.LabChemTestName,
+            lc.LabChemResultValue,
+            lc.LabChemResultNumericValue,
+            lc.Units as ResultUnits,
+            lc.RefLow,
+            lc.RefHigh,
+            lc.Abnormal,
+            lc.LOINCSID
+        FROM {labs_table} lc
+        LEFT JOIN {lab_test_table} dlt
+            ON lc.LabChemTestSID = dlt.LabChemTestSID
+        WHERE lc.PatientSID = TRY_CAST(? as int)
+          AND lc.Sta3n = ?
+          AND lc.LabChemSpecimenDateTime BETWEEN ? AND DATEADD(day, 1, ?)
+        ORDER BY lc.LabChemSpecimenDateTime
+        """
+
+        ptf_table = get_table_reference(db_config.get("tables", {}).get("ptf_diagnoses_table", "Inpat.InpatientDischargeDiagnosis"))
+        icd10_table = get_table_reference("Dim.ICD10")
+        icd9_table = get_table_reference("Dim.ICD9")
+        icd10_desc_table = get_table_reference("Dim.ICD10DiagnosisVersion")
+        icd9_desc_table = get_table_reference("Dim.ICD9DiagnosisVersion")
+
+        diagnoses_query = f"""
+        SELECT
+            dd.InpatientDischargeDiagnosisSID,
+            dd.InpatientSID,
+            dd.PTFIEN,
+            dd.OrdinalNumber as DiagnosisSequence,
+            dd.ICD10SID,
+            dd.ICD9SID,
+            COALESCE(icd10.ICD10Code, icd9.ICD9Code, 'UNKNOWN') as ICD10Code,
+            COALESCE(icd10_desc.ICD10Diagnosis, icd9_desc.ICD9Diagnosis, 'No description available') as DiagnosisDescription,
+            CASE 
+                WHEN dd.ICD10SID IS NOT NULL AND dd.ICD10SID > 0 THEN 'ICD-10'
+                WHEN dd.ICD9SID IS NOT NULL AND dd.ICD9SID > 0 THEN 'ICD-9'
+                ELSE 'UNCODED'
+            END as CodeSystem
+        FROM {ptf_table} dd
+        LEFT JOIN {icd10_table} icd10 ON dd.ICD10SID = icd10.ICD10SID
+        LEFT JOIN {icd9_table} icd9 ON dd.ICD9SID = icd9.ICD9SID
+        LEFT JOIN {icd10_desc_table} icd10_desc 
+            ON dd.ICD10SID = icd10_desc.ICD10SID 
+            AND icd10_desc.CurrentVersionFlag = 'Y'
+        LEFT JOIN {icd9_desc_table} icd9_desc 
+            ON dd.ICD9SID = icd9_desc.ICD9SID 
+            AND icd9_desc.CurrentVersionFlag = 'Y'
+        WHERE (dd.PTFIEN = ? OR dd.InpatientSID = TRY_CAST(? as bigint))
+          AND dd.Sta3n = ?
+        ORDER BY dd.OrdinalNumber
         """
-        column_result = conn.execute_query(column_query)
-        if not isinstance(column_result, dict):
-            logger.error(f"column_result is not a dict, got {type(column_result)}")
-            raise HTTPException(status_code=500, detail="Column query returned invalid response")
-        if column_result.get("success") and column_result.get("rows"):
-            available_columns = {row["COLUMN_NAME"] for row in column_result["rows"]}
-            for candidate in ["ReportText", "NoteText", "DocumentText", "TIUText", "Text"]:
-                if candidate in available_columns:
-                    text_column = candidate
-                    break
-        note_text_expression = f"td.[{text_column}]" if text_column else "CAST(NULL as varchar(max))"
-
-        # Build fully qualified table references
-        tiu_doc_table = get_table_reference("TIU.TIUDocument")
-        tiu_def_table = get_table_reference("Dim.TIUDocumentDefinition")
-        note_text_table = get_table_reference("STIUNotes.TIUDocument_8925")
-        staff_table = get_table_reference("Dim.Staff")
 
+        # Hand the lookup connection back so the parallel stage can use it
+        get_db_pool().release(conn)
+        conn = None
 
-        # Use COALESCE with multiple name column options for Dim.Staff
-        # Most common columns in CDW are StaffName or FullName
-        staff_name_expression = "COALESCE(s.[StaffName], s.[FullName], s.[PersonName], CAST(td.SignedByStaffSID AS VARCHAR(50)), 'Unknown Author')"
-        # Build IN clause for provider classes
-        provider_class_placeholders = ", ".join(["?" for _ in provider_classes_to_include])
-
-        notes_query = f"""
-        SELECT TOP 200
-            td.TIUDocumentSID as NoteID,
-            ddef.TIUDocumentDefinitionPrintName as NoteType,
-            td.ReferenceDateTime as NoteDateTime,
-            td.SignedByStaffSID as AuthorStaffSID,
-            td.CosignedByStaffSID as CosignedByStaffSID,
-            td.SignatureDateTime,
-            txt.ReportText as NoteText,
-            COALESCE(s.[ProviderClass], 'UNKNOWN') as AuthorProviderClass,
-            {staff_name_expression} as AuthorName
-        FROM {tiu_doc_table} td
-        LEFT JOIN {tiu_def_table} ddef
-            ON td.TIUDocumentDefinitionSID = ddef.TIUDocumentDefinitionSID
-        INNER JOIN {note_text_table} txt
-            ON td.TIUDocumentSID = txt.TIUDocumentSID
-        LEFT JOIN {staff_table} s
-            ON td.SignedByStaffSID = s.StaffSID
-        WHERE td.PatientSID = TRY_CAST(? as int)
-          AND td.ReferenceDateTime >= ?
-          AND ( ? IS NULL OR td.ReferenceDateTime <= ? )
-          AND txt.ReportText IS NOT NULL
-        ORDER BY td.ReferenceDateTime DESC
-        """
+        extraction_progress_messages = {
+            "notes": ("Extract Clinical Notes", "clinical notes"),
+            "vitals": ("Extract Vitals", "vital sign measurements"),
+            "labs": ("Extract Labs", "laboratory values"),
+            "diagnoses": ("Extract Diagnoses", "coded diagnoses")
+        }
 
-        notes_params = (
-            normalized_patient_id,
-            admission_start,
-            admission_end,
-            admission_end,
+        def _on_extraction_complete(name: str, result: Dict[str, Any], completed: int) -> None:
+            step_name, label = extraction_progress_messages[name]
+            update_progress(review_id, 15 + completed * 10, f"Extracted {result.get('row_count', 0)} {label}")
+            mark_step_complete(review_id, step_name)
+
+        update_progress(review_id, 10, "Extracting notes, vitals, labs and coded diagnoses...")
+        extraction_results = run_extraction_queries(
+            get_db_pool(),
+            {
+                "notes": {"query": notes_query, "params": notes_params, "batch_size": NOTES_FETCH_BATCH_SIZE},
+                "vitals": {"query": vitals_query, "params": (normalized_patient_id, station, admission_start, admission_end), "frame": VITALS_FRAME_TYPES},
+                "labs": {"query": labs_query, "params": (normalized_patient_id, station, admission_start, admission_end), "frame": LABS_FRAME_TYPES},
+                "diagnoses": {"query": diagnoses_query, "params": (normalized_admission_id, inpatient_sid, station)}
+            },
+            max_workers=EXTRACTION_CONNECTIONS_PER_REVIEW,
+            on_complete=_on_extraction_complete
         )
+        for name, result in extraction_results.items():
+            review_stage_seconds.observe(
+                result.get("execution_time_ms", 0) / 1000,
+                stage="ptf" if name == "diagnoses" else name
+            )
 
-        notes_result = conn.execute_query(notes_query, params=notes_params)
-        if not isinstance(notes_result, dict):
-            logger.error(f"notes_result is not a dict, got {type(notes_result)}: {notes_result}")
-            fail_review(review_id, "Notes query returned invalid response")
-            raise HTTPException(status_code=500, detail="Database query returned invalid response")
-        
+        # ================================================================
+        # Step 1: Clinical Notes
+        # ================================================================
+        notes_result = extraction_results["notes"]
         if not notes_result.get("success"):
             logger.warning(f"Notes extraction query failed: {notes_result.get('error')}. Continuing with empty notes.")
             log_error_event(
@@ -1127,9 +1692,6 @@ def _run_review_task(
         else:
             clinical_notes = notes_result.get("rows", []) or []
         
-        update_progress(review_id, 15, f"Extracted {len(clinical_notes)} clinical notes")
-        mark_step_complete(review_id, "Extract Clinical Notes")
-
         # Enrich notes: add character counts and provider role tags (best-effort)
         staff_sids = set()
         for note in clinical_notes:
@@ -1140,7 +1702,8 @@ def _run_review_task(
             if note.get("CosignedByStaffSID"):
                 staff_sids.add(note["CosignedByStaffSID"])
 
-        provider_roles = classify_provider_roles(conn, list(staff_sids))
+        # Served from the local staff role index; only new StaffSIDs hit the database
+        provider_roles = classify_provider_roles(list(staff_sids))
         for note in clinical_notes:
             author_sid = note.get("AuthorStaffSID")
             cosigner_sid = note.get("CosignedByStaffSID")
@@ -1167,7 +1730,7 @@ def _run_review_task(
             results=clinical_notes,
             error=notes_result.get("error"),
             row_count=len(clinical_notes),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=notes_result["execution_time_ms"]
         )
         
         query_logger.log_evaluation_step(
@@ -1180,53 +1743,20 @@ def _run_review_task(
             input_data={"patient_id": request.patient_id},
             output_data={"notes_count": len(clinical_notes)},
             error=notes_result.get("error"),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=notes_result["execution_time_ms"]
         )
 
         # ================================================================
-        # Step 2: Extract Vital Signs
+        # Step 2: Vital Signs
         # ================================================================
-        step_start = time.time()
-        vital_table = get_table_reference(db_config.get("tables", {}).get("vitals_table", "Vital.VitalSign"))
-        vital_type_table = get_table_reference("Dim.VitalType")
-        vitals_query = f"""
-        SELECT
-            vs.VitalSignSID,
-            vs.PatientSID,
-            vs.Sta3n,
-            vs.VitalSignTakenDateTime AS TakenDateTime,
-            vs.VitalSignTakenDateTime AS EnteredDateTime,
-            vs.VitalTypeSID,
-            vt.VitalType,
-            vs.VitalResult,
-            vs.VitalResultNumeric
-        FROM {vital_table} vs
-        LEFT JOIN {vital_type_table} vt
-            ON vs.VitalTypeSID = vt.VitalTypeSID
-        WHERE vs.PatientSID = TRY_CAST(? as int)
-          AND vs.Sta3n = ?
-          AND vs.VitalSignTakenDateTime BETWEEN ? AND DATEADD(day, 1, ?)
-        ORDER BY vs.VitalSignTakenDateTime
-        """
-
-        vitals_result = conn.execute_query(
-            vitals_query,
-            params=(normalized_patient_id, station, admission_start, admission_end)
-        )
-        if not isinstance(vitals_result, dict):
-            logger.error(f"vitals_result is not a dict, got {type(vitals_result)}")
-            fail_review(review_id, "Vitals query returned invalid response")
-            raise HTTPException(status_code=500, detail="Vitals query returned invalid response")
-        
+        vitals_result = extraction_results["vitals"]
         if not vitals_result.get("success"):
             logger.warning(f"Vitals extraction query failed: {vitals_result.get('error')}. Continuing with empty vitals.")
-            vitals = []
+            vitals = empty_frame()
         else:
-            vitals = vitals_result.get("rows", []) or []
+            # Typed DataFrame (native float/datetime columns), see app.database.frames
+            vitals = vitals_result["frame"]
         
-        update_progress(review_id, 30, f"Extracted {len(vitals)} vital sign measurements")
-        mark_step_complete(review_id, "Extract Vitals")
-
         query_logger.log_query(
             query_type="EXTRACT_VITALS",
             username=username,
@@ -1238,10 +1768,10 @@ def _run_review_task(
                 "end_plus1": admission_end
             },
             success=vitals_result["success"],
-            results=vitals,
+            results=frame_to_records(vitals.head(3)),
             error=vitals_result.get("error"),
             row_count=len(vitals),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=vitals_result["execution_time_ms"]
         )
 
         query_logger.log_evaluation_step(
@@ -1254,55 +1784,19 @@ def _run_review_task(
             input_data={"patient_id": request.patient_id},
             output_data={"vitals_count": len(vitals)},
             error=vitals_result.get("error"),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=vitals_result["execution_time_ms"]
         )
 
         # ================================================================
-        # Step 3: Extract Laboratory Values
+        # Step 3: Laboratory Values
         # ================================================================
-        labs_table = get_table_reference(db_config.get("tables", {}).get("labs_table", "Chem.LabChem"))
-        lab_test_table = get_table_reference("Dim.LabChemTest")
-        step_start = time.time()
-        labs_query = f"""
-        SELECT
-            lc.LabChemSID,
-            lc.PatientSID,
-            lc.Sta3n,
-            lc.LabChemSpecimenDateTime,
-            lc.LabChemCompleteDateTime,
-            lc.LabChemTestSID,
-            dlt.LabChemTestName,
-            lc.LabChemResultValue,
-            lc.LabChemResultNumericValue,
-            lc.Units as ResultUnits,
-            lc.LOINCSID
-        FROM {labs_table} lc
-        LEFT JOIN {lab_test_table} dlt
-            ON lc.LabChemTestSID = dlt.LabChemTestSID
-        WHERE lc.PatientSID = TRY_CAST(? as int)
-          AND lc.Sta3n = ?
-          AND lc.LabChemSpecimenDateTime BETWEEN ? AND DATEADD(day, 1, ?)
-        ORDER BY lc.LabChemSpecimenDateTime
-        """
-
-        labs_result = conn.execute_query(
-            labs_query,
-            params=(normalized_patient_id, station, admission_start, admission_end)
-        )
-        if not isinstance(labs_result, dict):
-            logger.error(f"labs_result is not a dict, got {type(labs_result)}")
-            fail_review(review_id, "Labs query returned invalid response")
-            raise HTTPException(status_code=500, detail="Labs query returned invalid response")
-        
+        labs_result = extraction_results["labs"]
         if not labs_result.get("success"):
             logger.warning(f"Labs extraction query failed: {labs_result.get('error')}. Continuing with empty labs.")
-            labs = []
+            labs = empty_frame()
         else:
-            labs = labs_result.get("rows", []) or []
+            labs = labs_result["frame"]
         
-        update_progress(review_id, 45, f"Extracted {len(labs)} laboratory values")
-        mark_step_complete(review_id, "Extract Labs")
-
         query_logger.log_query(
             query_type="EXTRACT_LABS",
             username=username,
@@ -1314,10 +1808,10 @@ def _run_review_task(
                 "end_plus1": admission_end
             },
             success=labs_result["success"],
-            results=labs,
+            results=frame_to_records(labs.head(3)),
             error=labs_result.get("error"),
             row_count=len(labs),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=labs_result["execution_time_ms"]
         )
 
         query_logger.log_evaluation_step(
@@ -1330,66 +1824,19 @@ def _run_review_task(
             input_data={"patient_id": request.patient_id},
             output_data={"labs_count": len(labs)},
             error=labs_result.get("error"),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=labs_result["execution_time_ms"]
         )
 
         # ================================================================
-        # Step 4: Extract Coded Diagnoses (PTF)
+        # Step 4: Coded Diagnoses (PTF)
         # ================================================================
-        ptf_table = get_table_reference(db_config.get("tables", {}).get("ptf_diagnoses_table", "Inpat.InpatientDischargeDiagnosis"))
-        icd10_table = get_table_reference("Dim.ICD10")
-        icd9_table = get_table_reference("Dim.ICD9")
-        icd10_desc_table = get_table_reference("Dim.ICD10DiagnosisVersion")
-        icd9_desc_table = get_table_reference("Dim.ICD9DiagnosisVersion")
-        
-        step_start = time.time()
-        diagnoses_query = f"""
-        SELECT
-            dd.InpatientDischargeDiagnosisSID,
-            dd.InpatientSID,
-            dd.PTFIEN,
-            dd.OrdinalNumber as DiagnosisSequence,
-            dd.ICD10SID,
-            dd.ICD9SID,
-            COALESCE(icd10.ICD10Code, icd9.ICD9Code, 'UNKNOWN') as ICD10Code,
-            COALESCE(icd10_desc.ICD10Diagnosis, icd9_desc.ICD9Diagnosis, 'No description available') as DiagnosisDescription,
-            CASE 
-                WHEN dd.ICD10SID IS NOT NULL AND dd.ICD10SID > 0 THEN 'ICD-10'
-                WHEN dd.ICD9SID IS NOT NULL AND dd.ICD9SID > 0 THEN 'ICD-9'
-                ELSE 'UNCODED'
-            END as CodeSystem
-        FROM {ptf_table} dd
-        LEFT JOIN {icd10_table} icd10 ON dd.ICD10SID = icd10.ICD10SID
-        LEFT JOIN {icd9_table} icd9 ON dd.ICD9SID = icd9.ICD9SID
-        LEFT JOIN {icd10_desc_table} icd10_desc 
-            ON dd.ICD10SID = icd10_desc.ICD10SID 
-            AND icd10_desc.CurrentVersionFlag = 'Y'
-        LEFT JOIN {icd9_desc_table} icd9_desc 
-            ON dd.ICD9SID = icd9_desc.ICD9SID 
-            AND icd9_desc.CurrentVersionFlag = 'Y'
-        WHERE (dd.PTFIEN = ? OR dd.InpatientSID = TRY_CAST(? as bigint))
-          AND dd.Sta3n = ?
-        ORDER BY dd.OrdinalNumber
-        """
-
-        diagnoses_result = conn.execute_query(
-            diagnoses_query,
-            params=(normalized_admission_id, inpatient_sid, station)
-        )
-        if not isinstance(diagnoses_result, dict):
-            logger.error(f"diagnoses_result is not a dict, got {type(diagnoses_result)}")
-            fail_review(review_id, "Diagnoses query returned invalid response")
-            raise HTTPException(status_code=500, detail="Diagnoses query returned invalid response")
-        
+        diagnoses_result = extraction_results["diagnoses"]
         if not diagnoses_result.get("success"):
             logger.warning(f"Diagnoses extraction query failed: {diagnoses_result.get('error')}. Continuing with empty diagnoses.")
             coded_diagnoses = []
         else:
             coded_diagnoses = diagnoses_result.get("rows", []) or []
         
-        update_progress(review_id, 55, f"Extracted {len(coded_diagnoses)} coded diagnoses")
-        mark_step_complete(review_id, "Extract Diagnoses")
-
         query_logger.log_query(
             query_type="EXTRACT_PTF_DIAGNOSES",
             username=username,
@@ -1403,7 +1850,7 @@ def _run_review_task(
             results=coded_diagnoses,
             error=diagnoses_result.get("error"),
             row_count=len(coded_diagnoses),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=diagnoses_result["execution_time_ms"]
         )
 
         query_logger.log_evaluation_step(
@@ -1416,7 +1863,7 @@ def _run_review_task(
             input_data={"patient_id": request.patient_id},
             output_data={"diagnosis_count": len(coded_diagnoses)},
             error=diagnoses_result.get("error"),
-            execution_time_ms=(time.time() - step_start) * 1000
+            execution_time_ms=diagnoses_result["execution_time_ms"]
         )
 
         # Log document extraction
@@ -1432,32 +1879,60 @@ def _run_review_task(
         # Step 5: AI Analysis of Clinical Notes
         # ================================================================
         update_progress(review_id, 60, "Running AI analysis on clinical documentation...")
-        
-        note_analyses = []
 
-        for note in clinical_notes:
-            # Analyze each note
-            analysis = va_gpt_client.analyze_clinical_note(
-                note_text=note.get("NoteText", ""),
-                note_type=note.get("NoteType", "Unknown"),
-                patient_context={
-                    "vitals": vitals,
-                    "labs": labs
-                }
-            )
+        # Notes are analyzed in parallel; processing.batch_size bounds the
+        # number of simultaneous LLM requests per review
+        processing_settings = app_config.get("processing", {})
+        note_concurrency = processing_settings.get("batch_size", 5)
 
-            if not isinstance(analysis, dict):
-                logger.error(f"analysis is not a dict for note {note.get('NoteID')}, got {type(analysis)}")
-                continue
-                
-            if analysis.get("success"):
-                note_analyses.append({
-                    "note_id": note.get("NoteID"),
-                    "note_type": note.get("NoteType"),
-                    "analysis": analysis.get("analysis")
-                })
+        # One vectorized pass reduces every vital type and lab test to its
+        # admission range, time-binned trend and out-of-range counts
+        clinical_trends = summarize_clinical_trends(
+            vitals, labs, bin_hours=processing_settings.get("trend_bin_hours", 24)
+        )
 
-        update_progress(review_id, 70, f"Analyzed {len(note_analyses)} clinical notes")
+        # Vitals/labs are indexed once; each note is given the readings nearest
+        # its NoteDateTime together with each test's admission trend
+        clinical_context = ClinicalContext(vitals=vitals, labs=labs, trends=clinical_trends)
+
+        # Size requests against the token budget: long notes are summarized
+        # (in chunks if needed), short neighbouring notes share a request
+        note_plan = plan_note_requests(
+            clinical_notes,
+            clinical_context,
+            summary_threshold_chars=processing_settings.get("note_summary_threshold_chars", 5000),
+            pack_below_chars=processing_settings.get("pack_notes_below_chars", 1500),
+            max_packed_chars=processing_settings.get("max_packed_request_chars", 8000),
+            pack_max_span_hours=processing_settings.get("pack_max_span_hours", 12),
+            summary_chunk_chars=processing_settings.get("summary_chunk_chars", 24000),
+            summary_target_chars=processing_settings.get("summary_target_chars", 2000)
+        )
+
+        def _on_note_analyzed(completed: int, total: int) -> None:
+            update_progress(review_id, 60 + int(10 * completed / total), f"Analyzed {completed}/{total} note requests")
+
+        if async_va_gpt_client and async_va_gpt_client.is_initialized() and main_event_loop:
+            note_analyses = asyncio.run_coroutine_threadsafe(
+                analyze_notes_async(
+                    async_va_gpt_client,
+                    note_plan["requests"],
+                    max_concurrency=note_concurrency,
+                    on_progress=_on_note_analyzed,
+                    use_cache=not request.bypass_cache
+                ),
+                main_event_loop
+            ).result()
+        else:
+            note_analyses = analyze_notes_concurrently(
+                va_gpt_client,
+                note_plan["requests"],
+                max_concurrency=note_concurrency,
+                on_progress=_on_note_analyzed,
+                use_cache=not request.bypass_cache
+            )
+
+        notes_analyzed = sum(len(a["note_ids"]) for a in note_analyses)
+        update_progress(review_id, 70, f"Analyzed {notes_analyzed} clinical notes in {len(note_analyses)} requests")
         mark_step_complete(review_id, "Analyze Clinical Notes")
 
         # ================================================================
@@ -1470,13 +1945,20 @@ def _run_review_task(
                 "error": "No clinical notes were extracted for this admission."
             }
         else:
-            consolidated = va_gpt_client.consolidate_analyses(
-                note_analyses=[a.get("analysis") for a in note_analyses if a.get("analysis")],
-                patient_info={
-                    "patient_id": request.patient_id,
-                    "admission_id": request.admission_id
-                }
-            )
+            # Tree reduction keeps each consolidation prompt bounded on long stays
+            with review_stage_seconds.time(stage="consolidation"):
+                consolidated = consolidate_hierarchically(
+                    va_gpt_client,
+                    note_analyses=[a.get("analysis") for a in note_analyses if a.get("analysis")],
+                    patient_info={
+                        "patient_id": request.patient_id,
+                        "admission_id": request.admission_id,
+                        "abnormal_vitals_and_labs": abnormal_trend_lines(clinical_trends)
+                    },
+                    group_size=processing_settings.get("consolidation_group_size", 12),
+                    max_group_chars=processing_settings.get("consolidation_max_group_chars", 60000),
+                    max_concurrency=note_concurrency
+                )
         
         if not isinstance(consolidated, dict):
             logger.error(f"consolidated is not a dict, got {type(consolidated)}")
@@ -1494,17 +1976,18 @@ def _run_review_task(
                 ai_diagnoses.append(cons["principal_diagnosis"])
             ai_diagnoses.extend(cons.get("secondary_diagnoses", []))
 
-        comparison = va_gpt_client.compare_diagnoses(
-            documented_diagnoses=ai_diagnoses,
-            coded_diagnoses=[
-                {
-                    "icd10": d.get("ICD10Code"),
-                    "description": d.get("DiagnosisDescription"),
-                    "sequence": d.get("DiagnosisSequence")
-                }
-                for d in coded_diagnoses
-            ]
-        )
+        with review_stage_seconds.time(stage="comparison"):
+            comparison = va_gpt_client.compare_diagnoses(
+                documented_diagnoses=ai_diagnoses,
+                coded_diagnoses=[
+                    {
+                        "icd10": d.get("ICD10Code"),
+                        "description": d.get("DiagnosisDescription"),
+                        "sequence": d.get("DiagnosisSequence")
+                    }
+                    for d in coded_diagnoses
+                ]
+            )
         
         if not isinstance(comparison, dict):
             logger.error(f"comparison is not a dict, got {type(comparison)}")
@@ -1513,6 +1996,31 @@ def _run_review_task(
         # Calculate processing time
         processing_time = time.time() - start_time
 
+        token_usage = build_token_report(
+            note_plan,
+            note_analyses,
+            other_usage={
+                "consolidation": consolidated.get("usage"),
+                "comparison": comparison.get("usage")
+            }
+        )
+        logger.info(
+            f"Review {review_id} tokens: projected {token_usage['projected_prompt_tokens']} prompt, "
+            f"actual {token_usage['actual_prompt_tokens']} prompt + {token_usage['actual_completion_tokens']} completion "
+            f"for note analysis; {token_usage['review_total_tokens']} total"
+        )
+        stage_usage = {
+            "note_analysis": {
+                "prompt_tokens": token_usage["actual_prompt_tokens"],
+                "completion_tokens": token_usage["actual_completion_tokens"]
+            },
+            "consolidation": consolidated.get("usage"),
+            "comparison": comparison.get("usage")
+        }
+        for stage, usage in stage_usage.items():
+            for kind in ("prompt", "completion"):
+                llm_tokens_total.inc((usage or {}).get(f"{kind}_tokens", 0), stage=stage, kind=kind)
+
         # Log analysis completion
         audit_logger.log_analysis_complete(
             username=username,
@@ -1565,24 +2073,45 @@ def _run_review_task(
                 "labs": len(labs)
             },
             "clinical_notes": clinical_notes,
-            "vitals_data": vitals,
-            "labs_data": labs,
+            # Column-wise ({"row_count", "columns": {name: [values]}}) to avoid repeating keys per row
+            "vitals_data": frame_to_columns(vitals),
+            "labs_data": frame_to_columns(labs),
+            "clinical_trends": clinical_trends,
             "ai_analysis": {
                 "consolidated": consolidated.get("consolidated") if isinstance(consolidated, dict) else None,
                 "diagnoses_found": len(ai_diagnoses)
             },
             "coded_diagnoses": coded_diagnoses,
             "comparison": comparison.get("comparison") if isinstance(comparison, dict) else None,
-            "recommendations": consolidated.get("consolidated", {}).get("recommendations", []) if isinstance(consolidated.get("consolidated"), dict) else []
+            "recommendations": consolidated.get("consolidated", {}).get("recommendations", []) if isinstance(consolidated.get("consolidated"), dict) else [],
+            "token_usage": token_usage
         }
         
         complete_review(review_id, review_result)
-
-    except HTTPException:
-        fail_review(review_id, str(review_id) if isinstance(review_id, str) else "Unknown error")
+        review_seconds.observe(processing_time)
+        reviews_total.inc(status="complete")
+
+    except HTTPException as e:
+        reviews_total.inc(status="error")
+        fail_review(review_id, str(e.detail) if e.detail else "Unknown error")
+    except (PoolExhaustedError, ConnectionError) as e:
+        # No usable connection for an extraction query: fail rather than review empty data
+        logger.error(f"Review {review_id} could not get a database connection: {e}")
+        log_error_event(
+            event_type="REVIEW_DATABASE_UNAVAILABLE",
+            message=str(e),
+            context={"review_id": review_id, "patient_id": request.patient_id, "admission_id": request.admission_id},
+            exc=e
+        )
+        reviews_total.inc(status="error")
+        fail_review(review_id, f"Database unavailable, please retry: {e}")
     except Exception as e:
         logger.error(f"Error in review process: {e}", exc_info=True)
+        reviews_total.inc(status="error")
         fail_review(review_id, str(e))
+    finally:
+        if conn is not None:
+            get_db_pool().release(conn)
 
 
 @app.post("/api/review/start")
@@ -1630,6 +2159,271 @@ async def start_review(request: ReviewRequest, background_tasks: BackgroundTasks
         raise HTTPException(status_code=500, detail="Failed to start review")
 
 
+# ============================================================================
+# Batch Cohort Review
+# ============================================================================
+
+def _run_batch_admission(review_id: str, item: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one batch admission through the normal review pipeline (synchronously).
+
+    Progress is tracked under review_id like any other review, so
+    /api/review/progress/{review_id} works for batch admissions too.
+    """
+    create_progress_tracker(review_id, batch_id=options.get("batch_id"))
+    review_request = ReviewRequest(
+        patient_id=item["patient_id"],
+        admission_id=item["admission_id"],
+        bypass_cache=bool(options.get("bypass_cache", False))
+    )
+    _run_review_task(review_id, review_request, options.get("username") or get_username(), time.time())
+
+    progress = review_progress.get(review_id, {})
+    if progress.get("status") == "complete":
+        result = review_result_store.get(review_id)
+        if result is None:
+            # Completed but the result was dropped or evicted before it could be saved with the batch
+            return {"status": "error", "error": "Review completed but its result is no longer available"}
+        return {"status": "complete", "result": result}
+    return {"status": "error", "error": progress.get("error") or "Review did not complete"}
+
+
+def publish_batch_progress(batch_id: str) -> None:
+    """Push a batch's aggregate progress to its stream."""
+    channel = batch_channel(batch_id)
+    if not progress_broadcaster.has_subscribers(channel):
+        return
+    batch = batch_manager.get_batch(batch_id, include_items=False)
+    if batch:
+        progress_broadcaster.publish(channel, "batch", batch)
+
+
+batch_settings = app_config.get("batch", {})
+# Each review extracts on EXTRACTION_CONNECTIONS_PER_REVIEW pooled connections
+# at once, so the pool bounds how many batch reviews can usefully run together
+max_batch_concurrency = max(1, pool_max_size // EXTRACTION_CONNECTIONS_PER_REVIEW)
+batch_manager = BatchReviewManager(
+    state_dir=str(project_root / batch_settings.get("state_dir", "data/batches")),
+    run_admission=_run_batch_admission,
+    default_concurrency=batch_settings.get("max_concurrent_reviews", 2),
+    on_change=publish_batch_progress,
+    max_concurrency=max_batch_concurrency
+)
+
+
+@app.post("/api/batch/start")
+def start_batch_review(request: BatchReviewRequest):
+    """
+    Start a batch review of every admission discharged in a date range.
+
+    Enumerates admissions with the same query and specialty filter as the
+    patient search (paging through the cohort on its keyset), then reviews
+    them in the background with bounded concurrency. Use /api/batch/{batch_id}
+    to track progress.
+
+    Cohorts larger than batch.max_admissions are cut to the most recent
+    discharges; the response then has truncated=true and a warning.
+    """
+    username = get_username()
+    conn = None
+
+    if request.concurrency is not None and not 1 <= request.concurrency <= max_batch_concurrency:
+        raise HTTPException(
+            status_code=400,
+            detail=f"concurrency must be between 1 and {max_batch_concurrency} "
+                   f"({pool_max_size} pooled connections, {EXTRACTION_CONNECTIONS_PER_REVIEW} per review)"
+        )
+
+    try:
+        conn = acquire_db_connection()
+        discharge_table = db_config.get("tables", {}).get("discharge_table")
+        station = db_config.get("extraction_settings", {}).get("station_focus", 626)
+
+        if not discharge_table:
+            raise HTTPException(status_code=500, detail="Discharge table not configured")
+
+        max_admissions = max(1, int(batch_settings.get("max_admissions", 2000)))
+        admissions: List[Dict[str, Any]] = []
+        cursor = None
+        truncated = False
+
+        # Page through the cohort newest discharge first; one extra row per
+        # page tells us whether another page follows
+        while True:
+            page_size = min(MAX_DISCHARGE_PAGE_SIZE, max_admissions - len(admissions))
+            query, query_params = build_discharged_patients_query(
+                get_table_reference(discharge_table),
+                request.start_date,
+                request.end_date,
+                station,
+                specialties=request.specialties,
+                top=page_size + 1,
+                cursor=cursor
+            )
+
+            start_time = time.time()
+            result = conn.execute_query(query, params=query_params)
+            execution_time_ms = (time.time() - start_time) * 1000
+
+            query_logger.log_query(
+                query_type="BATCH_COHORT_SEARCH",
+                username=username,
+                sql_query=query,
+                parameters={
+                    "start_date": request.start_date,
+                    "end_date": request.end_date,
+                    "station": station,
+                    "specialties": request.specialties,
+                    "page_size": page_size,
+                    "cursor": cursor
+                },
+                success=result["success"],
+                error=result.get("error"),
+                row_count=result["row_count"],
+                execution_time_ms=execution_time_ms
+            )
+
+            if not result["success"]:
+                raise HTTPException(status_code=500, detail=result["error"])
+
+            rows = result.get("rows") or []
+            admissions.extend(rows[:page_size])
+            if len(rows) <= page_size:
+                break
+            if len(admissions) >= max_admissions:
+                truncated = True
+                break
+            cursor = encode_discharge_cursor(rows[page_size - 1])
+
+        if not admissions:
+            raise HTTPException(status_code=404, detail="No discharged admissions match the batch criteria")
+        apply_specialty_display(admissions)
+    finally:
+        if conn is not None:
+            get_db_pool().release(conn)
+
+    batch = batch_manager.create_batch(
+        admissions,
+        criteria={
+            "start_date": request.start_date,
+            "end_date": request.end_date,
+            "specialties": request.specialties,
+            "station": station
+        },
+        username=username,
+        concurrency=request.concurrency,
+        options={"bypass_cache": request.bypass_cache}
+    )
+
+    audit_logger.log_event(
+        event_type="BATCH_REVIEW_STARTED",
+        username=username,
+        details={
+            "batch_id": batch["batch_id"],
+            "start_date": request.start_date,
+            "end_date": request.end_date,
+            "admissions": batch["total"],
+            "truncated": truncated
+        }
+    )
+
+    batch.pop("items", None)
+    response = {"success": True, "truncated": truncated, **batch}
+    if truncated:
+        logger.warning(f"Batch {batch['batch_id']} cohort cut to the {max_admissions} most recent discharges")
+        response["warning"] = (
+            f"More than {max_admissions} admissions match; only the {max_admissions} most recent "
+            f"discharges are reviewed. Narrow the date range or specialties to review the rest."
+        )
+    return response
+
+
+@app.get("/api/batch")
+async def list_batch_reviews():
+    """List batch reviews with their aggregate progress."""
+    return {"batches": batch_manager.list_batches()}
+
+
+@app.get("/api/batch/{batch_id}")
+async def get_batch_review(batch_id: str, include_items: bool = True):
+    """Get aggregate progress and per-admission status for a batch review."""
+    batch = batch_manager.get_batch(batch_id, include_items=include_items)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+@app.get("/api/batch/{batch_id}/stream")
+async def stream_batch_review(batch_id: str, request: Request):
+    """
+    Stream a batch's progress as Server-Sent Events.
+
+    Multiplexes two event types on one connection: "batch" (aggregate status,
+    as /api/batch/{batch_id}?include_items=false) whenever an admission
+    changes state, and "progress" (per-review snapshot with review_id) for
+    every member review. The stream ends when the batch completes or is
+    cancelled.
+    """
+    batch = batch_manager.get_batch(batch_id, include_items=False)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    channel = batch_channel(batch_id)
+    queue = progress_broadcaster.subscribe(channel)
+
+    async def event_stream():
+        try:
+            snapshot = batch_manager.get_batch(batch_id, include_items=False)
+            yield format_sse("batch", snapshot)
+            if snapshot["status"] in BATCH_FINAL_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    event_type, data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event_type, data)
+                if event_type == "batch" and data.get("status") in BATCH_FINAL_STATUSES:
+                    return
+        finally:
+            progress_broadcaster.unsubscribe(channel, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/batch/{batch_id}/result/{review_id}")
+def get_batch_review_result(batch_id: str, review_id: str):
+    """Get the full review result for one admission of a batch."""
+    result = batch_manager.load_result(batch_id, review_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Batch review result not available")
+    return result
+
+
+@app.post("/api/batch/{batch_id}/cancel")
+async def cancel_batch_review(batch_id: str):
+    """Stop a batch after the reviews already in progress finish."""
+    if not batch_manager.cancel(batch_id):
+        raise HTTPException(status_code=409, detail="Batch is not running")
+    return {"success": True, "batch_id": batch_id}
+
+
+@app.post("/api/batch/{batch_id}/resume")
+async def resume_batch_review(batch_id: str, retry_failed: bool = False):
+    """Resume a cancelled or interrupted batch, optionally retrying failed admissions."""
+    if batch_manager.get_batch(batch_id, include_items=False) is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if not batch_manager.resume(batch_id, retry_failed=retry_failed):
+        raise HTTPException(status_code=409, detail="Batch is already running")
+    return {"success": True, "batch_id": batch_id}
+
+
 # ============================================================================
 # Export Helper Functions
 # ============================================================================
@@ -2086,6 +2880,7 @@ async def export_results(request: ExportRequest):
         }
 
         # Generate document based on format
+        export_started = time.perf_counter()
         if request.format.lower() == "docx":
             export_to_docx(request.patient_id, analysis_data, file_path)
         elif request.format.lower() == "pdf":
@@ -2098,6 +2893,7 @@ async def export_results(request: ExportRequest):
         # Verify file was created
         if not file_path.exists():
             raise Exception(f"Export file was not created: {file_path}")
+        review_stage_seconds.observe(time.perf_counter() - export_started, stage="export")
 
         audit_logger.log_export(
             username=username,
@@ -2129,20 +2925,23 @@ async def export_results(request: ExportRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# The audit, query and evaluation log endpoints below wait for the log writer
+# and read log files or indexes, so they are plain functions run on the threadpool
+
 @app.get("/api/audit/statistics")
-async def get_audit_statistics():
+def get_audit_statistics():
     """Get audit statistics for the current session."""
     return audit_logger.get_statistics()
 
 
 @app.get("/api/audit/recent")
-async def get_recent_audit_events(count: int = 50, event_type: Optional[str] = None):
+def get_recent_audit_events(count: int = 50, event_type: Optional[str] = None):
     """Get recent audit events."""
     return audit_logger.get_recent_events(count=count, event_type=event_type)
 
 
 @app.get("/api/queries/recent")
-async def get_recent_queries(count: int = 20, query_type: Optional[str] = None):
+def get_recent_queries(count: int = 20, query_type: Optional[str] = None):
     """Get recent query logs with full details."""
     return {
         "queries": query_logger.get_recent_queries(count=count, query_type=query_type)
@@ -2150,7 +2949,7 @@ async def get_recent_queries(count: int = 20, query_type: Optional[str] = None):
 
 
 @app.get("/api/queries/failed")
-async def get_failed_queries(hours: int = 24):
+def get_failed_queries(hours: int = 24):
     """Get failed queries from the last N hours."""
     return {
         "failed_queries": query_logger.get_failed_queries(hours=hours)
@@ -2158,13 +2957,13 @@ async def get_failed_queries(hours: int = 24):
 
 
 @app.get("/api/queries/statistics")
-async def get_query_statistics():
+def get_query_statistics():
     """Get query statistics."""
     return query_logger.get_query_statistics()
 
 
 @app.get("/api/evaluation/{evaluation_id}/log")
-async def get_evaluation_log(evaluation_id: str):
+def get_evaluation_log(evaluation_id: str):
     """Get detailed log for a specific evaluation."""
     return {
         "evaluation_id": evaluation_id,
@@ -2172,6 +2971,34 @@ async def get_evaluation_log(evaluation_id: str):
     }
 
 
+def _pool_connections_gauge() -> Optional[Dict[Tuple[str], float]]:
+    if not db_pool:
+        return None
+    stats = db_pool.get_statistics()
+    return {("in_use",): stats["in_use"], ("idle",): stats["idle"]}
+
+
+# Current values read from the owning components when /metrics is scraped
+metrics.gauge_callback(
+    "db_pool_connections", "Pooled database connections by state", _pool_connections_gauge, ["state"]
+)
+metrics.gauge_callback(
+    "note_analysis_cache_hit_ratio",
+    "Share of note analysis cache lookups served from the cache since startup",
+    lambda: note_analysis_cache.get_statistics()["hit_rate"] if note_analysis_cache else None
+)
+metrics.gauge_callback(
+    "log_writer_queue_depth", "Log lines waiting for the background writer",
+    lambda: log_writer.get_statistics()["queue_depth"]
+)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Review stage latency histograms, pool wait, token and cache metrics in Prometheus text format."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/api/diagnostics")
 async def get_diagnostics():
     """Get system diagnostics information."""
@@ -2200,12 +3027,21 @@ async def get_diagnostics():
         "database": {
             "configured_server": db_config.get("databases", {}).get("LSV", {}).get("server", "Not configured"),
             "configured_database": db_config.get("databases", {}).get("LSV", {}).get("database", "Not configured"),
+            "pool": db_pool.get_statistics() if db_pool else None,
+            "schema_cache": schema_cache.get_statistics(),
+            "staff_role_index": staff_role_index.get_statistics() if staff_role_index else None,
+            "specialty_catalog": specialty_catalog.get_statistics(),
             **db_test
         },
         "va_gpt": {
             "initialized": va_gpt_client.is_initialized(),
+            "async_initialized": async_va_gpt_client.is_initialized() if async_va_gpt_client else False,
+            "analysis_cache": note_analysis_cache.get_statistics() if note_analysis_cache else None,
             "api_key_configured": bool(os.getenv('VA_AI_API_KEY'))
         },
+        "review_results": review_result_store.get_statistics(),
+        "log_writer": log_writer.get_statistics(),
+        "metrics": metrics.get_statistics(),
         "audit_logger": {
             "session_id": audit_logger.session_id,
             "log_dir": str(audit_logger.log_dir)
@@ -2213,7 +3049,8 @@ async def get_diagnostics():
         "query_logger": {
             "query_log_file": str(query_logger.query_log_file),
             "eval_log_file": str(query_logger.eval_log_file),
-            "statistics": query_logger.get_query_statistics()
+            "statistics": query_logger.get_query_statistics(),
+            "evaluation_statistics": query_logger.get_evaluation_statistics()
         },
         "configuration": {
             "tables_configured": all([
@@ -2235,11 +3072,7 @@ async def shutdown_server():
 
     Responds immediately, then terminates the process shortly after.
     """
-    def _shutdown():
-        time.sleep(0.5)
-        os._exit(0)
-
-    threading.Thread(target=_shutdown, daemon=True).start()
+    exit_process()
     return {"success": True, "message": "Server is shutting down..."}
 
 
@@ -2250,11 +3083,30 @@ async def shutdown_server():
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup."""
+    global async_va_gpt_client, main_event_loop
+
     try:
         logger.info("=" * 60)
         logger.info("Inpatient Documentation and Coding Evaluation")
         logger.info("Starting application...")
         logger.info("=" * 60)
+
+        # The async client's HTTP pool must be created on the loop that uses it
+        ai_settings = app_config.get("ai", {})
+        main_event_loop = asyncio.get_running_loop()
+        progress_broadcaster.set_loop(main_event_loop)
+        async_va_gpt_client = AsyncVAGPTClient(
+            use_azure=ai_settings.get("use_azure", True),
+            max_connections=ai_settings.get("max_connections", 20),
+            request_timeout=ai_settings.get("request_timeout_seconds", 120),
+            cache=note_analysis_cache
+        )
+
+        # Pick up batches interrupted by a crash or restart
+        batch_manager.recover()
+
+        # Load the specialty list before the first page load asks for it
+        specialty_catalog.warm()
         logger.info("Startup complete")
     except Exception as e:
         logger.error(f"Startup error: {e}", exc_info=True)
@@ -2265,16 +3117,30 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     try:
-        global db_connection
+        global db_connection, db_pool
 
         if db_connection:
             db_connection.disconnect()
 
+        if db_pool:
+            db_pool.close_all()
+
+        if async_va_gpt_client:
+            await async_va_gpt_client.aclose()
+
+        if note_analysis_cache:
+            note_analysis_cache.close()
+
+        if staff_role_index:
+            staff_role_index.close()
+
         audit_logger.log_event(
             event_type="APPLICATION_SHUTDOWN",
             username=get_username(),
             details={}
         )
+
+        drain_logs()
         logger.info("Shutdown complete")
     except Exception as e:
         logger.error(f"Shutdown error: {e}", exc_info=True)
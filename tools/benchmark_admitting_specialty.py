@@ -0,0 +1,195 @@
+"""
+Admitting Specialty Query Benchmark
+
+Compares two ways of resolving each admission's admitting treating specialty
+(the earliest Inpat.SpecialtyTransfer row) for the discharged-patient search:
+
+1. window     - the former query: ROW_NUMBER() over every SpecialtyTransfer
+                row, then join the rn = 1 rows to the admissions
+2. correlated - the current query: a TOP 1 lookup per admission in the result
+                window (OUTER APPLY on SQL Server; a correlated LIMIT 1
+                subquery in SQLite)
+
+The CDW cannot be used for repeatable benchmarks, so the script builds a
+synthetic stand-in in a local SQLite database with the same tables, keys
+and indexes, prints each query plan and times both shapes.
+
+Usage:
+    python tools/benchmark_admitting_specialty.py [--admissions 200000] [--transfers 3]
+        [--page-size 100] [--repeat 5] [--specialty MEDICINE]
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timedelta
+
+SPECIALTIES = [
+    "MEDICINE", "GENERAL(ACUTE MEDICINE)", "CARDIOLOGY", "SURGERY", "GENERAL SURGERY",
+    "PSYCHIATRY", "NEUROLOGY", "MEDICAL ICU", "SURGICAL ICU", "TELEMETRY", "OBSERVATION"
+]
+
+# The former query, translated to SQLite
+WINDOW_QUERY = """
+SELECT
+    i.InpatientSID,
+    i.DischargeDateTime,
+    COALESCE(admitting_spec.Specialty, 'UNKNOWN') AS AdmittingTreatingSpecialty
+FROM Inpatient i
+LEFT JOIN (
+    SELECT ranked.InpatientSID, ts.Specialty
+    FROM (
+        SELECT
+            st.InpatientSID,
+            st.TreatingSpecialtySID,
+            ROW_NUMBER() OVER (PARTITION BY st.InpatientSID ORDER BY st.SpecialtyTransferDateTime ASC) AS rn
+        FROM SpecialtyTransfer st
+        WHERE st.TreatingSpecialtySID IS NOT NULL AND st.TreatingSpecialtySID > 0
+    ) ranked
+    INNER JOIN TreatingSpecialty ts ON ranked.TreatingSpecialtySID = ts.TreatingSpecialtySID
+    WHERE ranked.rn = 1
+) admitting_spec ON i.InpatientSID = admitting_spec.InpatientSID
+WHERE i.DischargeDateTime >= ? AND i.DischargeDateTime < ? AND i.Sta3n = ?
+  {specialty_clause}
+ORDER BY i.DischargeDateTime DESC, i.InpatientSID DESC
+LIMIT ?
+"""
+
+# The current query; SQLite has no OUTER APPLY, so the TOP 1 lookup is a correlated subquery
+CORRELATED_QUERY = """
+SELECT
+    i.InpatientSID,
+    i.DischargeDateTime,
+    COALESCE(admitting_spec.Specialty, 'UNKNOWN') AS AdmittingTreatingSpecialty
+FROM Inpatient i
+LEFT JOIN TreatingSpecialty admitting_spec
+    ON admitting_spec.TreatingSpecialtySID = (
+        SELECT st.TreatingSpecialtySID
+        FROM SpecialtyTransfer st
+        WHERE st.InpatientSID = i.InpatientSID
+          AND st.TreatingSpecialtySID IS NOT NULL AND st.TreatingSpecialtySID > 0
+        ORDER BY st.SpecialtyTransferDateTime ASC
+        LIMIT 1
+    )
+WHERE i.DischargeDateTime >= ? AND i.DischargeDateTime < ? AND i.Sta3n = ?
+  {specialty_clause}
+ORDER BY i.DischargeDateTime DESC, i.InpatientSID DESC
+LIMIT ?
+"""
+
+SPECIALTY_CLAUSE = "AND UPPER(TRIM(COALESCE(admitting_spec.Specialty, 'UNKNOWN'))) = ?"
+
+
+def build_database(admissions: int, transfers_per_admission: int, seed: int = 7) -> sqlite3.Connection:
+    """Create and fill the stand-in tables in an in-memory SQLite database."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE TreatingSpecialty (
+            TreatingSpecialtySID INTEGER PRIMARY KEY,
+            Specialty TEXT NOT NULL
+        );
+        CREATE TABLE Inpatient (
+            InpatientSID INTEGER PRIMARY KEY,
+            PatientSID INTEGER NOT NULL,
+            Sta3n INTEGER NOT NULL,
+            AdmitDateTime TEXT NOT NULL,
+            DischargeDateTime TEXT
+        );
+        CREATE TABLE SpecialtyTransfer (
+            SpecialtyTransferSID INTEGER PRIMARY KEY,
+            InpatientSID INTEGER NOT NULL,
+            TreatingSpecialtySID INTEGER,
+            SpecialtyTransferDateTime TEXT NOT NULL
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO TreatingSpecialty VALUES (?, ?)",
+        [(sid, name) for sid, name in enumerate(SPECIALTIES, 1)]
+    )
+
+    start = datetime(2020, 1, 1)
+    span_minutes = 5 * 365 * 24 * 60
+    inpatients = []
+    transfers = []
+    transfer_sid = 0
+    for inpatient_sid in range(1, admissions + 1):
+        admit = start + timedelta(minutes=rng.randrange(span_minutes))
+        discharge = admit + timedelta(hours=rng.randrange(12, 24 * 20))
+        inpatients.append((
+            inpatient_sid,
+            rng.randrange(1, admissions // 2 + 2),
+            626 if rng.random() < 0.8 else 657,
+            admit.isoformat(sep=" "),
+            discharge.isoformat(sep=" ")
+        ))
+        for position in range(rng.randrange(1, 2 * transfers_per_admission)):
+            transfer_sid += 1
+            when = admit + timedelta(hours=position * rng.randrange(1, 48))
+            transfers.append((transfer_sid, inpatient_sid, rng.randrange(1, len(SPECIALTIES) + 1), when.isoformat(sep=" ")))
+
+    conn.executemany("INSERT INTO Inpatient VALUES (?, ?, ?, ?, ?)", inpatients)
+    conn.executemany("INSERT INTO SpecialtyTransfer VALUES (?, ?, ?, ?)", transfers)
+
+    # Mirrors the CDW indexing: admissions by station/discharge, transfers by admission
+    conn.executescript("""
+        CREATE INDEX ix_inpatient_sta3n_discharge ON Inpatient (Sta3n, DischargeDateTime);
+        CREATE INDEX ix_transfer_inpatient_time ON SpecialtyTransfer (InpatientSID, SpecialtyTransferDateTime);
+        ANALYZE;
+    """)
+    print(f"Stand-in database: {admissions:,} admissions, {len(transfers):,} specialty transfers")
+    return conn
+
+
+def run_benchmark(conn: sqlite3.Connection, page_size: int, repeat: int, specialty: str) -> None:
+    """Print plans and timings for both query shapes, with and without a specialty filter."""
+    window_start = "2024-06-01 00:00:00"
+    window_end = "2024-07-01 00:00:00"
+
+    cases = [("no filter", "", ()), (f"specialty = {specialty}", SPECIALTY_CLAUSE, (specialty.upper(),))]
+    shapes = [("window", WINDOW_QUERY), ("correlated", CORRELATED_QUERY)]
+
+    for case_name, clause, extra in cases:
+        print(f"\n=== {case_name} (one month, page of {page_size}) ===")
+        results = {}
+        for shape_name, template in shapes:
+            query = template.format(specialty_clause=clause)
+            params = (window_start, window_end, 626) + extra + (page_size,)
+
+            print(f"\n[{shape_name}] plan:")
+            for row in conn.execute("EXPLAIN QUERY PLAN " + query, params):
+                print(f"  {row[-1]}")
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = conn.execute(query, params).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[shape_name] = rows
+            print(f"[{shape_name}] {len(rows)} rows, median {statistics.median(timings):.1f} ms "
+                  f"(min {min(timings):.1f}, max {max(timings):.1f})")
+
+        same = results["window"] == results["correlated"]
+        print(f"\nResults identical: {same}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark admitting specialty query shapes on a SQLite stand-in")
+    parser.add_argument("--admissions", type=int, default=200000, help="Synthetic admissions to generate")
+    parser.add_argument("--transfers", type=int, default=3, help="Average specialty transfers per admission")
+    parser.add_argument("--page-size", type=int, default=100, help="Rows per page (TOP/LIMIT)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--specialty", default="MEDICINE", help="Specialty used for the filtered case")
+    args = parser.parse_args()
+
+    conn = build_database(args.admissions, args.transfers)
+    try:
+        run_benchmark(conn, args.page_size, args.repeat, args.specialty)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
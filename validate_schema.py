@@ -3,41 +3,29 @@ Validate database schema against expected queries.
 This script checks which columns actually exist in the production database.
 """
 
-import pyodbc
 import json
 import sys
 
+from app.database.connection import DatabaseConnection
+from app.database.schema_cache import SchemaCache
+
 def load_database_config():
     """Load database config from JSON file."""
     with open("config/database_config.json", "r") as f:
         return json.load(f)
 
-def get_columns(cursor, schema, table):
-    """Get all columns for a table."""
-    query = """
-    SELECT COLUMN_NAME
-    FROM INFORMATION_SCHEMA.COLUMNS
-    WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
-    ORDER BY ORDINAL_POSITION
-    """
-    cursor.execute(query, (schema, table))
-    return [row[0] for row in cursor.fetchall()]
-
 def validate_schema():
     """Validate all required tables and columns."""
     db_config = load_database_config()
     lsv_config = db_config.get("databases", {}).get("LSV", {})
     
-    conn_str = (
-        f"Driver={{ODBC Driver 17 for SQL Server}};"
-        f"Server={lsv_config.get('server')};"
-        f"Database={lsv_config.get('database')};"
-        f"Trusted_Connection=yes;"
-    )
-    
     try:
-        conn = pyodbc.connect(conn_str)
-        cursor = conn.cursor()
+        conn = DatabaseConnection(
+            server=lsv_config.get("server"),
+            database=lsv_config.get("database")
+        )
+        if not conn.connect():
+            raise ConnectionError(f"could not connect to {lsv_config.get('server')}")
         
         print("=" * 80)
         print("DATABASE SCHEMA VALIDATION")
@@ -82,11 +70,19 @@ def validate_schema():
         
         all_valid = True
         validation_results = {}
+
+        # Same metadata lookup the application uses; all tables in one round trip
+        schema_cache = SchemaCache()
+        table_columns = schema_cache.load_tables(
+            conn, [f"{schema}.{table}" for schema, table in tables_to_check]
+        )
         
         for (schema, table), expected_cols in tables_to_check.items():
             print(f"\n[{schema}.{table}]")
             try:
-                actual_cols = get_columns(cursor, schema, table)
+                actual_cols = table_columns[f"{schema}.{table}"]
+                if actual_cols is None:
+                    raise RuntimeError("column metadata lookup failed")
                 actual_cols_set = set(actual_cols)
                 expected_cols_set = set(expected_cols)
                 
@@ -114,8 +110,7 @@ def validate_schema():
                 all_valid = False
                 validation_results[f"{schema}.{table}"] = {"error": str(e)}
         
-        cursor.close()
-        conn.close()
+        conn.disconnect()
         
         print("\n" + "=" * 80)
         if all_valid: